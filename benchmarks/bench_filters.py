@@ -0,0 +1,138 @@
+# benchmarks/bench_filters.py
+#
+# Сравнение фильтров курсора по дрожанию на фиксациях, задержке на саккадах и стоимости обновления.
+# Синтетический след: фиксации в случайных точках экрана с гауссовым шумом и мгновенные саккады
+# между ними (истинное положение известно). Записанная сессия (--session) даёт реальный след
+# без эталона: дрожание считается по спокойным участкам, задержка — по взаимной корреляции скоростей.
+# Запуск из корня проекта:
+#   python -m benchmarks.bench_filters --output filters.json
+#   python -m benchmarks.bench_filters --session sessions/demo
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import write_report
+from core.filters import FILTERS, create_filter
+from utils.recording import ReplaySession
+
+SCREEN_W, SCREEN_H = 1920, 1080
+
+
+def synthetic_trace(rng, fixations=60, fps=30.0, noise_px=15.0):
+    times, truth, saccade_frames = [], [], []
+    t = 0.0
+    for _ in range(fixations):
+        target = rng.uniform((100, 100), (SCREEN_W - 100, SCREEN_H - 100))
+        saccade_frames.append(len(times))
+        for _ in range(int(rng.uniform(0.4, 1.2) * fps)):
+            times.append(t)
+            truth.append(target)
+            t += 1.0 / fps
+    truth = np.asarray(truth)
+    measured = truth + rng.normal(0, noise_px, truth.shape)
+    return np.asarray(times), measured, truth, saccade_frames[1:]
+
+
+def session_trace(path):
+    session = ReplaySession(path)
+    iris = np.asarray(session.landmarks[:, 468, :2], dtype=np.float64)
+    valid = ~np.isnan(iris).any(axis=1)
+    if not valid.any():
+        raise RuntimeError("В сессии нет кадров с лицом.")
+    return np.asarray(session.timestamps)[valid], iris[valid] * (SCREEN_W, SCREEN_H)
+
+
+def run_filter(cursor_filter, times, measured):
+    # Обычные float, как в основном цикле: иначе замер включает распаковку скаляров NumPy
+    points, stamps = measured.tolist(), times.tolist()
+    out = [None] * len(points)
+    update = cursor_filter.update
+    start = time.perf_counter()
+    for i, (x, y) in enumerate(points):
+        out[i] = update(x, y, stamps[i])
+    per_update = (time.perf_counter() - start) / len(points)
+    return np.asarray(out), per_update
+
+
+def synthetic_metrics(times, filtered, truth, saccades, fps):
+    settle = int(0.2 * fps)
+    # Дрожание: RMS смещения курсора между кадрами на установившейся части фиксаций
+    steady = np.ones(len(times), dtype=bool)
+    for frame in [0] + saccades:
+        steady[frame:frame + settle] = False
+    steps = np.linalg.norm(np.diff(filtered, axis=0), axis=1)
+    jitter = float(np.sqrt(np.mean(steps[steady[1:]] ** 2)))
+
+    # Задержка: время, за которое курсор проходит 90% амплитуды саккады
+    lags = []
+    for frame in saccades:
+        start, target = truth[frame - 1], truth[frame]
+        amplitude = np.linalg.norm(target - start)
+        end = min(frame + int(fps), len(times))
+        for i in range(frame, end):
+            if np.linalg.norm(filtered[i] - target) <= 0.1 * amplitude:
+                lags.append(times[i] - times[frame])
+                break
+        else:
+            lags.append(times[end - 1] - times[frame])
+    lags_ms = np.asarray(lags) * 1000.0
+    return {
+        "jitter_px": jitter,
+        "lag_mean_ms": float(lags_ms.mean()),
+        "lag_p95_ms": float(np.percentile(lags_ms, 95)),
+        "rmse_px": float(np.sqrt(np.mean(np.sum((filtered - truth) ** 2, axis=1)))),
+    }
+
+
+def session_metrics(times, measured, filtered, max_lag=15):
+    dt = float(np.median(np.diff(times))) if len(times) > 1 else 1 / 30
+    raw_speed = np.linalg.norm(np.diff(measured, axis=0), axis=1)
+    out_speed = np.linalg.norm(np.diff(filtered, axis=0), axis=1)
+    # Спокойные участки — нижняя половина по скорости исходного следа
+    calm = raw_speed <= np.median(raw_speed)
+    jitter = float(np.sqrt(np.mean(out_speed[calm] ** 2)))
+    best_shift, best_corr = 0, -np.inf
+    for shift in range(min(max_lag, len(raw_speed) - 2)):
+        corr = np.corrcoef(raw_speed[:len(raw_speed) - shift], out_speed[shift:])[0, 1]
+        if corr > best_corr:
+            best_shift, best_corr = shift, corr
+    return {"jitter_px": jitter, "lag_ms": best_shift * dt * 1000.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк фильтров курсора")
+    parser.add_argument("--session", help="Каталог записанной сессии вместо синтетического следа")
+    parser.add_argument("--fps", type=float, default=30.0, help="Частота кадров синтетического следа")
+    parser.add_argument("--noise", type=float, default=15.0, help="Шум синтетического следа (пикс, σ)")
+    parser.add_argument("--output", help="Путь к JSON-отчёту (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.session:
+        times, measured = session_trace(args.session)
+        truth = None
+    else:
+        times, measured, truth, saccades = synthetic_trace(rng, fps=args.fps, noise_px=args.noise)
+
+    results = {}
+    variants = [("unfiltered", None)] + [(name, name) for name in FILTERS]
+    for label, name in variants:
+        if name is None:
+            filtered, per_update = measured, 0.0
+        else:
+            filtered, per_update = run_filter(create_filter(name), times, measured)
+        if truth is not None:
+            stats = synthetic_metrics(times, filtered, truth, saccades, args.fps)
+        else:
+            stats = session_metrics(times, measured, filtered)
+        stats["ns_per_update"] = per_update * 1e9
+        results[label] = stats
+
+    write_report({"benchmark": "cursor_filters", "source": args.session or "synthetic",
+                  "frames": int(len(times)), "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
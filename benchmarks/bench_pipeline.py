@@ -0,0 +1,220 @@
+# benchmarks/bench_pipeline.py
+#
+# Задержка каждого этапа цикла main.main() по отдельности и всего цикла целиком:
+# захват, BGR→RGB, детекция landmark'ов, расчёт взгляда (с зеркалированием landmark'ов),
+# map_to_screen, сглаживание и перемещение курсора.
+# По умолчанию работает без камеры и дисплея: синтетические кадры (или записанная сессия),
+# подменённый FaceLandmarker и заглушка мыши.
+# Запуск из корня проекта:
+#   python -m benchmarks.bench_pipeline --frames 500 --output pipeline.json
+#   python -m benchmarks.bench_pipeline --session sessions/demo --real-landmarker
+#   python -m benchmarks.bench_pipeline --compare baseline.json   # код выхода 1 при регрессии
+
+import argparse
+import json
+import sys
+import time
+from unittest.mock import patch
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from benchmarks.common import latency_stats, write_report
+from config.settings import CAMERA_MIRROR
+from core.cursor_output import NullBackend, create_backend
+from core.gaze_tracker import GazeTracker, Landmark
+from core.mouse_controller import MouseController
+from core.screen_mapper import ScreenMapper
+from utils.recording import ReplayCamera, ReplaySession
+
+STAGES = ("capture", "bgr_to_rgb", "landmarker_detect", "gaze_features",
+          "map_to_screen", "smoothing", "move_cursor")
+
+
+def synthetic_landmarks(rng):
+    # Лицо в центре кадра; радужки около глаз, небольшой шум от кадра к кадру
+    landmarks = np.empty((478, 3), dtype=np.float32)
+    landmarks[:, 0] = rng.uniform(0.35, 0.65, 478)
+    landmarks[:, 1] = rng.uniform(0.3, 0.75, 478)
+    landmarks[:, 2] = 0.0
+    landmarks[468] = (0.44, 0.45, 0.0)
+    landmarks[473] = (0.56, 0.45, 0.0)
+    landmarks[6] = (0.5, 0.46, 0.0)
+    return landmarks
+
+
+class SyntheticCamera:
+    """Источник кадров с интерфейсом Camera: предсгенерированные кадры по кругу."""
+
+    def __init__(self, width, height, count=8):
+        rng = np.random.default_rng(0)
+        self.frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+        self.seq = 0
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+    def read_latest(self, timeout=None):
+        self.seq += 1
+        self.frames_captured += 1
+        return self.frames[self.seq % len(self.frames)].copy(), self.seq, time.monotonic()
+
+    def release(self):
+        pass
+
+
+class FakeLandmarker:
+    """Подмена FaceLandmarker: мгновенно возвращает заготовленные landmark'и."""
+
+    def __init__(self, landmark_sets):
+        self.results = []
+        for landmarks in landmark_sets:
+            result = type("FaceLandmarkerResult", (), {})()
+            result.face_landmarks = [] if np.isnan(landmarks).any() else [[Landmark(*lm) for lm in landmarks.tolist()]]
+            self.results.append(result)
+        self.index = 0
+
+    def _next(self, *args):
+        result = self.results[self.index % len(self.results)]
+        self.index += 1
+        return result
+
+    detect = _next
+    detect_for_video = _next
+
+    def close(self):
+        pass
+
+
+def make_tracker(real_landmarker, landmark_sets):
+    if real_landmarker:
+        return GazeTracker(running_mode="VIDEO", mirror=CAMERA_MIRROR)
+    fake = FakeLandmarker(landmark_sets)
+    with patch.object(mp.tasks.vision.FaceLandmarker, "create_from_options", return_value=fake):
+        return GazeTracker(running_mode="VIDEO", mirror=CAMERA_MIRROR)
+
+
+def to_mp_image(frame):
+    # Этап BGR→RGB включает упаковку в mp.Image — в GazeTracker это одна операция на кадр
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+
+
+def timed(samples, fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    samples.append(time.perf_counter() - t0)
+    return result
+
+
+def run_benchmark(frames=300, width=1280, height=720, session=None, real_landmarker=False, real_mouse=False):
+    rng = np.random.default_rng(1)
+    if session:
+        landmark_sets = np.asarray(ReplaySession(session).landmarks)
+        make_camera = lambda: ReplayCamera(session, loop=True)
+    else:
+        landmark_sets = np.stack([synthetic_landmarks(rng) for _ in range(16)])
+        make_camera = lambda: SyntheticCamera(width, height)
+    if len(landmark_sets) == 0:
+        raise RuntimeError("Сессия не содержит кадров.")
+
+    mapper = ScreenMapper(calibration_file="", screen_w=1920, screen_h=1080)
+    mouse_backend = create_backend() if real_mouse else NullBackend()
+    samples = {stage: [] for stage in STAGES}
+
+    # Этапы по отдельности
+    camera = make_camera()
+    tracker = make_tracker(real_landmarker, landmark_sets)
+    mouse = MouseController(backend=mouse_backend, threaded_output=False)
+    for i in range(frames):
+        frame, _, timestamp = timed(samples["capture"], camera.read_latest)
+        mp_image = timed(samples["bgr_to_rgb"], to_mp_image, frame)
+        results = timed(samples["landmarker_detect"], tracker.face_landmarker.detect_for_video,
+                        mp_image, tracker._next_timestamp_ms(timestamp))
+        gaze, _ = timed(samples["gaze_features"], tracker._process_results, results, None, None, None)
+        if gaze is None:
+            continue
+        screen_x, screen_y = timed(samples["map_to_screen"], mapper.map_to_screen, *gaze)
+        smoothed_x, smoothed_y = timed(samples["smoothing"], mouse._smooth_position, screen_x, screen_y, timestamp)
+        timed(samples["move_cursor"], mouse.backend.move, smoothed_x, smoothed_y)
+    tracker.close()
+    camera.release()
+    mouse.close()
+
+    # Цикл целиком, как в main.main()
+    camera = make_camera()
+    tracker = make_tracker(real_landmarker, landmark_sets)
+    mouse = MouseController(backend=mouse_backend)
+    end_to_end = []
+    start = time.perf_counter()
+    for i in range(frames):
+        t0 = time.perf_counter()
+        frame, _, timestamp = camera.read_latest()
+        gaze, face_center = tracker.get_gaze_point(frame, timestamp)
+        if gaze and face_center:
+            screen_x, screen_y = mapper.map_to_screen(*gaze)
+            mouse.update_cursor(screen_x, screen_y, timestamp)
+            mouse.handle_dwell_click(*gaze)
+        end_to_end.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - start
+    tracker.close()
+    camera.release()
+    mouse.close()
+
+    stages = {}
+    for stage in STAGES:
+        stats = latency_stats(samples[stage])
+        if stats["count"]:
+            stats["throughput_per_s"] = 1000.0 / stats["mean_ms"] if stats["mean_ms"] > 0 else None
+        stages[stage] = stats
+    e2e = latency_stats(end_to_end)
+    e2e["throughput_fps"] = frames / wall if wall > 0 else None
+    return {
+        "benchmark": "pipeline",
+        "frames": frames,
+        "source": session or f"synthetic {width}x{height}",
+        "real_landmarker": real_landmarker,
+        "real_mouse": real_mouse,
+        "stages": stages,
+        "end_to_end": e2e,
+    }
+
+
+def compare_reports(current, baseline, threshold):
+    """Возвращает список этапов, у которых p50 вырос больше чем на threshold (доля)."""
+    regressions = []
+    pairs = [(name, current["stages"].get(name), baseline["stages"].get(name)) for name in STAGES]
+    pairs.append(("end_to_end", current["end_to_end"], baseline["end_to_end"]))
+    for name, now, before in pairs:
+        if not now or not before or not now.get("count") or not before.get("count"):
+            continue
+        if before["p50_ms"] > 0 and now["p50_ms"] > before["p50_ms"] * (1 + threshold):
+            regressions.append({"stage": name, "baseline_p50_ms": before["p50_ms"], "p50_ms": now["p50_ms"]})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк этапов основного цикла")
+    parser.add_argument("--frames", type=int, default=300, help="Количество кадров")
+    parser.add_argument("--width", type=int, default=1280, help="Ширина синтетического кадра")
+    parser.add_argument("--height", type=int, default=720, help="Высота синтетического кадра")
+    parser.add_argument("--session", help="Каталог записанной сессии вместо синтетических кадров")
+    parser.add_argument("--real-landmarker", action="store_true", help="Использовать настоящую модель MediaPipe")
+    parser.add_argument("--real-mouse", action="store_true", help="Двигать системный курсор (бэкенд CURSOR_BACKEND)")
+    parser.add_argument("--output", help="Путь к JSON-отчёту (по умолчанию stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON-отчёт для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимый рост p50 при сравнении (доля)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.frames, args.width, args.height, args.session,
+                           args.real_landmarker, args.real_mouse)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            report["regressions"] = compare_reports(report, json.load(f), args.threshold)
+    write_report(report, args.output)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
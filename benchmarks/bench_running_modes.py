@@ -0,0 +1,88 @@
+# benchmarks/bench_running_modes.py
+#
+# Сравнение режимов FaceLandmarker по FPS и загрузке CPU на одних и тех же кадрах.
+# Запуск из корня проекта:
+#   python -m benchmarks.bench_running_modes --source 0 --frames 300
+#   python -m benchmarks.bench_running_modes --source session.mp4 --output modes.json
+
+import argparse
+import threading
+import time
+
+from benchmarks.common import latency_stats, load_frames, write_report
+from core.gaze_tracker import GazeTracker
+
+# (название, режим, blendshapes и матрицы трансформации)
+CONFIGURATIONS = [
+    ("legacy_image_all_outputs", "IMAGE", True),  # прежнее поведение
+    ("image", "IMAGE", False),
+    ("video", "VIDEO", False),
+    ("live_stream", "LIVE_STREAM", False),
+]
+
+
+def run_configuration(frames, running_mode, all_outputs, fps):
+    processed = []
+    done = threading.Event()
+
+    def on_result(gaze, face_center, timestamp_ms, eye_openness=None):
+        processed.append(gaze is not None)
+        if len(processed) == len(frames):
+            done.set()
+
+    tracker = GazeTracker(
+        running_mode=running_mode,
+        output_blendshapes=all_outputs,
+        output_transformation_matrixes=all_outputs,
+        result_callback=on_result
+    )
+    latencies = []
+    faces = 0
+    # Временные метки как у камеры с заданной частотой — VIDEO-трекинг видит равномерный поток
+    base = time.monotonic()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i, frame in enumerate(frames):
+        t0 = time.perf_counter()
+        gaze, _ = tracker.get_gaze_point(frame, base + i / fps)
+        latencies.append(time.perf_counter() - t0)
+        if running_mode != "LIVE_STREAM" and gaze is not None:
+            faces += 1
+    if running_mode == "LIVE_STREAM":
+        # LIVE_STREAM сам отбрасывает кадры, пока занят, поэтому ждём только хвост очереди
+        done.wait(timeout=2.0)
+        faces = sum(processed)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    tracker.close()
+
+    processed_count = len(processed) if running_mode == "LIVE_STREAM" else len(frames)
+    return {
+        "running_mode": running_mode,
+        "all_outputs": all_outputs,
+        "frames_submitted": len(frames),
+        "frames_processed": processed_count,
+        "faces_found": faces,
+        "fps": processed_count / wall if wall > 0 else 0.0,
+        "cpu_percent": 100.0 * cpu / wall if wall > 0 else 0.0,
+        "call_latency": latency_stats(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк режимов FaceLandmarker")
+    parser.add_argument("--source", default="0", help="ID камеры или путь к видеофайлу")
+    parser.add_argument("--frames", type=int, default=300, help="Количество кадров")
+    parser.add_argument("--fps", type=float, default=30.0, help="Частота кадров для временных меток")
+    parser.add_argument("--output", help="Путь к JSON-отчёту (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    results = {}
+    for name, running_mode, all_outputs in CONFIGURATIONS:
+        results[name] = run_configuration(frames, running_mode, all_outputs, args.fps)
+    write_report({"benchmark": "running_modes", "source": args.source, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_screen_mapper.py
+#
+# Микробенчмарк стоимости одного вызова отображения взгляда на экран.
+# "sklearn_predict" воспроизводит прежнюю реализацию (два LinearRegression.predict на кадр)
+# и запускается только если scikit-learn установлен. "load" сравнивает старт из JSON с подбором
+# модели и загрузку готовых коэффициентов из бинарного профиля.
+# Запуск из корня проекта:
+#   python -m benchmarks.bench_screen_mapper --calls 20000
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import write_report
+from calibration.profiles import CalibrationProfile, ProfileKey, ProfileStore, calibration_settings
+from core.screen_mapper import ScreenMapper
+
+
+def make_calibration(path):
+    gx, gy = np.meshgrid(np.linspace(0.2, 0.8, 3), np.linspace(0.3, 0.7, 3))
+    gaze = np.c_[gx.ravel(), gy.ravel()]
+    screen = np.c_[2560 * gaze[:, 0], 1440 * gaze[:, 1]]
+    with open(path, 'w') as f:
+        json.dump({"gaze_coords": gaze.tolist(), "screen_coords": screen.tolist()}, f)
+    return gaze, screen
+
+
+def time_per_call(fn, points):
+    start = time.perf_counter()
+    for gx, gy in points:
+        fn(gx, gy)
+    return (time.perf_counter() - start) / len(points)
+
+
+def bench_sklearn(gaze, screen, points):
+    try:
+        from sklearn.linear_model import LinearRegression
+    except ImportError:
+        return None
+    model_x = LinearRegression().fit(gaze[:, 0].reshape(-1, 1), screen[:, 0])
+    model_y = LinearRegression().fit(gaze[:, 1].reshape(-1, 1), screen[:, 1])
+
+    def legacy_map(gx, gy):
+        return int(model_x.predict([[gx]])[0]), int(model_y.predict([[gy]])[0])
+
+    return time_per_call(legacy_map, points)
+
+
+def bench_load(calibration_file, gaze, screen, profile_dir, repeats=200):
+    key = ProfileKey("bench", 0, 2560, 1440)
+    store = ProfileStore(profile_dir)
+    results = {}
+    for model_type in ("linear", "poly2", "homography"):
+        # Параметры — как у маппера с этой моделью, иначе замер попадёт на отказ от профиля
+        store.save(CalibrationProfile.fit(key, model_type, gaze, screen, settings=calibration_settings(model_type)))
+        start = time.perf_counter()
+        for _ in range(repeats):
+            ScreenMapper(calibration_file=calibration_file, screen_w=2560, screen_h=1440, model_type=model_type)
+        json_fit = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            ScreenMapper(screen_w=2560, screen_h=1440, model_type=model_type, profile_store=store, profile_key=key)
+        profile = (time.perf_counter() - start) / repeats
+        results[model_type] = {"json_fit_us": json_fit * 1e6, "profile_us": profile * 1e6}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарк ScreenMapper")
+    parser.add_argument("--calls", type=int, default=20000, help="Количество вызовов на вариант")
+    parser.add_argument("--output", help="Путь к JSON-отчёту (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    points = [tuple(p) for p in rng.uniform(0.05, 0.95, size=(args.calls, 2)).tolist()]
+    points_array = np.asarray(points)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        calibration_file = os.path.join(tmpdir, "calibration_data.json")
+        gaze, screen = make_calibration(calibration_file)
+
+        # sklearn заметно медленнее, поэтому меряем его на меньшей выборке
+        legacy = bench_sklearn(gaze, screen, points[:min(len(points), 2000)])
+        if legacy is not None:
+            results["sklearn_predict"] = {"ns_per_call": legacy * 1e9}
+
+        for model_type in ("linear", "poly2", "homography"):
+            mapper = ScreenMapper(calibration_file=calibration_file, screen_w=2560, screen_h=1440,
+                                  model_type=model_type)
+            per_call = time_per_call(mapper.map_to_screen, points)
+            start = time.perf_counter()
+            mapper.map_many(points_array)
+            batch = (time.perf_counter() - start) / len(points)
+            results[model_type] = {
+                "ns_per_call": per_call * 1e9,
+                "map_many_ns_per_point": batch * 1e9,
+            }
+            if legacy is not None:
+                results[model_type]["speedup_vs_sklearn"] = legacy / per_call
+
+        results["load"] = bench_load(calibration_file, gaze, screen, os.path.join(tmpdir, "profiles"))
+
+    write_report({"benchmark": "screen_mapper", "calls": args.calls, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
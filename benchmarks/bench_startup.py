@@ -0,0 +1,150 @@
+# benchmarks/bench_startup.py
+#
+# Время от запуска процесса до первого перемещения курсора: последовательный запуск
+# (GazeControlApp(parallel=False)) против параллельного (модель прогревается, пока открывается камера).
+# Каждый замер — отдельный процесс python, чтобы в него входили импорты MediaPipe и OpenCV.
+# Работает без камеры и дисплея: настоящий FaceLandmarker, синтетическая камера с задержкой открытия,
+# готовый профиль калибровки во временном каталоге и заглушка мыши. На синтетическом кадре лица нет,
+# поэтому после настоящего инференса результат подменяется заготовленными landmark'ами.
+# Запуск из корня проекта:
+#   python -m benchmarks.bench_startup --repeats 5 --output startup.json
+#   python -m benchmarks.bench_startup --camera-delay 1.0
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import latency_stats, write_report
+
+MODES = ("sequential", "parallel")
+SCREEN_SIZE = (1920, 1080)
+
+
+class SlowOpenCamera:
+    """Синтетическая камера с интерфейсом Camera; открытие устройства занимает open_delay секунд."""
+
+    def __init__(self, open_delay, width=640, height=480):
+        time.sleep(open_delay)
+        self.frame = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+    def read_latest(self, timeout=None):
+        self.frames_captured += 1
+        return self.frame.copy(), self.frames_captured, time.monotonic()
+
+    def release(self):
+        pass
+
+
+def _inject_face(landmarker):
+    # Инференс остаётся настоящим (его время входит в замер), подменяется только пустой результат
+    from types import SimpleNamespace
+    from benchmarks.bench_pipeline import synthetic_landmarks
+    from core.gaze_tracker import Landmark
+
+    face = [Landmark(*lm) for lm in synthetic_landmarks(np.random.default_rng(1)).tolist()]
+
+    def wrap(detect):
+        def detect_with_face(*args):
+            result = detect(*args)
+            return result if result.face_landmarks else SimpleNamespace(face_landmarks=[face])
+        return detect_with_face
+
+    landmarker.detect = wrap(landmarker.detect)
+    landmarker.detect_for_video = wrap(landmarker.detect_for_video)
+
+
+def run_child(mode, camera_delay):
+    """Тело дочернего процесса: собирает приложение и крутит цикл до первого перемещения курсора."""
+    import main as app_main
+    from calibration.profiles import CalibrationProfile, ProfileKey, ProfileStore, current_user
+    from config.settings import CAMERA_DEVICE_ID, LANDMARKER_RUNNING_MODE
+    from core.cursor_output import NullBackend
+
+    imported = time.monotonic()
+    if LANDMARKER_RUNNING_MODE.upper() == "LIVE_STREAM":
+        raise RuntimeError("Бенчмарк запуска поддерживает только режимы IMAGE и VIDEO.")
+
+    create_tracker = app_main.create_tracker
+
+    def create_tracker_with_face(tracker_kwargs, metrics):
+        tracker = create_tracker(tracker_kwargs, metrics)
+        _inject_face(tracker.face_landmarker)
+        return tracker
+
+    app_main.create_tracker = create_tracker_with_face
+    with tempfile.TemporaryDirectory() as profile_dir:
+        store = ProfileStore(profile_dir)
+        key = ProfileKey(current_user(), CAMERA_DEVICE_ID, *SCREEN_SIZE)
+        gaze = np.array([[0.1, 0.1], [0.9, 0.1], [0.1, 0.9], [0.9, 0.9]])
+        store.save(CalibrationProfile.fit(key, "linear", gaze, gaze * SCREEN_SIZE))
+
+        args = app_main.parse_args(["--dry-run"])
+        app = app_main.GazeControlApp(args, screen_size=SCREEN_SIZE, mouse_backend=NullBackend(),
+                                      camera_factory=lambda *_: SlowOpenCamera(camera_delay),
+                                      profile_store=store, parallel=(mode == "parallel"))
+        built = time.monotonic()
+        try:
+            while app.first_move_time is None:
+                frame, _ = app.step()
+                if frame is None:
+                    raise RuntimeError("Поток кадров закончился до первого перемещения курсора.")
+        finally:
+            app.close()
+    return {"imported": imported, "built": built, "first_move": app.first_move_time}
+
+
+def measure(mode, camera_delay):
+    cmd = [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode, "--camera-delay", str(camera_delay)]
+    # CLOCK_MONOTONIC общий для процессов, поэтому метки дочернего процесса сравнимы с моментом запуска
+    start = time.monotonic()
+    completed = subprocess.run(cmd, capture_output=True, text=True, cwd=os.getcwd())
+    if completed.returncode != 0:
+        raise RuntimeError(f"Дочерний процесс ({mode}) завершился с ошибкой:\n{completed.stderr}")
+    marks = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {name: value - start for name, value in marks.items()}
+
+
+def run_benchmark(repeats=3, camera_delay=0.5):
+    modes = {}
+    for mode in MODES:
+        runs = [measure(mode, camera_delay) for _ in range(repeats)]
+        modes[mode] = {
+            "first_move": latency_stats([r["first_move"] for r in runs]),
+            "imports": latency_stats([r["imported"] for r in runs]),
+            "build": latency_stats([r["built"] for r in runs]),
+        }
+    sequential = modes["sequential"]["first_move"]["p50_ms"]
+    parallel = modes["parallel"]["first_move"]["p50_ms"]
+    return {
+        "benchmark": "startup",
+        "repeats": repeats,
+        "camera_open_delay_s": camera_delay,
+        "modes": modes,
+        "speedup": sequential / parallel if parallel > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк времени запуска до первого перемещения курсора")
+    parser.add_argument("--repeats", type=int, default=3, help="Количество запусков каждого режима")
+    parser.add_argument("--camera-delay", type=float, default=0.5, help="Время открытия синтетической камеры, с")
+    parser.add_argument("--output", help="Путь к JSON-отчёту (по умолчанию stdout)")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.camera_delay)))
+        return
+    write_report(run_benchmark(args.repeats, args.camera_delay), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/common.py
+
+import json
+import platform
+import sys
+
+import numpy as np
+
+
+def latency_stats(samples_s):
+    """Сводка задержек: принимает секунды, возвращает миллисекунды."""
+    if len(samples_s) == 0:
+        return {"count": 0}
+    ms = np.asarray(samples_s, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+    }
+
+
+# Версии зависимостей попадают в отчёт, чтобы регрессию можно было связать с обновлением пина
+TRACKED_PACKAGES = ("mediapipe", "opencv-python", "numpy", "pyautogui")
+
+
+def package_versions():
+    from importlib import metadata
+
+    versions = {}
+    for name in TRACKED_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def environment_info():
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "packages": package_versions(),
+    }
+
+
+def write_report(report, output=None):
+    # Машиночитаемый отчёт: в файл, если он указан, иначе в stdout
+    report = dict(report, environment=environment_info())
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+def load_frames(source, count):
+    """Читает до count кадров из камеры (число) или видеофайла в память, как их отдаёт Camera."""
+    import cv2
+
+    cap = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Не удалось открыть источник кадров: {source}")
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"Источник {source} не вернул ни одного кадра.")
+    return frames
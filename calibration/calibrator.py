@@ -6,10 +6,15 @@ import numpy as np
 from utils.camera import Camera
 from core.gaze_tracker import GazeTracker
 from utils.screen import get_screen_size, generate_calibration_points
-from config.settings import CALIBRATION_GRID, CAMERA_DEVICE_ID
+from config.settings import CALIBRATION_GRID, CAMERA_DEVICE_ID, CAMERA_MIRROR, DEBUG_OVERLAY_HZ, LANDMARKER_RUNNING_MODE
 
 class Calibrator:
-    def __init__(self):
+    def __init__(self, mapper=None, recorder=None):
+        # mapper — ScreenMapper, в профиль которого сохраняется результат (по умолчанию — прежний JSON);
+        # recorder — SessionRecorder: кадры сбора образцов пишутся с точкой калибровки как целью
+        # (такие сессии — исходные данные для подбора параметров calibration.tuner)
+        self.mapper = mapper
+        self.recorder = recorder
         self.screen_w, self.screen_h = get_screen_size()
         self.calibration_points = generate_calibration_points(
             self.screen_w, self.screen_h,
@@ -17,7 +22,9 @@ class Calibrator:
             rows=CALIBRATION_GRID[1]
         )
         self.camera = Camera(device_id=CAMERA_DEVICE_ID)
-        self.gaze_tracker = GazeTracker()
+        # Калибровке нужен результат именно текущего кадра, поэтому вместо LIVE_STREAM используем VIDEO
+        running_mode = "VIDEO" if LANDMARKER_RUNNING_MODE.upper() == "LIVE_STREAM" else LANDMARKER_RUNNING_MODE
+        self.gaze_tracker = GazeTracker(running_mode=running_mode, mirror=CAMERA_MIRROR)
         self.gaze_samples = []
         self.screen_points = []
 
@@ -35,12 +42,16 @@ class Calibrator:
 
             samples = []
             start_time = time.time()
+            next_debug_time = 0.0
             while time.time() - start_time < 2.0:
                 img = self.camera.get_frame()
                 if img is None:
                     continue
 
                 gaze_result = self.gaze_tracker.get_gaze_point(img)
+                if self.recorder is not None:
+                    self.recorder.write(img, landmarks=self.gaze_tracker.last_landmarks, target=(sx, sy))
+                gx = gy = None
                 if gaze_result and gaze_result[0] is not None:
                     gaze, face_center = gaze_result
                     gx, gy = gaze
@@ -48,7 +59,15 @@ class Calibrator:
                     if 0.0 <= gx <= 1.0 and 0.0 <= gy <= 1.0:
                         samples.append([gx, gy])
 
-                    # Отладка: показываем глаза
+                # Отладочный вид — не чаще DEBUG_OVERLAY_HZ, чтобы HighGUI не отнимал время у сбора образцов
+                now = time.monotonic()
+                if now < next_debug_time:
+                    continue
+                next_debug_time = now + 1.0 / DEBUG_OVERLAY_HZ
+                if gx is not None:
+                    # Отладка: показываем глаза (кадр камеры не отражён — отражаем только для показа)
+                    if CAMERA_MIRROR:
+                        img = cv2.flip(img, 1)
                     h, w = img.shape[:2]
                     cv2.circle(img, (int(gx * w), int(gy * h)), 5, (0, 255, 0), -1)
                     cv2.imshow("Отладка калибровки", img)
@@ -73,7 +92,9 @@ class Calibrator:
             print("❌ Калибровка не содержит данных! Запустите заново.")
             return
 
-        from core.screen_mapper import ScreenMapper
-        mapper = ScreenMapper(screen_w=self.screen_w, screen_h=self.screen_h)
+        mapper = self.mapper
+        if mapper is None:
+            from core.screen_mapper import ScreenMapper
+            mapper = ScreenMapper(screen_w=self.screen_w, screen_h=self.screen_h)
         mapper.save_calibration(np.array(self.gaze_samples), np.array(self.screen_points))
         print("✅ Калибровка сохранена.")
\ No newline at end of file
@@ -0,0 +1,159 @@
+# calibration/online.py
+#
+# Онлайн-калибровка: модель отображения уточняется прямо во время работы, без остановки цикла.
+# Коэффициенты линейной и полиномиальной моделей обновляются рекурсивным МНК (RLS) с
+# коэффициентом забывания — O(1) на образец, старые образцы постепенно теряют вес, поэтому
+# модель следует за медленным дрейфом (посадка, освещение, положение камеры).
+#
+# Образцы — пары (взгляд, известная точка экрана) только из независимых источников: коррекция
+# (пользователь подводит физическую мышь туда, куда смотрит) или элементы интерфейса с известным
+# положением; позиция самого курсора — прогноз модели и образцом не служит. Взгляд для образца — медиана
+# за окно фиксации перед событием; окно отбрасывается, если в нём было моргание или саккада.
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from config.settings import (
+    ONLINE_CALIBRATION_FORGETTING, ONLINE_CALIBRATION_FIXATION_TIME, ONLINE_CALIBRATION_MAX_DISPERSION,
+    ONLINE_CALIBRATION_MIN_EYE_OPENNESS, ONLINE_CALIBRATION_MAX_ERROR
+)
+from core.mapping_models import LinearAxisModel, PolynomialModel
+from utils.metrics import NULL_METRICS
+
+
+class RecursiveLeastSquares:
+    """RLS с коэффициентом забывания: веса W (признаки x выходы), ковариация P (признаки x признаки)."""
+
+    def __init__(self, weights, covariance, forgetting=ONLINE_CALIBRATION_FORGETTING):
+        self.weights = np.array(weights, dtype=np.float64)
+        self.covariance = np.array(covariance, dtype=np.float64)
+        self.forgetting = forgetting
+        # Без возбуждения (одни и те же точки) забывание раздувает P — ограничиваем след начальным
+        self._max_trace = float(np.trace(self.covariance))
+
+    def predict(self, phi):
+        return phi @ self.weights
+
+    def update(self, phi, target):
+        p_phi = self.covariance @ phi
+        gain = p_phi / (self.forgetting + phi @ p_phi)
+        error = np.asarray(target, dtype=np.float64) - phi @ self.weights
+        self.weights += np.outer(gain, error)
+        self.covariance = (self.covariance - np.outer(gain, p_phi)) / self.forgetting
+        trace = np.trace(self.covariance)
+        if trace > self._max_trace:
+            self.covariance *= self._max_trace / trace
+        return error
+
+
+def _initial_covariance(features, size):
+    # Ковариация из исходной калибровки: новые образцы весят столько же, сколько её точки
+    if features is None or len(features) < size:
+        return np.eye(size)
+    return np.linalg.inv(features.T @ features + 1e-6 * np.eye(size))
+
+
+class OnlineCalibrator:
+    def __init__(self, mapper, gaze_coords=None, forgetting=ONLINE_CALIBRATION_FORGETTING,
+                 fixation_time=ONLINE_CALIBRATION_FIXATION_TIME, max_dispersion=ONLINE_CALIBRATION_MAX_DISPERSION,
+                 min_eye_openness=ONLINE_CALIBRATION_MIN_EYE_OPENNESS, max_error=ONLINE_CALIBRATION_MAX_ERROR,
+                 metrics=None):
+        self.mapper = mapper
+        self.fixation_time = fixation_time
+        self.max_dispersion = max_dispersion
+        self.min_eye_openness = min_eye_openness
+        self.max_error = max_error
+        self.metrics = metrics or NULL_METRICS
+
+        # Счётчики
+        self.samples_accepted = 0
+        self.samples_rejected = 0
+        self.last_rejection = None  # причина последнего отброшенного образца
+
+        # Недавние наблюдения (timestamp, gx, gy, eye_openness) — окно фиксации перед событием.
+        # В LIVE_STREAM observe вызывается из потока колбэка, add_target — из цикла: доступ под _history_lock
+        self._history = deque(maxlen=256)
+        self._history_lock = threading.Lock()
+
+        model = mapper.model
+        if model is None:
+            # Без калибровки начинаем с прямого масштабирования на экран
+            model = LinearAxisModel([[mapper.screen_w, 0.0], [mapper.screen_h, 0.0]])
+        if gaze_coords is None:
+            gaze_coords = getattr(mapper, "gaze_coords", None)
+        gaze = None if gaze_coords is None else np.asarray(gaze_coords, dtype=np.float64).reshape(-1, 2)
+
+        self.model_name = model.name
+        if model.name == LinearAxisModel.name:
+            # Оси независимы: признаки [g, 1] по каждой оси
+            self._axes = []
+            for axis in range(2):
+                features = None if gaze is None else np.c_[gaze[:, axis], np.ones(len(gaze))]
+                self._axes.append(RecursiveLeastSquares(model.params[axis].reshape(2, 1),
+                                                        _initial_covariance(features, 2), forgetting))
+        elif model.name == PolynomialModel.name:
+            features = None if gaze is None else PolynomialModel.features(gaze)
+            self._rls = RecursiveLeastSquares(model.params.T, _initial_covariance(features, 6), forgetting)
+        else:
+            raise ValueError(f"Онлайн-калибровка не поддерживает модель {model.name}")
+
+    def observe(self, gaze_x, gaze_y, timestamp=None, eye_openness=None):
+        """Вызывается на каждый кадр с лицом: накапливает окно для последующих образцов."""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self._history_lock:
+            self._history.append((timestamp, gaze_x, gaze_y, eye_openness))
+
+    def _fixation_gaze(self, timestamp):
+        # Медиана взгляда за окно фиксации; None, если окно пустое, с морганием или саккадой
+        with self._history_lock:
+            history = list(self._history)
+        window = [h for h in history if timestamp - self.fixation_time <= h[0] <= timestamp]
+        if len(window) < 3:
+            return None, "мало кадров"
+        openness = [h[3] for h in window if h[3] is not None]
+        if openness and min(openness) < self.min_eye_openness:
+            return None, "моргание"
+        gaze = np.array([(h[1], h[2]) for h in window])
+        median = np.median(gaze, axis=0)
+        if np.abs(gaze - median).max() > self.max_dispersion:
+            return None, "саккада"
+        return median, None
+
+    def add_target(self, screen_x, screen_y, timestamp=None):
+        """Известная точка экрана, на которую пользователь смотрел к моменту timestamp.
+
+        Возвращает True, если образец принят и модель обновлена.
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        gaze, reason = self._fixation_gaze(timestamp)
+        if gaze is None:
+            return self._reject(reason)
+
+        predicted = self.mapper.model.map(gaze[0], gaze[1]) if self.mapper.model is not None else None
+        if predicted is not None and np.hypot(predicted[0] - screen_x, predicted[1] - screen_y) > self.max_error:
+            # Скорее всего пользователь смотрел не туда, куда кликнул
+            return self._reject("большая ошибка")
+
+        if self.model_name == LinearAxisModel.name:
+            for axis, rls in enumerate(self._axes):
+                rls.update(np.array([gaze[axis], 1.0]), [(screen_x, screen_y)[axis]])
+            params = [rls.weights[:, 0] for rls in self._axes]
+            model = LinearAxisModel(params)
+        else:
+            self._rls.update(PolynomialModel.features(gaze[None])[0], [screen_x, screen_y])
+            model = PolynomialModel(self._rls.weights.T)
+
+        # Замена ссылки атомарна: цикл продолжает работать со старой или новой моделью целиком
+        self.mapper.model = model
+        self.samples_accepted += 1
+        self.metrics.inc("calibration_samples_accepted")
+        return True
+
+    def _reject(self, reason):
+        self.samples_rejected += 1
+        self.metrics.inc("calibration_samples_rejected")
+        self.last_rejection = reason  # без печати: вызывающий сам решает, сообщать ли пользователю
+        return False
@@ -0,0 +1,168 @@
+# calibration/profiles.py
+#
+# Хранилище профилей калибровки. Профиль привязан к пользователю, камере и разрешению экрана
+# и лежит в отдельном файле каталога, имя которого выводится из ключа — поиск без перебора.
+#
+# Вместе с образцами хранятся параметры, при которых они сняты (CalibrationSettings): GAZE_OFFSET_MAX и
+# HEAD_MOVEMENT_COMPENSATION меняют сами координаты взгляда, MAPPING_MODEL — модель. Профиль настроек
+# (GAZE_SETTINGS_PROFILE) может их изменить, и тогда калибровку нужно пройти заново.
+#
+# Формат файла (little-endian):
+#   заголовок PROFILE_HEADER: магия b"GZCP", версия, размер экрана, ID камеры, время создания,
+#                              имя модели, число коэффициентов, число образцов, длина имени пользователя
+#   параметры SETTINGS_HEADER: GAZE_OFFSET_MAX, HEAD_MOVEMENT_COMPENSATION, MAPPING_MODEL (с версии 2)
+#   имя пользователя (UTF-8)
+#   коэффициенты модели        float64[n_params]
+#   образцы взгляда            float32[n_samples, 2]
+#   точки экрана               float32[n_samples, 2]
+# Коэффициенты сохраняются уже подобранными, поэтому загрузка — чтение файла и np.frombuffer, без подбора.
+
+import getpass
+import os
+import re
+import struct
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from config.settings import (
+    CALIBRATION_PROFILE_DIR, CALIBRATION_USER, GAZE_OFFSET_MAX, HEAD_MOVEMENT_COMPENSATION, MAPPING_MODEL
+)
+from core.mapping_models import fit_model, model_from_params
+
+PROFILE_MAGIC = b"GZCP"
+PROFILE_VERSION = 2
+PROFILE_EXTENSION = ".gzcp"
+PROFILE_HEADER = struct.Struct("<4sHIIid16sHIH")
+SETTINGS_HEADER = struct.Struct("<dd16s")
+
+ProfileKey = namedtuple("ProfileKey", ["user", "camera_id", "screen_w", "screen_h"])
+CalibrationSettings = namedtuple("CalibrationSettings", ["gaze_offset_max", "head_compensation", "mapping_model"])
+
+
+def current_user():
+    return CALIBRATION_USER or getpass.getuser()
+
+
+def calibration_settings(mapping_model=MAPPING_MODEL):
+    """Параметры активной конфигурации, от которых зависит калибровка."""
+    return CalibrationSettings(GAZE_OFFSET_MAX, HEAD_MOVEMENT_COMPENSATION, mapping_model)
+
+
+class CalibrationProfile:
+    def __init__(self, key, model_name, params, gaze_coords, screen_coords, created=None, settings=None):
+        # settings — CalibrationSettings, при которых сняты образцы; None — неизвестны (профиль версии 1),
+        # при записи подставляются параметры активной конфигурации с моделью самого профиля
+        self.key = key
+        self.model_name = model_name
+        self.params = np.asarray(params, dtype=np.float64).ravel()
+        self.gaze_coords = np.asarray(gaze_coords, dtype=np.float32).reshape(-1, 2)
+        self.screen_coords = np.asarray(screen_coords, dtype=np.float32).reshape(-1, 2)
+        self.created = time.time() if created is None else created
+        self.settings = settings
+
+    @classmethod
+    def fit(cls, key, model_name, gaze_coords, screen_coords, settings=None):
+        model = fit_model(model_name, gaze_coords, screen_coords)
+        return cls(key, model_name, model.params, gaze_coords, screen_coords, settings=settings)
+
+    def model(self, model_name=None):
+        """Готовая модель; для другой модели коэффициенты подбираются заново по сохранённым образцам."""
+        if model_name is None or model_name == self.model_name:
+            return model_from_params(self.model_name, self.params)
+        return fit_model(model_name, self.gaze_coords, self.screen_coords)
+
+    def to_bytes(self):
+        user = self.key.user.encode("utf-8")
+        header = PROFILE_HEADER.pack(
+            PROFILE_MAGIC, PROFILE_VERSION, self.key.screen_w, self.key.screen_h, self.key.camera_id,
+            self.created, self.model_name.encode("ascii"), len(self.params), len(self.gaze_coords), len(user)
+        )
+        settings = self.settings or calibration_settings(self.model_name)
+        settings_header = SETTINGS_HEADER.pack(settings.gaze_offset_max, settings.head_compensation,
+                                               settings.mapping_model.encode("ascii"))
+        return b"".join((header, settings_header, user, self.params.tobytes(), self.gaze_coords.tobytes(),
+                         self.screen_coords.tobytes()))
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < PROFILE_HEADER.size:
+            raise ValueError("Файл профиля калибровки обрезан.")
+        (magic, version, screen_w, screen_h, camera_id, created, model_name,
+         n_params, n_samples, user_len) = PROFILE_HEADER.unpack_from(data)
+        if magic != PROFILE_MAGIC:
+            raise ValueError("Файл не является профилем калибровки.")
+        if version not in (1, PROFILE_VERSION):
+            raise ValueError(f"Неподдерживаемая версия профиля: {version}")
+        offset = PROFILE_HEADER.size
+        settings = None  # версия 1 параметров не хранит
+        if version >= 2:
+            if len(data) < offset + SETTINGS_HEADER.size:
+                raise ValueError("Файл профиля калибровки обрезан.")
+            gaze_offset_max, head_compensation, mapping_model = SETTINGS_HEADER.unpack_from(data, offset)
+            settings = CalibrationSettings(gaze_offset_max, head_compensation,
+                                           mapping_model.rstrip(b"\0").decode("ascii"))
+            offset += SETTINGS_HEADER.size
+        user = data[offset:offset + user_len].decode("utf-8")
+        offset += user_len
+        if len(data) != offset + 8 * n_params + 16 * n_samples:
+            raise ValueError("Размер файла профиля не совпадает с заголовком.")
+        params = np.frombuffer(data, dtype=np.float64, count=n_params, offset=offset)
+        offset += 8 * n_params
+        gaze = np.frombuffer(data, dtype=np.float32, count=2 * n_samples, offset=offset).reshape(-1, 2)
+        offset += 8 * n_samples
+        screen = np.frombuffer(data, dtype=np.float32, count=2 * n_samples, offset=offset).reshape(-1, 2)
+        key = ProfileKey(user, camera_id, screen_w, screen_h)
+        return cls(key, model_name.rstrip(b"\0").decode("ascii"), params, gaze, screen, created, settings)
+
+
+class ProfileStore:
+    def __init__(self, directory=CALIBRATION_PROFILE_DIR):
+        self.directory = directory
+
+    def path_for(self, key):
+        user = re.sub(r"[^\w.-]", "_", key.user)
+        return os.path.join(self.directory, f"{user}_cam{key.camera_id}_{key.screen_w}x{key.screen_h}{PROFILE_EXTENSION}")
+
+    def save(self, profile):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(profile.key)
+        # Запись через временный файл: при сбое старый профиль остаётся целым
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(profile.to_bytes())
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, key):
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            profile = CalibrationProfile.from_bytes(f.read())
+        return profile if profile.key == key else None
+
+    def profiles(self):
+        """Все профили каталога (повреждённые файлы пропускаются)."""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(PROFILE_EXTENSION):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), 'rb') as f:
+                    found.append(CalibrationProfile.from_bytes(f.read()))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Пропущен профиль {name}: {e}")
+        return found
+
+    def find(self, key):
+        """Профиль для ключа; если для этой камеры его нет — самый свежий того же пользователя и экрана."""
+        profile = self.load(key)
+        if profile is not None:
+            return profile
+        candidates = [p for p in self.profiles()
+                      if (p.key.user, p.key.screen_w, p.key.screen_h) == (key.user, key.screen_w, key.screen_h)]
+        return max(candidates, key=lambda p: p.created) if candidates else None
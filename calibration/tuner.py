@@ -0,0 +1,397 @@
+# calibration/tuner.py
+#
+# Подбор экспериментальных параметров по записанным сессиям с известными целями на экране
+# (например, кадры калибровки, записанные с --record). Признаки взгляда считаются по записанным
+# landmark'ам один раз и кэшируются в каталоге сессии (features.npz), инференс не повторяется.
+# Каждая конфигурация в пуле процессов проходит весь путь: взгляд → калибровка → фильтр курсора →
+# клик фиксацией, и получает оценки по участкам сессии с неизменной целью:
+#   error  — расстояние курсора до цели на второй (установившейся) половине участка
+#   jitter — RMS смещения курсора между соседними кадрами там же
+#   lag    — время, за которое курсор после смены цели проходит 90% пути до своего нового положения
+#   clicks — клики фиксацией у цели (hits), мимо неё (false) и участки без клика (missed)
+# Калибровка конфигурации строится по первым половинам участков, цели которых совпадают с точками
+# сетки CALIBRATION_GRID, поэтому вторые половины всегда остаются для оценки.
+# Запуск из корня проекта:
+#   python -m calibration.tuner sessions/calib1 sessions/calib2 --profile config/tuned.json
+#   python -m calibration.tuner sessions/calib1 --search random --samples 200 --param 'DWELL_TIME=[0.5,0.7,0.9]'
+# Лучшая конфигурация подключается так: GAZE_SETTINGS_PROFILE=config/tuned.json python main.py
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config.settings import (
+    CALIBRATION_GRID, CURSOR_FILTER, DWELL_TIME, GAZE_OFFSET_MAX, HEAD_MOVEMENT_COMPENSATION, MAPPING_MODEL,
+    SMOOTHING_WINDOW
+)
+from core.cursor_output import NullBackend
+from core.filters import FILTERS, MovingAverageFilter, create_filter
+from core.gaze_tracker import features_from_landmarks, gaze_from_features
+from core.mapping_models import fit_model
+from core.mouse_controller import MouseController
+from core.screen_mapper import ScreenMapper
+from utils.recording import ReplaySession
+from utils.screen import generate_calibration_points
+
+# Пространство поиска по умолчанию; SMOOTHING_WINDOW влияет только на фильтр moving_average,
+# поэтому фильтр курсора перебирается вместе с ним
+DEFAULT_SPACE = {
+    "GAZE_OFFSET_MAX": [0.04, 0.05, 0.06, 0.08],
+    "HEAD_MOVEMENT_COMPENSATION": [0.0, 0.15, 0.3, 0.5],
+    "SMOOTHING_WINDOW": [3, 5, 8],
+    "DWELL_TIME": [0.6, 0.8, 1.0, 1.2],
+    "CALIBRATION_GRID": [(2, 2), (3, 2), (3, 3)],
+    "CURSOR_FILTER": list(FILTERS),
+}
+TUNABLE = ("GAZE_OFFSET_MAX", "HEAD_MOVEMENT_COMPENSATION", "SMOOTHING_WINDOW", "DWELL_TIME", "CALIBRATION_GRID",
+           "CURSOR_FILTER", "MAPPING_MODEL")
+FEATURES_CACHE = "features.npz"
+FEATURES_CHUNK = 4096  # кадров за раз: landmark'и длинной сессии не читаются в память целиком
+MATCH_TOLERANCE = 0.05  # цель участка совпадает с точкой сетки, если ближе этой доли диагонали экрана
+LAG_MIN_AMPLITUDE = 50  # смены цели с меньшим перемещением курсора (в пикселях) в задержку не входят
+
+# Кэшированные данные сессии: поля face_center и gaze_offset подходят для gaze_from_features
+SessionData = namedtuple("SessionData",
+                         ["name", "timestamps", "face_center", "gaze_offset", "targets", "segments", "screen_size"])
+TunerOptions = namedtuple("TunerOptions", ["lag_weight", "click_weight", "click_radius"])
+DEFAULT_OPTIONS = TunerOptions(lag_weight=0.5, click_weight=100.0, click_radius=100.0)
+
+
+def current_settings():
+    return {
+        "GAZE_OFFSET_MAX": GAZE_OFFSET_MAX,
+        "HEAD_MOVEMENT_COMPENSATION": HEAD_MOVEMENT_COMPENSATION,
+        "SMOOTHING_WINDOW": SMOOTHING_WINDOW,
+        "DWELL_TIME": DWELL_TIME,
+        "CALIBRATION_GRID": tuple(CALIBRATION_GRID),
+        "CURSOR_FILTER": CURSOR_FILTER,
+        "MAPPING_MODEL": MAPPING_MODEL,
+    }
+
+
+def target_segments(targets):
+    """Участки подряд идущих кадров с одной и той же целью: список (start, end, (tx, ty))."""
+    targets = np.asarray(targets, dtype=np.float64)
+    valid = ~np.isnan(targets).any(axis=1)
+    boundary = np.ones(len(targets) + 1, dtype=bool)
+    boundary[1:-1] = (targets[1:] != targets[:-1]).any(axis=1) | (valid[1:] != valid[:-1])
+    edges = np.flatnonzero(boundary)
+    return [(int(start), int(end), tuple(float(v) for v in targets[start]))
+            for start, end in zip(edges[:-1], edges[1:]) if valid[start]]
+
+
+def _compute_features(session):
+    face_center = np.full((session.frame_count, 2), np.nan)
+    gaze_offset = np.full((session.frame_count, 2), np.nan)
+    for start in range(0, session.frame_count, FEATURES_CHUNK):
+        chunk = features_from_landmarks(session.landmarks[start:start + FEATURES_CHUNK])
+        face_center[start:start + len(chunk.face_center)] = chunk.face_center
+        gaze_offset[start:start + len(chunk.gaze_offset)] = chunk.gaze_offset
+    return face_center, gaze_offset
+
+
+def load_session(path, screen_size=None):
+    """Данные сессии для подбора; признаки берутся из кэша, если он не старше записанных landmark'ов."""
+    session = ReplaySession(path)
+    screen_size = screen_size or session.screen_size
+    if screen_size is None:
+        raise ValueError(f"В сессии {path} не записан размер экрана — укажите его через --screen.")
+
+    cache = os.path.join(path, FEATURES_CACHE)
+    landmarks_file = os.path.join(path, "landmarks.f32")
+    cached = None
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(landmarks_file):
+        with np.load(cache) as data:
+            if len(data["face_center"]) == session.frame_count:
+                cached = data["face_center"], data["gaze_offset"]
+    if cached is None:
+        cached = _compute_features(session)
+        try:
+            np.savez(cache, face_center=cached[0], gaze_offset=cached[1])
+        except OSError as e:
+            print(f"⚠️ Не удалось сохранить кэш признаков {cache}: {e}")
+
+    targets = np.asarray(session.targets, dtype=np.float64)
+    return SessionData(os.path.basename(os.path.normpath(path)), np.asarray(session.timestamps, dtype=np.float64),
+                       cached[0], cached[1], targets, target_segments(targets), tuple(screen_size))
+
+
+def canonical_config(config):
+    """Конфигурация без параметров, которые при ней ни на что не влияют (для устранения повторов)."""
+    config = dict(config)
+    if config.get("CURSOR_FILTER", CURSOR_FILTER) != MovingAverageFilter.name:
+        config.pop("SMOOTHING_WINDOW", None)
+    return config
+
+
+def _config_key(config):
+    return tuple(sorted((name, json.dumps(value)) for name, value in config.items()))
+
+
+def _unique(configs):
+    seen = set()
+    for config in configs:
+        config = canonical_config(config)
+        key = _config_key(config)
+        if key not in seen:
+            seen.add(key)
+            yield config
+
+
+def grid_configs(space):
+    names = list(space)
+    return list(_unique(dict(zip(names, values)) for values in itertools.product(*space.values())))
+
+
+def random_configs(space, samples, seed=0):
+    """samples различных конфигураций, выбранных случайно из сетки (без её полного перебора)."""
+    names = list(space)
+    total = int(np.prod([len(space[name]) for name in names]))
+    rng = np.random.default_rng(seed)
+
+    def draw():
+        for _ in range(20 * samples):
+            yield {name: space[name][rng.integers(len(space[name]))] for name in names}
+
+    return list(itertools.islice(_unique(draw()), min(samples, total)))
+
+
+def _cursor_filter(config):
+    if config["CURSOR_FILTER"] == MovingAverageFilter.name:
+        return MovingAverageFilter(window=config["SMOOTHING_WINDOW"])
+    return create_filter(config["CURSOR_FILTER"])
+
+
+def _calibration_model(session, gaze, config):
+    w, h = session.screen_size
+    cols, rows = config["CALIBRATION_GRID"]
+    tolerance = MATCH_TOLERANCE * np.hypot(w, h)
+    gaze_points, screen_points = [], []
+    for point in generate_calibration_points(w, h, cols, rows):
+        matched = [s for s in session.segments if np.hypot(s[2][0] - point[0], s[2][1] - point[1]) <= tolerance]
+        samples = [gaze[start:start + (end - start) // 2] for start, end, _ in matched]
+        samples = np.concatenate(samples) if samples else np.zeros((0, 2))
+        samples = samples[~np.isnan(samples).any(axis=1)]
+        if len(samples):
+            # Как в Calibrator: средний взгляд за время показа точки; точка экрана — записанная цель
+            gaze_points.append(samples.mean(axis=0))
+            screen_points.append(np.mean([s[2] for s in matched], axis=0))
+    if len(gaze_points) < 2:
+        raise ValueError(f"Сетке {cols}x{rows} соответствует меньше двух целей сессии {session.name}.")
+    return fit_model(config["MAPPING_MODEL"], gaze_points, screen_points)
+
+
+def simulate_session(session, config, options=DEFAULT_OPTIONS):
+    """Курсор и клики по сессии при данной конфигурации; возвращает сырые оценки для сводки."""
+    gaze, _ = gaze_from_features(session, config["GAZE_OFFSET_MAX"], config["HEAD_MOVEMENT_COMPENSATION"])
+    w, h = session.screen_size
+    mapper = ScreenMapper(calibration_file="", screen_w=w, screen_h=h, model_type=config["MAPPING_MODEL"])
+    mapper.model = _calibration_model(session, gaze, config)
+
+    face = np.flatnonzero(~np.isnan(gaze).any(axis=1))
+    screen = mapper.map_many(gaze[face]).tolist()
+    times = session.timestamps.tolist()
+    controller = MouseController(config["DWELL_TIME"], config.get("SMOOTHING_WINDOW", SMOOTHING_WINDOW),
+                                 backend=NullBackend(), cursor_filter=_cursor_filter(config), threaded_output=False)
+    cursor = np.full((len(times), 2), np.nan)
+    clicks = []
+    for i, (sx, sy), (gx, gy) in zip(face.tolist(), screen, gaze[face].tolist()):
+        controller.update_cursor(sx, sy, times[i])
+        cursor[i] = controller.last_position
+        if controller.handle_dwell_click(gx, gy, times[i]):
+            clicks.append(i)
+    controller.close()
+
+    errors, steps, lags = [], [], []
+    segment_of = np.full(len(times), -1)
+    for index, (start, end, target) in enumerate(session.segments):
+        segment_of[start:end] = index
+        settled = cursor[start + (end - start) // 2:end]
+        settled = settled[~np.isnan(settled).any(axis=1)]
+        if not len(settled):
+            continue
+        errors.extend(np.linalg.norm(settled - target, axis=1).tolist())
+        steps.extend(np.linalg.norm(np.diff(settled, axis=0), axis=1).tolist())
+
+        # Задержка: от начала участка до прохождения 90% пути от прежнего положения курсора к новому
+        before = cursor[:start][~np.isnan(cursor[:start]).any(axis=1)]
+        if not len(before):
+            continue
+        rest = settled.mean(axis=0)
+        amplitude = np.linalg.norm(rest - before[-1])
+        if amplitude < LAG_MIN_AMPLITUDE:
+            continue
+        distance = np.linalg.norm(cursor[start:end] - rest, axis=1)
+        reached = np.flatnonzero(distance <= 0.1 * amplitude)
+        lags.append(times[start + reached[0] if len(reached) else end - 1] - times[start])
+
+    hit_segments = set()
+    false_clicks = 0
+    for i in clicks:
+        index = segment_of[i]
+        if index >= 0 and np.linalg.norm(cursor[i] - session.segments[index][2]) <= options.click_radius:
+            hit_segments.add(index)
+        else:
+            false_clicks += 1
+    return {"errors": errors, "steps": steps, "lags": lags, "clicks": len(clicks), "hits": len(hit_segments),
+            "false_clicks": false_clicks, "segments": len(session.segments)}
+
+
+def evaluate_config(config, sessions, options=DEFAULT_OPTIONS):
+    """Сводные оценки конфигурации по всем сессиям; score — чем меньше, тем лучше."""
+    full = dict(current_settings(), **config)
+    try:
+        runs = [simulate_session(session, full, options) for session in sessions]
+    except (ValueError, np.linalg.LinAlgError) as e:
+        return {"settings": config, "score": None, "error": str(e)}
+
+    errors = np.concatenate([run["errors"] for run in runs])
+    if not len(errors):
+        return {"settings": config, "score": None, "error": "Нет кадров с лицом на участках с целью."}
+    steps = np.concatenate([run["steps"] for run in runs])
+    lags = np.concatenate([run["lags"] for run in runs])
+    segments = sum(run["segments"] for run in runs)
+    hits = sum(run["hits"] for run in runs)
+    false_clicks = sum(run["false_clicks"] for run in runs)
+    metrics = {
+        "error_mean_px": float(errors.mean()),
+        "error_p95_px": float(np.percentile(errors, 95)),
+        "jitter_px": float(np.sqrt(np.mean(steps ** 2))) if len(steps) else 0.0,
+        "lag_mean_ms": float(lags.mean() * 1000.0) if len(lags) else 0.0,
+        "clicks": sum(run["clicks"] for run in runs),
+        "click_hits": hits,
+        "false_clicks": false_clicks,
+        "missed_targets": segments - hits,
+    }
+    score = (metrics["error_mean_px"] + metrics["jitter_px"] + options.lag_weight * metrics["lag_mean_ms"]
+             + options.click_weight * (false_clicks + segments - hits) / max(segments, 1))
+    return {"settings": config, "score": float(score), "metrics": metrics}
+
+
+# Данные сессий передаются в каждый процесс пула один раз, при его запуске
+_worker_sessions = None
+_worker_options = None
+
+
+def _init_worker(sessions, options):
+    global _worker_sessions, _worker_options
+    _worker_sessions, _worker_options = sessions, options
+
+
+def _evaluate_in_worker(config):
+    return evaluate_config(config, _worker_sessions, _worker_options)
+
+
+def run_search(sessions, configs, options=DEFAULT_OPTIONS, workers=None):
+    """Оценки всех конфигураций, от лучшей к худшей (конфигурации с ошибкой — в конце)."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(configs) == 1:
+        results = [evaluate_config(config, sessions, options) for config in configs]
+    else:
+        chunksize = max(1, len(configs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(sessions, options)) as executor:
+            results = list(executor.map(_evaluate_in_worker, configs, chunksize=chunksize))
+    return sorted(results, key=lambda r: (r["score"] is None, r["score"] or 0.0))
+
+
+def write_profile(result, path, sessions):
+    """Профиль настроек для GAZE_SETTINGS_PROFILE (см. config.settings.apply_settings_profile)."""
+    profile = {
+        "source": "calibration.tuner",
+        "sessions": [session.name for session in sessions],
+        "score": result["score"],
+        "metrics": result["metrics"],
+        "settings": {name: list(value) if isinstance(value, tuple) else value
+                     for name, value in result["settings"].items()},
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    return profile
+
+
+def parse_param(text):
+    """NAME=[v1, v2, ...] → (NAME, [значения]); значения в формате JSON."""
+    name, _, values = text.partition("=")
+    name = name.strip().upper()
+    if name not in TUNABLE:
+        raise argparse.ArgumentTypeError(f"Параметр {name} не подбирается; доступны: {', '.join(TUNABLE)}")
+    try:
+        values = json.loads(values)
+    except json.JSONDecodeError as e:
+        raise argparse.ArgumentTypeError(f"Значения {name} должны быть JSON-списком: {e}")
+    if not isinstance(values, list) or not values:
+        values = [values]
+    if name == "CALIBRATION_GRID":
+        values = [tuple(v) for v in values]
+    return name, values
+
+
+def parse_screen(text):
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Подбор параметров по записанным сессиям с известными целями")
+    parser.add_argument("sessions", nargs="+", help="Каталоги сессий (запись с --record во время калибровки)")
+    parser.add_argument("--search", choices=("grid", "random"), default="grid", help="Полный перебор или выборка")
+    parser.add_argument("--samples", type=int, default=100, help="Число конфигураций при --search random")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно случайной выборки")
+    parser.add_argument("--param", type=parse_param, action="append", default=[],
+                        help="Значения параметра: NAME=[v1,v2,...] (заменяют значения по умолчанию)")
+    parser.add_argument("--screen", type=parse_screen, help="Размер экрана WxH, если он не записан в сессии")
+    parser.add_argument("--workers", type=int, help="Число процессов (по умолчанию — число ядер)")
+    parser.add_argument("--lag-weight", type=float, default=DEFAULT_OPTIONS.lag_weight,
+                        help="Вес задержки в оценке (пикселей ошибки за 1 мс)")
+    parser.add_argument("--click-weight", type=float, default=DEFAULT_OPTIONS.click_weight,
+                        help="Вес ложных и пропущенных кликов на участок с целью (в пикселях)")
+    parser.add_argument("--click-radius", type=float, default=DEFAULT_OPTIONS.click_radius,
+                        help="Клик ближе этого расстояния до цели (в пикселях) считается попаданием")
+    parser.add_argument("--output", help="Путь к JSON-отчёту со всеми конфигурациями (по умолчанию stdout)")
+    parser.add_argument("--profile", default="config/tuned_profile.json", help="Куда записать лучший профиль")
+    args = parser.parse_args()
+
+    sessions = [load_session(path, args.screen) for path in args.sessions]
+    for session in sessions:
+        if not session.segments:
+            raise SystemExit(f"❌ В сессии {session.name} нет кадров с известной целью.")
+    space = dict(DEFAULT_SPACE, **dict(args.param))
+    configs = grid_configs(space) if args.search == "grid" else random_configs(space, args.samples, args.seed)
+    options = TunerOptions(args.lag_weight, args.click_weight, args.click_radius)
+    print(f"Сессий: {len(sessions)}, конфигураций: {len(configs)}")
+
+    baseline = evaluate_config(current_settings(), sessions, options)
+    results = run_search(sessions, configs, options, args.workers)
+    best = results[0]
+    if best["score"] is None:
+        raise SystemExit(f"❌ Ни одна конфигурация не оценена: {best['error']}")
+
+    report = {"tuner": "parameter_sweep", "search": args.search, "sessions": [s.name for s in sessions],
+              "space": space, "baseline": baseline, "best": best, "results": results}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    write_profile(best, args.profile, sessions)
+    metrics = best["metrics"]
+    print(f"✅ Лучшая конфигурация: ошибка {metrics['error_mean_px']:.0f} пикс, дрожание {metrics['jitter_px']:.1f} пикс, "
+          f"задержка {metrics['lag_mean_ms']:.0f} мс; профиль записан в {args.profile}")
+    if baseline["score"] is not None:
+        print(f"   Текущие настройки: оценка {baseline['score']:.1f}, лучшая: {best['score']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 # config/settings.py
 
+import json
+import os
+
 # Параметры управления
 DWELL_TIME = 1.0  # Время фиксации взгляда для клика (в секундах)
 SENSITIVITY = 1.0  # Чувствительность отслеживания взгляда
@@ -11,12 +14,113 @@ CALIBRATION_GRID = (3, 3)  # (cols, rows)
 GAZE_OFFSET_MAX = 0.06  # Максимальное смещение глаз для нормализации (экспериментальное значение)
 FACE_DETECTION_CONFIDENCE = 0.5  # Минимальная достоверность обнаружения лица
 FACE_TRACKING_CONFIDENCE = 0.5  # Минимальная достоверность отслеживания лица
+LANDMARKER_RUNNING_MODE = "VIDEO"  # Режим FaceLandmarker: "IMAGE", "VIDEO" или "LIVE_STREAM"
+LANDMARKER_OUTPUT_BLENDSHAPES = False  # Выдавать blendshapes (маппером не используются)
+LANDMARKER_OUTPUT_TRANSFORMATION_MATRIXES = False  # Выдавать матрицы трансформации лица (маппером не используются)
+ROI_INFERENCE = False  # Инференс по обрезанной области лица вместо полного кадра (быстрее на слабых машинах)
+ROI_INFERENCE_SIZE = 256  # Размер (в пикселях) квадратной области лица, подаваемой в модель
+ROI_PADDING = 0.5  # Отступ вокруг рамки лица в долях её размера
+OPTICAL_FLOW = False  # Между запусками модели переносить точки глаз оптическим потоком (режимы IMAGE и VIDEO)
+OPTICAL_FLOW_INTERVAL = 3  # Модель запускается на каждом N-м кадре, на остальных — оптический поток
+OPTICAL_FLOW_WIN_SIZE = 15  # Окно Лукаса–Канаде (в пикселях)
+OPTICAL_FLOW_MAX_LEVEL = 2  # Число уровней пирамиды
+OPTICAL_FLOW_MAX_ERROR = 1.0  # Допустимое расхождение прямого и обратного потока (в пикселях)
+OPTICAL_FLOW_PADDING = 0.3  # Запас области глаз вокруг отслеживаемых точек в долях её размера
+
+# Параметры отображения взгляда на экран
+MAPPING_MODEL = "linear"  # Модель калибровки: "linear" (по осям), "poly2" (полином 2-й степени) или "homography"
+
+# Профили калибровки (пользователь, камера, разрешение экрана)
+CALIBRATION_PROFILE_DIR = "calibration/profiles"  # Каталог бинарных профилей
+CALIBRATION_USER = None  # Имя профиля пользователя (None — текущий пользователь ОС)
+
+# Параметры онлайн-калибровки (уточнение модели во время работы)
+ONLINE_CALIBRATION = True  # Уточнять модель по точкам с известным положением (модели "linear" и "poly2")
+ONLINE_CALIBRATION_FORGETTING = 0.98  # Коэффициент забывания RLS: память около 1 / (1 - λ) образцов
+ONLINE_CALIBRATION_FIXATION_TIME = 0.3  # Окно фиксации перед событием (в секундах)
+ONLINE_CALIBRATION_MAX_DISPERSION = 0.03  # Максимальный разброс взгляда в окне (иначе саккада)
+ONLINE_CALIBRATION_MIN_EYE_OPENNESS = 0.15  # Минимальное раскрытие глаз в окне (иначе моргание)
+ONLINE_CALIBRATION_MAX_ERROR = 400  # Максимальное расхождение прогноза и цели в пикселях (иначе выброс)
+ONLINE_CALIBRATION_CORRECT_KEY = 'c'  # Клавиша коррекции: пауза курсора, затем фиксация позиции физической мыши
 
 # Параметры компенсации движения головы
 HEAD_MOVEMENT_COMPENSATION = 0.3  # Коэффициент компенсации движения головы (0.0 - без компенсации, 1.0 - полная компенсация)
 
 # Параметры сглаживания
-SMOOTHING_WINDOW = 5  # Размер окна для сглаживания позиции курсора
+CURSOR_FILTER = "one_euro"  # Фильтр позиции курсора: "moving_average", "one_euro" или "kalman"
+SMOOTHING_WINDOW = 5  # Размер окна для сглаживания позиции курсора (фильтр moving_average)
+ONE_EURO_MIN_CUTOFF = 0.5  # Минимальная частота среза в Гц: меньше — сильнее сглаживание фиксаций
+ONE_EURO_BETA = 0.01  # Рост частоты среза со скоростью (на пиксель/с): больше — меньше задержка саккад
+ONE_EURO_D_CUTOFF = 1.0  # Частота среза для оценки скорости в Гц
+KALMAN_PROCESS_NOISE = 1.0e7  # Спектральная плотность ускорения курсора (пикс²/с³)
+KALMAN_MEASUREMENT_NOISE = 1000.0  # Дисперсия шума измерения позиции (пикс²)
+
+# Параметры вывода курсора
+CURSOR_BACKEND = "auto"  # Бэкенд: "auto", "xlib", "uinput", "pyautogui", "null"
+CURSOR_OUTPUT_THREADED = True  # Перемещать курсор из отдельного потока, не блокируя цикл зрения
+CURSOR_MAX_RATE_HZ = 60  # Максимальная частота перемещений курсора (обычно частота обновления дисплея)
 
 # Параметры камеры
-CAMERA_DEVICE_ID = 0  # ID камеры (обычно 0 для встроенной камеры)
\ No newline at end of file
+CAMERA_DEVICE_ID = 0  # ID камеры (обычно 0 для встроенной камеры)
+CAMERA_THREADED = True  # Фоновый захват: цикл всегда получает только самый свежий кадр
+CAMERA_FOURCC = "MJPG"  # Формат кадров от драйвера (None — формат по умолчанию, часто YUYV с буферизацией)
+CAMERA_WIDTH = 640  # Запрашиваемая ширина кадра (None — по умолчанию драйвера)
+CAMERA_HEIGHT = 480  # Запрашиваемая высота кадра
+CAMERA_FPS = 30  # Запрашиваемая частота кадров
+CAMERA_BUFFER_SIZE = 1  # Очередь кадров драйвера: 1 — без накопления устаревших кадров
+CAMERA_MIRROR = True  # Зеркалирование: выполняется над координатами landmark'ов, кадр не копируется
+
+# Параметры конвейера
+PIPELINE_MODE = "single"  # "single" — всё в одном процессе, "multiprocess" — захват и инференс в отдельных процессах
+PIPELINE_RING_SLOTS = 4  # Число слотов кольца кадров в разделяемой памяти
+PIPELINE_RESULT_CAPACITY = 64  # Ёмкость очереди результатов инференса
+
+# Параметры планировщика инференса
+INFERENCE_SCHEDULER = True  # Снижать частоту инференса при устойчивой фиксации взгляда и без лица в кадре
+INFERENCE_MAX_FPS = None  # Максимальная частота инференса (None — с частотой камеры)
+INFERENCE_TARGET_CPU_PERCENT = None  # Бюджет на инференс в процентах одного ядра (None — без ограничения)
+INFERENCE_FIXATION_FPS = 15  # Частота во время фиксации (окну фиксации онлайн-калибровки нужно не меньше 3 кадров)
+INFERENCE_IDLE_FPS = 2  # Частота проб, когда лица нет
+INFERENCE_IDLE_TIMEOUT = 1.0  # Время без лица до перехода на частоту проб (в секундах)
+FIXATION_MIN_DURATION = 0.25  # Длительность устойчивого взгляда, после которой он считается фиксацией (в секундах)
+FIXATION_MAX_DISPERSION = 0.02  # Максимальное отклонение взгляда от центра фиксации (иначе саккада)
+
+# Параметры отладочного окна
+HEADLESS = False  # Работа без окна (киоски): HighGUI не используется, выход по SIGINT/SIGTERM
+DEBUG_OVERLAY_HZ = 10  # Частота отрисовки отладочного окна и отладочного вида калибровки
+
+# Параметры шины событий взгляда
+EVENT_QUEUE_SIZE = 256  # Ёмкость очереди каждого подписчика (отсчёты взгляда при политике conflate не копятся)
+EVENT_LOG_PATH = None  # Журнал событий взгляда в формате JSON lines (None — не писать)
+
+# Параметры телеметрии
+METRICS_ENABLED = False  # Сбор метрик (время этапов, FPS, потери лица, задержка кадр→курсор)
+METRICS_JSONL_PATH = None  # Файл для снимков метрик в формате JSON lines (None — не писать)
+METRICS_JSONL_INTERVAL = 5.0  # Интервал записи снимков (в секундах)
+METRICS_HTTP_PORT = None  # Порт локального эндпоинта /metrics в формате Prometheus (None — не запускать)
+
+
+# Профиль настроек: JSON вида {"settings": {"DWELL_TIME": 0.8, ...}}, например результат подбора
+# параметров (python -m calibration.tuner). Путь задаётся переменной окружения GAZE_SETTINGS_PROFILE;
+# значения профиля заменяют заданные выше до того, как их импортируют остальные модули.
+SETTINGS_PROFILE = os.environ.get("GAZE_SETTINGS_PROFILE")
+
+
+def apply_settings_profile(path, namespace=None):
+    namespace = globals() if namespace is None else namespace
+    with open(path, 'r') as f:
+        overrides = json.load(f).get("settings", {})
+    applied = {}
+    for name, value in overrides.items():
+        if not name.isupper() or name not in namespace:
+            print(f"⚠️ Профиль настроек {path}: неизвестный параметр {name}")
+            continue
+        # JSON не различает кортежи и списки — кортежи (например, CALIBRATION_GRID) восстанавливаем
+        if isinstance(namespace[name], tuple):
+            value = tuple(value)
+        namespace[name] = applied[name] = value
+    return applied
+
+
+if SETTINGS_PROFILE:
+    apply_settings_profile(SETTINGS_PROFILE)
@@ -0,0 +1,294 @@
+# core/cursor_output.py
+#
+# Вывод курсора отдельно от цикла захвата и инференса.
+# CursorOutput держит упорядоченную очередь команд: подряд идущие перемещения схлопываются
+# в последнее (важна только актуальная цель), клики сохраняют порядок относительно перемещений.
+# Перемещения выполняются не чаще max_rate_hz (частота обновления дисплея), поэтому
+# цикл зрения никогда не ждёт системный стек ввода.
+
+import os
+import threading
+import time
+from collections import deque
+
+from config.settings import CURSOR_BACKEND, CURSOR_MAX_RATE_HZ
+from utils.metrics import NULL_METRICS
+
+
+class CursorBackend:
+    name = None
+
+    def move(self, x, y):
+        raise NotImplementedError
+
+    def click(self):
+        raise NotImplementedError
+
+    def position(self):
+        # Текущее положение системного указателя или None, если бэкенд не умеет его читать
+        return None
+
+    def close(self):
+        pass
+
+
+class PyAutoGuiBackend(CursorBackend):
+    name = "pyautogui"
+
+    def __init__(self, screen_size=None):
+        import pyautogui
+        pyautogui.FAILSAFE = False
+        self._pyautogui = pyautogui
+
+    def move(self, x, y):
+        self._pyautogui.moveTo(x, y, _pause=False)
+
+    def click(self):
+        self._pyautogui.click(_pause=False)
+
+    def position(self):
+        x, y = self._pyautogui.position()
+        return x, y
+
+
+class XlibBackend(CursorBackend):
+    """Прямые события XTest без накладных расходов pyautogui (X11)."""
+
+    name = "xlib"
+
+    def __init__(self, screen_size=None):
+        if not os.environ.get("DISPLAY"):
+            raise RuntimeError("Переменная DISPLAY не задана — X11 недоступен.")
+        from Xlib import X, display
+        from Xlib.ext import xtest
+        self._X = X
+        self._xtest = xtest
+        self._display = display.Display()
+
+    def move(self, x, y):
+        self._xtest.fake_input(self._display, self._X.MotionNotify, x=int(x), y=int(y))
+        self._display.flush()
+
+    def click(self):
+        self._xtest.fake_input(self._display, self._X.ButtonPress, 1)
+        self._xtest.fake_input(self._display, self._X.ButtonRelease, 1)
+        self._display.flush()
+
+    def position(self):
+        pointer = self._display.screen().root.query_pointer()
+        return pointer.root_x, pointer.root_y
+
+    def close(self):
+        self._display.close()
+
+
+class UinputBackend(CursorBackend):
+    """Виртуальное абсолютное указывающее устройство через /dev/uinput (работает и под Wayland).
+
+    Требует пакет evdev и права на запись в /dev/uinput.
+    """
+
+    name = "uinput"
+
+    def __init__(self, screen_size=None):
+        from evdev import AbsInfo, UInput, ecodes
+        if screen_size is None:
+            from utils.screen import get_screen_size
+            screen_size = get_screen_size()
+        w, h = screen_size
+        self._ecodes = ecodes
+        capabilities = {
+            ecodes.EV_KEY: [ecodes.BTN_LEFT],
+            ecodes.EV_ABS: [
+                (ecodes.ABS_X, AbsInfo(value=0, min=0, max=w - 1, fuzz=0, flat=0, resolution=0)),
+                (ecodes.ABS_Y, AbsInfo(value=0, min=0, max=h - 1, fuzz=0, flat=0, resolution=0)),
+            ],
+        }
+        self._device = UInput(capabilities, name="gz_ctrl-pointer")
+
+    def move(self, x, y):
+        e = self._ecodes
+        self._device.write(e.EV_ABS, e.ABS_X, int(x))
+        self._device.write(e.EV_ABS, e.ABS_Y, int(y))
+        self._device.syn()
+
+    def click(self):
+        e = self._ecodes
+        self._device.write(e.EV_KEY, e.BTN_LEFT, 1)
+        self._device.syn()
+        self._device.write(e.EV_KEY, e.BTN_LEFT, 0)
+        self._device.syn()
+
+    def close(self):
+        self._device.close()
+
+
+class NullBackend(CursorBackend):
+    """Ничего не делает: прогон без движения системного курсора."""
+
+    name = "null"
+
+    def __init__(self, screen_size=None):
+        pass
+
+    def move(self, x, y):
+        pass
+
+    def click(self):
+        pass
+
+
+class RecordingBackend(CursorBackend):
+    """Запоминает команды в порядке выполнения — для тестов и безголового повтора сессий."""
+
+    name = "recording"
+
+    def __init__(self, screen_size=None):
+        self.events = []
+        self.moves = []
+        self.clicks = []
+
+    def move(self, x, y):
+        self.events.append(("move", x, y))
+        self.moves.append((x, y))
+
+    def click(self):
+        self.events.append(("click",))
+        self.clicks.append(self.moves[-1] if self.moves else None)
+
+    def position(self):
+        return self.moves[-1] if self.moves else None
+
+
+BACKENDS = {b.name: b for b in (PyAutoGuiBackend, XlibBackend, UinputBackend, NullBackend, RecordingBackend)}
+
+# Порядок выбора для "auto": сначала прямой X11, затем pyautogui
+AUTO_BACKENDS = ("xlib", "pyautogui")
+
+
+def create_backend(name=CURSOR_BACKEND, screen_size=None):
+    if name == "auto":
+        errors = []
+        for candidate in AUTO_BACKENDS:
+            try:
+                return BACKENDS[candidate](screen_size)
+            except Exception as e:
+                errors.append(f"{candidate}: {e}")
+        raise RuntimeError("Нет доступного бэкенда курсора (" + "; ".join(errors) + ")")
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд курсора: {name}")
+    return BACKENDS[name](screen_size)
+
+
+class CursorOutput:
+    def __init__(self, backend, max_rate_hz=CURSOR_MAX_RATE_HZ, threaded=True, metrics=None):
+        self.backend = backend
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz else 0.0
+        self.threaded = threaded
+        self.metrics = metrics or NULL_METRICS
+
+        # Счётчики
+        self.moves_requested = 0
+        self.moves_issued = 0
+        self.moves_coalesced = 0
+        self.clicks_issued = 0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._running = threaded
+        self._last_move_time = float("-inf")
+        self._exited = False  # поток вывода завершился и больше не обращается к бэкенду
+        self._close_on_exit = False  # close() не дождался потока — бэкенд закроет сам поток
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name="cursor-output", daemon=True)
+            self._thread.start()
+
+    def move_to(self, x, y):
+        if not self.threaded:
+            self.moves_requested += 1
+            self._execute(("move", x, y))
+            return
+        with self._cond:
+            self.moves_requested += 1
+            if self._queue and self._queue[-1][0] == "move":
+                self._queue[-1] = ("move", x, y)
+                self.moves_coalesced += 1
+                self.metrics.inc("cursor_moves_coalesced")
+            else:
+                self._queue.append(("move", x, y))
+            self._cond.notify_all()
+
+    def click(self):
+        if not self.threaded:
+            self._execute(("click",))
+            return
+        with self._cond:
+            self._queue.append(("click",))
+            self._cond.notify_all()
+
+    def _execute(self, command):
+        if command[0] == "move":
+            with self.metrics.timer("cursor"):
+                self.backend.move(command[1], command[2])
+            self._last_move_time = time.monotonic()
+            self.moves_issued += 1
+        else:
+            self.backend.click()
+            self.clicks_issued += 1
+
+    def _run(self):
+        self._process_queue()
+        with self._cond:
+            self._exited = True
+            close_backend = self._close_on_exit
+        if close_backend:
+            self.backend.close()
+
+    def _process_queue(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._running and not self._queue:
+                        return
+                    if self._queue:
+                        command = self._queue[0]
+                        # Перемещение ждёт своего слота по частоте; за это время его может заменить более свежее
+                        wait = self._last_move_time + self.min_interval - time.monotonic() if command[0] == "move" else 0
+                        if wait <= 0 or not self._running:
+                            self._queue.popleft()
+                            self._busy = True
+                            break
+                        self._cond.wait(timeout=wait)
+                    else:
+                        self._cond.wait()
+            try:
+                self._execute(command)
+            except Exception as e:
+                print(f"⚠️ Ошибка вывода курсора: {e}")
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def flush(self, timeout=1.0):
+        """Ждёт выполнения всех поставленных команд; возвращает False по таймауту."""
+        if not self.threaded:
+            return True
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout=timeout)
+
+    def close(self, timeout=1.0):
+        if self._thread is not None:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+            self._thread.join(timeout=timeout)
+            self._thread = None
+            # Поток может ещё выполнять команду в бэкенде — тогда бэкенд закроет он сам, когда выйдет
+            with self._cond:
+                if not self._exited:
+                    self._close_on_exit = True
+                    print("⚠️ Поток вывода курсора не завершился — бэкенд будет закрыт после текущей команды.")
+                    return
+        self.backend.close()
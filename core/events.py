@@ -0,0 +1,211 @@
+# core/events.py
+#
+# Шина событий взгляда: инференс выполняется один раз, а результаты расходятся любому числу
+# подписчиков (журнал, оверлей, внешние приложения через asyncio). У каждого подписчика своя
+# ограниченная очередь, поэтому медленный подписчик никогда не задерживает трекер:
+#   "conflate"    — отсчёты взгляда схлопываются до последнего, дискретные события идут по порядку
+#   "drop_oldest" — при переполнении вытесняется самое старое событие
+# Подписка — асинхронный итератор (async for event in subscription), блокирующий get()
+# или колбэк, который вызывается из отдельного потока подписки.
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque, namedtuple
+
+from config.settings import EVENT_QUEUE_SIZE
+from core.fixation import FixationDetector
+from utils.metrics import NULL_METRICS
+
+# Виды событий
+GAZE = "gaze"  # отсчёт взгляда на каждый обработанный кадр с лицом
+FACE_FOUND = "face_found"
+FACE_LOST = "face_lost"
+FIXATION_START = "fixation_start"
+FIXATION_END = "fixation_end"
+POLICIES = ("conflate", "drop_oldest")
+
+# timestamp — время захвата кадра (time.monotonic); gaze и face_center — нормализованные (x, y),
+# screen — точка экрана в пикселях; поля, которые для события не определены, равны None
+GazeEvent = namedtuple("GazeEvent", ["kind", "timestamp", "gaze", "face_center", "screen"])
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Subscription:
+    def __init__(self, bus, kinds=None, maxsize=EVENT_QUEUE_SIZE, policy="conflate"):
+        if policy not in POLICIES:
+            raise ValueError(f"Неизвестная политика очереди: {policy}")
+        self.bus = bus
+        self.kinds = frozenset(kinds) if kinds is not None else None
+        self.policy = policy
+        self.closed = False
+        self.dropped = 0  # события, вытесненные из переполненной очереди или схлопнутые
+
+        self._cond = threading.Condition()
+        self._queue = deque(maxlen=maxsize)
+        self._latest_gaze = None  # последний отсчёт взгляда при политике conflate
+        self._waiter = None  # (loop, future) ожидающего асинхронного потребителя
+
+    def _put(self, event):
+        # Вызывается из потока трекера: только O(1) работа под коротким замком
+        with self._cond:
+            if self.closed:
+                return
+            if self.policy == "conflate" and event.kind == GAZE:
+                if self._latest_gaze is not None:
+                    self.dropped += 1
+                self._latest_gaze = event
+            else:
+                if len(self._queue) == self._queue.maxlen:
+                    self.dropped += 1
+                self._queue.append(event)
+            self._notify()
+
+    def _notify(self):
+        self._cond.notify()
+        if self._waiter is not None:
+            loop, waiter = self._waiter
+            self._waiter = None
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # цикл событий потребителя уже закрыт
+
+    def _pop(self):
+        queue, latest = self._queue, self._latest_gaze
+        if queue and (latest is None or queue[0].timestamp <= latest.timestamp):
+            return queue.popleft()
+        self._latest_gaze = None
+        return latest
+
+    def get(self, timeout=None):
+        """Следующее событие; None, если подписка закрыта или истёк timeout."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or self._latest_gaze is not None or self.closed, timeout)
+            return self._pop()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            with self._cond:
+                event = self._pop()
+                if event is not None:
+                    return event
+                if self.closed:
+                    raise StopAsyncIteration
+                loop = asyncio.get_running_loop()
+                waiter = loop.create_future()
+                self._waiter = (loop, waiter)
+            await waiter
+
+    def close(self):
+        self.bus._unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._notify()
+
+
+class CallbackSubscription(Subscription):
+    """Подписка с колбэком: события доставляются из собственного потока, исключения не доходят до трекера."""
+
+    def __init__(self, bus, callback, **kwargs):
+        super().__init__(bus, **kwargs)
+        self.callback = callback
+        self._thread = threading.Thread(target=self._run, name="gaze-events", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            try:
+                self.callback(event)
+            except Exception as e:
+                print(f"⚠️ Ошибка подписчика событий взгляда: {e}")
+
+    def close(self):
+        super().close()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+
+class GazeEventBus:
+    def __init__(self, fixation=None, metrics=None):
+        self.fixation = fixation or FixationDetector()
+        self.metrics = metrics or NULL_METRICS
+        self._subscriptions = ()  # кортеж заменяется целиком — publish обходит его без замка
+        self._lock = threading.Lock()
+        self._face_visible = None
+
+    def subscribe(self, kinds=None, maxsize=EVENT_QUEUE_SIZE, policy="conflate"):
+        """Подписка для async for или get(); kinds — набор видов событий (None — все)."""
+        return self._add(Subscription(self, kinds, maxsize, policy))
+
+    def subscribe_callback(self, callback, kinds=None, maxsize=EVENT_QUEUE_SIZE, policy="conflate"):
+        return self._add(CallbackSubscription(self, callback, kinds=kinds, maxsize=maxsize, policy=policy))
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscriptions += (subscription,)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+    def publish(self, event):
+        for subscription in self._subscriptions:
+            if subscription.kinds is None or event.kind in subscription.kinds:
+                subscription._put(event)
+        self.metrics.inc("events_published")
+
+    def publish_sample(self, timestamp, gaze, face_center, screen=None):
+        """Результат одного кадра: публикует отсчёт взгляда и производные события лица и фиксации."""
+        if not self._subscriptions:
+            return  # без подписчиков шина ничего не стоит циклу
+        visible = gaze is not None
+        if visible != self._face_visible:
+            self._face_visible = visible
+            self.publish(GazeEvent(FACE_FOUND if visible else FACE_LOST, timestamp, None, None, None))
+
+        # В событиях фиксации gaze — центр фиксации (медиана окна)
+        was_fixating, previous_centre = self.fixation.fixating, self.fixation.centre
+        fixating = self.fixation.update(gaze, timestamp)
+        if was_fixating and not fixating:
+            self.publish(GazeEvent(FIXATION_END, timestamp, tuple(map(float, previous_centre)), None, None))
+        if fixating and not was_fixating:
+            centre = tuple(map(float, self.fixation.centre))
+            self.publish(GazeEvent(FIXATION_START, timestamp, centre, face_center, screen))
+        if visible:
+            self.publish(GazeEvent(GAZE, timestamp, gaze, face_center, screen))
+
+    def close(self):
+        for subscription in self._subscriptions:
+            subscription.close()
+
+
+class EventLogger:
+    """Журнал событий в формате JSON lines — пример подписчика-колбэка."""
+
+    def __init__(self, bus, path, kinds=None):
+        self._file = open(path, 'a')
+        self.subscription = bus.subscribe_callback(self._write, kinds=kinds, policy="drop_oldest")
+
+    def _write(self, event):
+        self._file.write(json.dumps(dict(event._asdict(), wall_time=time.time())) + "\n")
+
+    def close(self):
+        self.subscription.close()
+        self._file.close()
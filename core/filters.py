@@ -0,0 +1,161 @@
+# core/filters.py
+#
+# Фильтры позиции курсора. Все реализации работают за O(1) на обновление,
+# хранят состояние в обычных float и не выделяют память на кадр.
+# Интерфейс: update(x, y, timestamp) -> (x, y), reset().
+
+import math
+
+from config.settings import (
+    SMOOTHING_WINDOW, ONE_EURO_MIN_CUTOFF, ONE_EURO_BETA, ONE_EURO_D_CUTOFF,
+    KALMAN_PROCESS_NOISE, KALMAN_MEASUREMENT_NOISE
+)
+
+
+class CursorFilter:
+    name = None
+
+    def update(self, x, y, timestamp):
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+
+class MovingAverageFilter(CursorFilter):
+    """Скользящее среднее по кольцевому буферу фиксированного размера с накопленными суммами."""
+
+    name = "moving_average"
+
+    def __init__(self, window=SMOOTHING_WINDOW):
+        self.window = max(1, int(window))
+        self._xs = [0.0] * self.window
+        self._ys = [0.0] * self.window
+        self.reset()
+
+    def reset(self):
+        self._index = 0
+        self._count = 0
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+
+    def update(self, x, y, timestamp=None):
+        i = self._index
+        if self._count == self.window:
+            self._sum_x -= self._xs[i]
+            self._sum_y -= self._ys[i]
+        else:
+            self._count += 1
+        self._xs[i] = x
+        self._ys[i] = y
+        self._sum_x += x
+        self._sum_y += y
+        self._index = (i + 1) % self.window
+        return self._sum_x / self._count, self._sum_y / self._count
+
+
+class OneEuroFilter(CursorFilter):
+    """Фильтр One Euro (Casiez и др., 2012): частота среза растёт со скоростью движения,
+    поэтому фиксации сглаживаются сильно, а саккады проходят почти без задержки."""
+
+    name = "one_euro"
+
+    def __init__(self, min_cutoff=ONE_EURO_MIN_CUTOFF, beta=ONE_EURO_BETA, d_cutoff=ONE_EURO_D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._last_time = None
+        self._x = self._y = 0.0
+        self._dx = self._dy = 0.0
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, x, y, timestamp):
+        if self._last_time is None:
+            self._last_time = timestamp
+            self._x, self._y = x, y
+            return x, y
+        dt = timestamp - self._last_time
+        if dt <= 0:
+            dt = 1e-3
+        self._last_time = timestamp
+
+        # Сглаженная оценка скорости
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx += a_d * ((x - self._x) / dt - self._dx)
+        self._dy += a_d * ((y - self._y) / dt - self._dy)
+        speed = math.hypot(self._dx, self._dy)
+
+        # Общая частота среза для обеих осей, чтобы траектория не искажалась
+        a = self._alpha(self.min_cutoff + self.beta * speed, dt)
+        self._x += a * (x - self._x)
+        self._y += a * (y - self._y)
+        return self._x, self._y
+
+
+class KalmanFilter(CursorFilter):
+    """Фильтр Калмана с моделью постоянной скорости, независимо по каждой оси.
+
+    process_noise — спектральная плотность ускорения (px²/с³), measurement_noise — дисперсия измерения (px²).
+    """
+
+    name = "kalman"
+
+    def __init__(self, process_noise=KALMAN_PROCESS_NOISE, measurement_noise=KALMAN_MEASUREMENT_NOISE):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self._last_time = None
+        # Состояние по оси: позиция, скорость и ковариация [[p00, p01], [p01, p11]]
+        self._x = [0.0, 0.0, 0.0, 0.0, 0.0]
+        self._y = [0.0, 0.0, 0.0, 0.0, 0.0]
+
+    def _step(self, state, z, dt):
+        pos, vel, p00, p01, p11 = state
+        q = self.process_noise
+        # Прогноз
+        pos += vel * dt
+        p00 += dt * (2 * p01 + dt * p11) + q * dt * dt * dt / 3
+        p01 += dt * p11 + q * dt * dt / 2
+        p11 += q * dt
+        # Коррекция
+        s = p00 + self.measurement_noise
+        k0, k1 = p00 / s, p01 / s
+        residual = z - pos
+        pos += k0 * residual
+        vel += k1 * residual
+        p11 -= k1 * p01
+        p01 -= k0 * p01
+        p00 -= k0 * p00
+        state[0], state[1], state[2], state[3], state[4] = pos, vel, p00, p01, p11
+        return pos
+
+    def update(self, x, y, timestamp):
+        if self._last_time is None:
+            self._last_time = timestamp
+            r = self.measurement_noise
+            self._x[0], self._x[1], self._x[2], self._x[3], self._x[4] = x, 0.0, r, 0.0, r
+            self._y[0], self._y[1], self._y[2], self._y[3], self._y[4] = y, 0.0, r, 0.0, r
+            return x, y
+        dt = timestamp - self._last_time
+        if dt <= 0:
+            dt = 1e-3
+        self._last_time = timestamp
+        return self._step(self._x, x, dt), self._step(self._y, y, dt)
+
+
+FILTERS = {f.name: f for f in (MovingAverageFilter, OneEuroFilter, KalmanFilter)}
+
+
+def create_filter(name, **params):
+    if name not in FILTERS:
+        raise ValueError(f"Неизвестный фильтр курсора: {name}")
+    return FILTERS[name](**params)
@@ -0,0 +1,41 @@
+# core/fixation.py
+#
+# Обнаружение фиксаций по потоку взгляда (алгоритм по дисперсии, I-DT): взгляд считается фиксацией,
+# если не меньше min_duration секунд держится в пределах max_dispersion от медианы окна.
+# Первый отсчёт дальше max_dispersion — саккада, окно начинается заново.
+
+from collections import deque
+
+import numpy as np
+
+from config.settings import FIXATION_MIN_DURATION, FIXATION_MAX_DISPERSION
+
+
+class FixationDetector:
+    def __init__(self, min_duration=FIXATION_MIN_DURATION, max_dispersion=FIXATION_MAX_DISPERSION):
+        self.min_duration = min_duration
+        self.max_dispersion = max_dispersion
+        self.fixating = False
+        self.centre = None  # медиана взгляда текущего окна
+        self._window = deque()  # (timestamp, gx, gy)
+
+    def reset(self):
+        self._window.clear()
+        self.fixating = False
+        self.centre = None
+
+    def update(self, gaze, timestamp):
+        """Новый отсчёт взгляда (gx, gy) или None (лица нет); возвращает True, пока длится фиксация."""
+        if gaze is None:
+            self.reset()
+            return False
+        gx, gy = gaze
+        if self.centre is not None and max(abs(gx - self.centre[0]), abs(gy - self.centre[1])) > self.max_dispersion:
+            self._window.clear()  # саккада: новое окно начинается с этого отсчёта
+        self._window.append((timestamp, gx, gy))
+        # Окно ограничено двумя длительностями фиксации — медленный дрейф взгляда не копится
+        while timestamp - self._window[0][0] > 2 * self.min_duration:
+            self._window.popleft()
+        self.centre = np.median(np.array(self._window)[:, 1:], axis=0)
+        self.fixating = timestamp - self._window[0][0] >= self.min_duration
+        return self.fixating
@@ -0,0 +1,90 @@
+# core/flow_tracker.py
+#
+# Интерполяция landmark'ов между запусками FaceLandmarker: разреженный оптический поток
+# Лукаса–Канаде (cv2.calcOpticalFlowPyrLK) по точкам радужек, уголков глаз, век и переносицы
+# в небольшой полутоновой области глаз. Модель запускается раз в несколько кадров, а на
+# промежуточных кадрах точки переносятся потоком; каждый полный результат модели — новая опора.
+
+import cv2
+import numpy as np
+
+from config.settings import OPTICAL_FLOW_WIN_SIZE, OPTICAL_FLOW_MAX_LEVEL, OPTICAL_FLOW_MAX_ERROR, OPTICAL_FLOW_PADDING
+
+
+class EyeFlowTracker:
+    def __init__(self, point_indices, win_size=OPTICAL_FLOW_WIN_SIZE, max_level=OPTICAL_FLOW_MAX_LEVEL,
+                 max_error=OPTICAL_FLOW_MAX_ERROR, padding=OPTICAL_FLOW_PADDING, min_tracked=0.6):
+        # point_indices — индексы отслеживаемых точек в массиве landmark'ов (478, 3)
+        self.point_indices = np.asarray(point_indices)
+        self.win_size = (win_size, win_size)
+        self.max_level = max_level
+        self.max_error = max_error  # допустимое расхождение прямого и обратного потока (в пикселях)
+        self.padding = padding
+        self.min_tracked = min_tracked  # доля точек, при которой перенос ещё считается надёжным
+        self.criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+        self.reset()
+
+    def reset(self):
+        self._landmarks = None
+        self._prev_gray = None
+        self._points = None  # (N, 1, 2) float32 в пикселях области
+        self._roi = None
+        self._frame_size = None
+
+    @property
+    def anchored(self):
+        return self._prev_gray is not None
+
+    def anchor(self, frame, landmarks):
+        """Новая опора: landmark'и (478, 3) полного результата модели для этого кадра."""
+        h, w = frame.shape[:2]
+        points = landmarks[self.point_indices, :2] * (w, h)
+        (min_x, min_y), (max_x, max_y) = points.min(axis=0), points.max(axis=0)
+        # Запас вокруг точек: движение до следующей опоры не должно выводить их за край области
+        pad_x = (max_x - min_x) * self.padding + self.win_size[0]
+        pad_y = (max_y - min_y) * self.padding + self.win_size[1]
+        x0, y0 = int(max(min_x - pad_x, 0)), int(max(min_y - pad_y, 0))
+        x1, y1 = int(min(max_x + pad_x, w)), int(min(max_y + pad_y, h))
+        if x1 - x0 < 2 * self.win_size[0] or y1 - y0 < 2 * self.win_size[1]:
+            self.reset()
+            return False
+
+        self._roi = (x0, y0, x1, y1)
+        self._prev_gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        self._points = (points - (x0, y0)).astype(np.float32).reshape(-1, 1, 2)
+        self._landmarks = np.array(landmarks, dtype=np.float32)
+        self._frame_size = (w, h)
+        return True
+
+    def track(self, frame):
+        """Landmark'и (478, 3), перенесённые на этот кадр, или None, если перенос ненадёжен."""
+        if not self.anchored:
+            return None
+        x0, y0, x1, y1 = self._roi
+        gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        params = dict(winSize=self.win_size, maxLevel=self.max_level, criteria=self.criteria)
+        points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, self._points, None, **params)
+        # Проверка обратным потоком отбрасывает точки, «соскользнувшие» на соседнюю текстуру
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, points, None, **params)
+        error = np.linalg.norm((back - self._points).reshape(-1, 2), axis=1)
+        ok = status.ravel().astype(bool) & back_status.ravel().astype(bool) & (error < self.max_error)
+        if ok.mean() < self.min_tracked:
+            self.reset()
+            return None
+
+        # Потерянные точки сдвигаются вместе с остальными (медианное смещение)
+        shift = (points - self._points).reshape(-1, 2)
+        shift[~ok] = np.median(shift[ok], axis=0)
+        points = self._points + shift.reshape(-1, 1, 2)
+        xy = points.reshape(-1, 2)
+        if (xy < 0).any() or (xy[:, 0] >= x1 - x0).any() or (xy[:, 1] >= y1 - y0).any():
+            self.reset()
+            return None
+
+        self._points = points
+        self._prev_gray = gray
+        w, h = self._frame_size
+        landmarks = self._landmarks.copy()
+        landmarks[self.point_indices, :2] = (xy + (x0, y0)) / (w, h)
+        self._landmarks = landmarks
+        return landmarks
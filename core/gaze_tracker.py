@@ -1,98 +1,437 @@
 # core/gaze_tracker.py
 
+import threading
+import time
+from collections import namedtuple
+
 import cv2
 import mediapipe as mp
 import numpy as np
-from config.settings import FACE_DETECTION_CONFIDENCE, FACE_TRACKING_CONFIDENCE, GAZE_OFFSET_MAX, HEAD_MOVEMENT_COMPENSATION
+from config.settings import (
+    FACE_DETECTION_CONFIDENCE, FACE_TRACKING_CONFIDENCE, GAZE_OFFSET_MAX, HEAD_MOVEMENT_COMPENSATION,
+    ROI_INFERENCE_SIZE, ROI_PADDING, OPTICAL_FLOW_INTERVAL
+)
+from core.flow_tracker import EyeFlowTracker
+from utils.metrics import NULL_METRICS
+
+# Режимы работы FaceLandmarker:
+# IMAGE — полная детекция лица на каждом кадре (detect);
+# VIDEO — отслеживание landmark'ов от кадра к кадру (detect_for_video);
+# LIVE_STREAM — асинхронная обработка с колбэком (detect_async).
+RUNNING_MODES = ("IMAGE", "VIDEO", "LIVE_STREAM")
+
+# Landmark в нормализованных координатах полного кадра (после проекции из области лица)
+Landmark = namedtuple("Landmark", ["x", "y", "z"])
+
+# Индексы точек FaceMesh (478 точек вместе с радужками)
+LEFT_IRIS = slice(468, 473)  # центр и четыре точки контура левой радужки
+RIGHT_IRIS = slice(473, 478)  # центр и четыре точки контура правой радужки
+LEFT_EYE_CORNERS = (33, 133)  # внешний и внутренний уголки левого глаза
+RIGHT_EYE_CORNERS = (362, 263)  # внутренний и внешний уголки правого глаза
+LEFT_EYE_LIDS = (159, 145)  # верхнее и нижнее веко левого глаза
+RIGHT_EYE_LIDS = (386, 374)  # верхнее и нижнее веко правого глаза
+NOSE_BRIDGE = 6  # переносица
+# Точки, которые между запусками модели переносит оптический поток, — всё, из чего считаются признаки взгляда
+FLOW_POINTS = np.r_[np.arange(468, 478), LEFT_EYE_CORNERS, RIGHT_EYE_CORNERS, LEFT_EYE_LIDS, RIGHT_EYE_LIDS, NOSE_BRIDGE]
+
+# Признаки взгляда; каждое поле — массив (B, 2) для пачки или (2,) для одного кадра,
+# кроме eye_openness — (B,) или скаляр
+GazeFeatures = namedtuple("GazeFeatures",
+                          ["left_iris", "right_iris", "face_center", "gaze_offset", "eye_offset", "eye_openness"])
+
+
+def landmarks_to_array(landmarks):
+    """Список landmark'ов MediaPipe (объекты с .x/.y/.z) в массив (N, 3) float32 — один проход на кадр."""
+    if isinstance(landmarks, np.ndarray):
+        return landmarks
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+
+
+def mirror_landmarks(landmarks):
+    """Зеркальное отражение по горизонтали в нормализованных координатах (x → 1 - x); новая копия."""
+    mirrored = np.array(landmarks, dtype=np.float32)
+    mirrored[..., 0] = 1.0 - mirrored[..., 0]
+    return mirrored
+
+
+def features_from_landmarks(batch):
+    """Признаки взгляда для одного кадра (478, 3) или пачки кадров (B, 478, 3).
+
+    Кадры без лица передаются строками NaN и дают NaN в признаках.
+    """
+    arr = np.asarray(batch, dtype=np.float64)
+    single = arr.ndim == 2
+    if single:
+        arr = arr[None]
+    xy = arr[..., :2]
+
+    # Центр радужки — среднее центральной точки и контура: меньше дрожит, чем одна точка
+    left_iris = xy[:, LEFT_IRIS].mean(axis=1)
+    right_iris = xy[:, RIGHT_IRIS].mean(axis=1)
+    eyes_mid = (left_iris + right_iris) / 2
+
+    # Центр лица: взвешенное среднее середины глаз и переносицы
+    face_center = 0.4 * eyes_mid + 0.6 * xy[:, NOSE_BRIDGE]
+    # Относительное положение глаз от центра лица (среднее по двум глазам)
+    gaze_offset = eyes_mid - face_center
+
+    # Смещение радужки от середины уголков глаза в долях ширины глаза — не зависит от масштаба лица в кадре
+    corners = xy[:, [LEFT_EYE_CORNERS, RIGHT_EYE_CORNERS]]  # (B, глаз, уголок, xy)
+    eye_width = np.linalg.norm(corners[:, :, 1] - corners[:, :, 0], axis=-1)
+    iris = np.stack([left_iris, right_iris], axis=1)
+    eye_offset = ((iris - corners.mean(axis=2)) / np.maximum(eye_width, 1e-6)[..., None]).mean(axis=1)
+
+    # Раскрытие глаз: расстояние между веками в долях ширины глаза (при моргании падает почти до нуля)
+    lids = xy[:, [LEFT_EYE_LIDS, RIGHT_EYE_LIDS]]
+    eye_openness = (np.linalg.norm(lids[:, :, 1] - lids[:, :, 0], axis=-1) / np.maximum(eye_width, 1e-6)).mean(axis=1)
+
+    features = GazeFeatures(left_iris, right_iris, face_center, gaze_offset, eye_offset, eye_openness)
+    if single:
+        return GazeFeatures(*(f[0] for f in features))
+    return features
+
+def gaze_from_features(features, gaze_offset_max=GAZE_OFFSET_MAX, head_compensation=HEAD_MOVEMENT_COMPENSATION,
+                       prev_face_center=None):
+    """Точки взгляда (B, 2) по признакам пачки кадров с компенсацией движения головы.
+
+    prev_face_center — центр лица последнего кадра перед пачкой. Возвращает (gaze, prev_face_center),
+    где второй элемент — центр лица последнего кадра пачки с лицом (для следующей пачки).
+    """
+    face_center = features.face_center
+    gaze = 0.5 + features.gaze_offset / (2 * gaze_offset_max)
+
+    # Предыдущий центр лица для каждого кадра — последний кадр, где лицо было найдено
+    valid = np.flatnonzero(~np.isnan(face_center).any(axis=1))
+    if len(valid):
+        prev = np.full_like(face_center, np.nan)
+        prev[valid[1:]] = face_center[valid[:-1]]
+        if prev_face_center is not None:
+            prev[valid[0]] = prev_face_center
+        # Компенсация движения головы/лица (обратное смещение)
+        shift = np.nan_to_num(face_center - prev)
+        gaze = gaze - head_compensation * shift
+        prev_face_center = (float(face_center[valid[-1], 0]), float(face_center[valid[-1], 1]))
+    return np.clip(gaze, 0.0, 1.0), prev_face_center
+
 
 class GazeTracker:
-    def __init__(self):
+    def __init__(self, running_mode="IMAGE", output_blendshapes=False,
+                 output_transformation_matrixes=False, result_callback=None,
+                 roi_inference=False, roi_size=ROI_INFERENCE_SIZE, roi_padding=ROI_PADDING, metrics=None,
+                 optical_flow=False, flow_interval=OPTICAL_FLOW_INTERVAL, mirror=False):
         self.gaze_offset_max = GAZE_OFFSET_MAX
+        self.metrics = metrics or NULL_METRICS
         self.prev_face_center = None  # Сохраняем предыдущее положение лица для компенсации
-        
+        self.last_landmarks = None  # landmark'и последнего кадра в координатах полного кадра (для записи сессий)
+        self.last_features = None  # GazeFeatures последнего вызова gaze_from_landmarks
+        # Зеркалирование (как в зеркале перед пользователем) выполняется над 478 точками, а не над кадром:
+        # модель работает с кадром камеры как есть, отражаются landmark'и на выходе
+        self.mirror = mirror
+
+        # Инференс по области лица: кадр обрезается по рамке последних landmark'ов
+        # и уменьшается до roi_size x roi_size; при потере лица — проход по полному кадру.
+        # Область не пересчитывается на каждом кадре: в режиме VIDEO модель отслеживает лицо от кадра
+        # к кадру и ждёт неизменной геометрии входа, поэтому область остаётся прежней, пока лицо не
+        # подойдёт к её краю или заметно не уменьшится. В LIVE_STREAM _roi пишется из потока колбэка —
+        # доступ под _result_lock
+        self.roi_inference = roi_inference
+        self.roi_size = roi_size
+        self.roi_padding = roi_padding
+        self._roi = None  # (x0, y0, x1, y1) в пикселях полного кадра
+        self._pending_rois = {}  # timestamp_ms -> (roi, w, h, время отправки) для асинхронных результатов
+
+        self.running_mode = running_mode.upper()
+        if self.running_mode not in RUNNING_MODES:
+            raise ValueError(f"Неизвестный режим FaceLandmarker: {running_mode}")
+        # Колбэк result_callback(gaze, face_center, timestamp_ms, eye_openness) вызывается на каждый
+        # обработанный кадр в режиме LIVE_STREAM (eye_openness — None, если лица нет)
+        self.result_callback = result_callback
+        self._last_timestamp_ms = -1
+        self._result_lock = threading.Lock()
+        self._latest_result = (None, None)
+        self._warming_up = False  # LIVE_STREAM: ждём колбэк пробного кадра (warm_up)
+        self._warm_up_done = threading.Event()
+        # LIVE_STREAM: время от detect_async до колбэка с результатом (сама постановка в очередь почти
+        # ничего не стоит); обновляется до вызова result_callback
+        self.last_inference_time = None
+
         # Используем FaceLandmarker из новой версии MediaPipe
         # Для локальной загрузки модели укажем путь к файлу
         base_options = mp.tasks.BaseOptions(
             model_asset_path="./models/face_landmarker.task"
         )
+        extra_options = {}
+        if self.running_mode == "LIVE_STREAM":
+            extra_options["result_callback"] = self._on_async_result
+        # Blendshapes и матрицы трансформации маппер не использует — по умолчанию отключены
         options = mp.tasks.vision.FaceLandmarkerOptions(
             base_options=base_options,
-            output_face_blendshapes=True,
-            output_facial_transformation_matrixes=True,
+            running_mode=getattr(mp.tasks.vision.RunningMode, self.running_mode),
+            output_face_blendshapes=output_blendshapes,
+            output_facial_transformation_matrixes=output_transformation_matrixes,
             num_faces=1,
             min_face_detection_confidence=FACE_DETECTION_CONFIDENCE,
-            min_tracking_confidence=FACE_TRACKING_CONFIDENCE
+            min_tracking_confidence=FACE_TRACKING_CONFIDENCE,
+            **extra_options
         )
         self.face_landmarker = mp.tasks.vision.FaceLandmarker.create_from_options(options)
 
-    def get_gaze_point(self, frame):
-        # Конвертируем BGR в RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        # Создаем MediaPipe Image изображение
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
-        
+        # Оптический поток между запусками модели: модель — на каждом flow_interval-м кадре.
+        # В LIVE_STREAM результат приходит позже кадра, опору не к чему привязать — поток не используется
+        self.flow = None
+        self.flow_interval = flow_interval
+        self._flow_frames = 0  # кадров подряд, обработанных потоком после последней опоры
+        self.last_ran_model = False  # последний get_gaze_point запускал модель (а не только поток)
+        if optical_flow and self.running_mode == "LIVE_STREAM":
+            print("⚠️ Оптический поток недоступен в режиме LIVE_STREAM.")
+        elif optical_flow:
+            self.flow = EyeFlowTracker(FLOW_POINTS)
+
+    def warm_up(self, frame_shape=(480, 640, 3), timeout=5.0):
+        # Пробный инференс на пустом кадре: первый вызов инициализирует граф и делегат модели,
+        # и эта задержка не приходится на первый кадр камеры. Результат не используется.
+        # Метка времени 0: любая следующая, в том числе из записанной сессии, больше неё
+        frame = np.zeros(frame_shape, dtype=np.uint8)
+        if self.running_mode != "LIVE_STREAM":
+            self._detect(frame, None, 0.0)
+            return
+        # detect_async только ставит кадр в очередь — ждём его колбэка
+        with self._result_lock:
+            self._warming_up = True
+        self._warm_up_done.clear()
+        self._detect(frame, None, 0.0)
+        if not self._warm_up_done.wait(timeout):
+            with self._result_lock:
+                self._warming_up = False
+            print(f"⚠️ Прогрев модели не завершился за {timeout:.0f} с.")
+
+    def _next_timestamp_ms(self, timestamp=None):
+        # VIDEO и LIVE_STREAM требуют строго возрастающих временных меток
+        if timestamp is None:
+            timestamp = time.monotonic()
+        timestamp_ms = max(int(timestamp * 1000), self._last_timestamp_ms + 1)
+        self._last_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def get_gaze_point(self, frame, timestamp=None):
+        # timestamp — время захвата кадра в секундах (time.monotonic); если не задано, берётся текущее
+        if self.flow is not None:
+            interpolated = self._track_flow(frame)
+            if interpolated is not None:
+                self.last_ran_model = False
+                return interpolated
+
+        self.last_ran_model = True
+        h, w = frame.shape[:2]
+        roi = self._current_roi()
+        results = self._detect(frame, roi, timestamp)
+
+        if self.running_mode == "LIVE_STREAM":
+            # Результат придёт в колбэк; возвращаем последний уже готовый
+            with self._result_lock:
+                return self._latest_result
+
+        if roi is not None and not results.face_landmarks:
+            # Лицо ушло из области — повторяем поиск на полном кадре
+            self._set_roi(None)
+            roi = None
+            results = self._detect(frame, None, timestamp)
+
+        gaze, face_center = self._process_results(results, roi, w, h)
+        if self.flow is not None:
+            # Полный результат модели — новая опора для потока
+            self._flow_frames = 0
+            if self.last_landmarks is None:
+                self.flow.reset()
+            else:
+                # Поток работает в координатах кадра, а last_landmarks могут быть отражены
+                self.flow.anchor(frame, mirror_landmarks(self.last_landmarks) if self.mirror else self.last_landmarks)
+        return gaze, face_center
+
+    def will_run_model(self):
+        """True, если следующий get_gaze_point запустит модель; False — кадр обработает оптический поток.
+
+        Поток может потерять точки и всё же уступить модели — тогда last_ran_model окажется True.
+        """
+        return self.flow is None or not self.flow.anchored or self._flow_frames >= self.flow_interval - 1
+
+    def _track_flow(self, frame):
+        # Взгляд по точкам, перенесённым потоком; None — пора запускать модель
+        if self.will_run_model():
+            return None
+        with self.metrics.timer("flow"):
+            landmarks = self.flow.track(frame)
+        if landmarks is None:
+            return None
+        if self.mirror:
+            landmarks = mirror_landmarks(landmarks)
+        self._flow_frames += 1
+        self.metrics.inc("frames_interpolated")
+        self.last_landmarks = landmarks
+        with self.metrics.timer("features"):
+            gaze, face_center = self.gaze_from_landmarks(landmarks[None])
+        return (float(gaze[0, 0]), float(gaze[0, 1])), (float(face_center[0, 0]), float(face_center[0, 1]))
+
+    def get_gaze_points(self, frames, timestamps=None):
+        """Пакетная обработка кадров (повтор сессий, калибровка, офлайн-оценка).
+
+        Возвращает массивы gaze и face_center формы (B, 2); для кадров без лица — NaN.
+        """
+        if self.running_mode == "LIVE_STREAM":
+            raise ValueError("Пакетная обработка недоступна в режиме LIVE_STREAM")
+        batch = []
+        for i, frame in enumerate(frames):
+            h, w = frame.shape[:2]
+            roi = self._current_roi()
+            timestamp = timestamps[i] if timestamps is not None else None
+            results = self._detect(frame, roi, timestamp)
+            if roi is not None and not results.face_landmarks:
+                roi = None
+                results = self._detect(frame, None, timestamp)
+            self.metrics.inc("frames_processed")
+            landmarks = self._landmarks_from_results(results, roi, w, h)
+            if landmarks is None:
+                self.metrics.inc("faces_lost")
+                landmarks = np.full((478, 3), np.nan, dtype=np.float32)
+            batch.append(landmarks)
+        if not batch:
+            return np.zeros((0, 2)), np.zeros((0, 2))
+        with self.metrics.timer("features"):
+            return self.gaze_from_landmarks(np.stack(batch))
+
+    def gaze_from_landmarks(self, batch):
+        """Точки взгляда для пачки landmark'ов (B, 478, 3) с последовательной компенсацией движения головы.
+
+        Использует и обновляет prev_face_center, поэтому пачки можно подавать подряд.
+        """
+        features = features_from_landmarks(batch)
+        self.last_features = features
+        gaze, self.prev_face_center = gaze_from_features(features, self.gaze_offset_max, HEAD_MOVEMENT_COMPENSATION,
+                                                         self.prev_face_center)
+        return gaze, features.face_center
+
+    def _detect(self, frame, roi, timestamp):
+        with self.metrics.timer("preprocess"):
+            if roi is not None:
+                x0, y0, x1, y1 = roi
+                image = cv2.resize(frame[y0:y1, x0:x1], (self.roi_size, self.roi_size), interpolation=cv2.INTER_AREA)
+            else:
+                image = frame
+            # Конвертируем BGR в RGB
+            rgb_frame = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            # Создаем MediaPipe Image изображение
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+
         # Обрабатываем изображение
-        results = self.face_landmarker.detect(mp_image)
+        if self.running_mode == "LIVE_STREAM":
+            timestamp_ms = self._next_timestamp_ms(timestamp)
+            h, w = frame.shape[:2]
+            with self._result_lock:
+                self._pending_rois[timestamp_ms] = (roi, w, h, time.monotonic())
+            self.face_landmarker.detect_async(mp_image, timestamp_ms)
+            return None
+        with self.metrics.timer("detect"):
+            if self.running_mode == "VIDEO":
+                return self.face_landmarker.detect_for_video(mp_image, self._next_timestamp_ms(timestamp))
+            return self.face_landmarker.detect(mp_image)
+
+    def _on_async_result(self, results, output_image, timestamp_ms):
+        with self._result_lock:
+            roi, w, h, submitted = self._pending_rois.pop(timestamp_ms, (None, None, None, None))
+            # Кадры, которые LIVE_STREAM пропустил, колбэка уже не получат
+            for stale in [ts for ts in self._pending_rois if ts < timestamp_ms]:
+                del self._pending_rois[stale]
+            warm_up, self._warming_up = self._warming_up, False
+        if warm_up:
+            self._warm_up_done.set()
+            return  # результат прогрева не нужен ни трекеру, ни колбэку
+        if submitted is not None:
+            self.last_inference_time = time.monotonic() - submitted
+            self.metrics.observe("detect", self.last_inference_time)
+        gaze, face_center = self._process_results(results, roi, w, h)
+        features = self.last_features if gaze is not None else None
+        eye_openness = float(features.eye_openness[0]) if features is not None else None
+        with self._result_lock:
+            self._latest_result = (gaze, face_center)
+        if self.result_callback is not None:
+            self.result_callback(gaze, face_center, timestamp_ms, eye_openness)
+
+    def _current_roi(self):
+        if not self.roi_inference:
+            return None
+        with self._result_lock:
+            return self._roi
+
+    def _set_roi(self, roi):
+        with self._result_lock:
+            self._roi = roi
 
+    def _roi_still_fits(self, landmarks, roi, frame_w, frame_h):
+        # Область остаётся, пока рамка лица с половиной отступа внутри неё и лицо занимает заметную её часть
+        x0, y0, x1, y1 = roi
+        side = x1 - x0
+        (min_x, min_y), (max_x, max_y) = landmarks[:, :2].min(axis=0), landmarks[:, :2].max(axis=0)
+        face = max((max_x - min_x) * frame_w, (max_y - min_y) * frame_h)
+        margin = face * self.roi_padding / 2
+        inside = (min_x * frame_w - margin >= x0 and max_x * frame_w + margin <= x1
+                  and min_y * frame_h - margin >= y0 and max_y * frame_h + margin <= y1)
+        return inside and face * (1 + 2 * self.roi_padding) * 1.5 >= side
+
+    def _project_landmarks(self, landmarks, roi, frame_w, frame_h):
+        # Из нормализованных координат области лица в нормализованные координаты полного кадра
+        x0, y0, x1, y1 = roi
+        sx, sy = (x1 - x0) / frame_w, (y1 - y0) / frame_h
+        ox, oy = x0 / frame_w, y0 / frame_h
+        return landmarks * np.array([sx, sy, sx], dtype=np.float32) + np.array([ox, oy, 0.0], dtype=np.float32)
+
+    def _roi_from_landmarks(self, landmarks, frame_w, frame_h):
+        (min_x, min_y), (max_x, max_y) = landmarks[:, :2].min(axis=0), landmarks[:, :2].max(axis=0)
+        cx = (min_x + max_x) / 2 * frame_w
+        cy = (min_y + max_y) / 2 * frame_h
+        # Квадратная область, чтобы при уменьшении не искажались пропорции лица
+        side = max((max_x - min_x) * frame_w, (max_y - min_y) * frame_h) * (1 + 2 * self.roi_padding)
+        side = min(side, frame_w, frame_h)
+        if side < 16:
+            return None
+        x0 = int(min(max(cx - side / 2, 0), frame_w - side))
+        y0 = int(min(max(cy - side / 2, 0), frame_h - side))
+        return x0, y0, x0 + int(side), y0 + int(side)
+
+    def _process_results(self, results, roi=None, frame_w=None, frame_h=None):
+        self.metrics.inc("frames_processed")
+        with self.metrics.timer("features"):
+            gaze, face_center = self._compute_gaze(results, roi, frame_w, frame_h)
+        if gaze is None:
+            self.metrics.inc("faces_lost")
+        return gaze, face_center
+
+    def _landmarks_from_results(self, results, roi, frame_w, frame_h):
         if not results.face_landmarks:
+            self._set_roi(None)
+            self.last_landmarks = None
+            self.last_features = None
+            return None
+
+        # Landmark'и первого лица — один раз в массив, дальше только векторные операции
+        landmarks = landmarks_to_array(results.face_landmarks[0])
+        if roi is not None:
+            landmarks = self._project_landmarks(landmarks, roi, frame_w, frame_h)
+        if self.roi_inference and frame_w is not None:
+            if roi is None or not self._roi_still_fits(landmarks, roi, frame_w, frame_h):
+                self._set_roi(self._roi_from_landmarks(landmarks, frame_w, frame_h))
+        if self.mirror:
+            landmarks = mirror_landmarks(landmarks)
+        self.last_landmarks = landmarks
+        return landmarks
+
+    def _compute_gaze(self, results, roi, frame_w, frame_h):
+        landmarks = self._landmarks_from_results(results, roi, frame_w, frame_h)
+        if landmarks is None:
             return None, None  # ← Возвращаем None для взгляда и None для центра лица
 
-        # Получаем landmark'ы первого лица
-        landmarks = results.face_landmarks[0]
-
-        # Зрачки (в новой версии MediaPipe номера точек могут отличаться)
-        # В новой версии MediaPipe нет специфических точек для зрачков, используем приближенные
-        left_eye = landmarks[468]  # приближенная точка левого глаза
-        right_eye = landmarks[473]  # приближенная точка правого глаза
-
-        # Центр лица: используем более стабильные точки
-        # Средняя точка между глазами (медиана глаз)
-        left_eye_inner = landmarks[468]  # внутренняя точка левого глаза
-        right_eye_inner = landmarks[473]  # внутренняя точка правого глаза
-        
-        # Дополнительно используем точку между глазами и носом для более точного центра
-        nose_bridge = landmarks[6]  # переносица
-        
-        # Используем взвешенное среднее для более точного центра лица
-        face_center_x = 0.4 * (left_eye_inner.x + right_eye_inner.x) / 2 + 0.6 * nose_bridge.x
-        face_center_y = 0.4 * (left_eye_inner.y + right_eye_inner.y) / 2 + 0.6 * nose_bridge.y
-
-        # Относительное положение глаз от центра лица
-        left_gx = left_eye.x - face_center_x
-        left_gy = left_eye.y - face_center_y
-        right_gx = right_eye.x - face_center_x
-        right_gy = right_eye.y - face_center_y
-
-        rel_gx = (left_gx + right_gx) / 2
-        rel_gy = (left_gy + right_gy) / 2
-
-        # Нормализация в [0, 1] (эмпирический диапазон)
-        max_offset = self.gaze_offset_max
-
-        # Вычисляем базовую точку взгляда
-        normalized_gx = 0.5 + rel_gx / (2 * max_offset)
-        normalized_gy = 0.5 + rel_gy / (2 * max_offset)
-
-        # Компенсация движения головы/лица
-        if self.prev_face_center is not None:
-            # Вычисляем смещение центра лица относительно предыдущего кадра
-            face_dx = face_center_x - self.prev_face_center[0]
-            face_dy = face_center_y - self.prev_face_center[1]
-            
-            # Применяем компенсацию к точке взгляда (обратное смещение)
-            # Коэффициент компенсации может быть настроен для оптимизации
-            compensation_factor = HEAD_MOVEMENT_COMPENSATION  # Коэффициент компенсации движения головы из настроек
-            normalized_gx -= compensation_factor * face_dx
-            normalized_gy -= compensation_factor * face_dy
-
-        normalized_gx = np.clip(normalized_gx, 0.0, 1.0)
-        normalized_gy = np.clip(normalized_gy, 0.0, 1.0)
-
-        # Сохраняем текущее положение центра лица для следующего кадра
-        self.prev_face_center = (face_center_x, face_center_y)
-
-        return (float(normalized_gx), float(normalized_gy)), (face_center_x, face_center_y)
+        gaze, face_center = self.gaze_from_landmarks(landmarks[None])
+        return (float(gaze[0, 0]), float(gaze[0, 1])), (float(face_center[0, 0]), float(face_center[0, 1]))
 
     def close(self):
-        # В новой версии MediaPipe закрытие может быть не требуется
-        pass
\ No newline at end of file
+        # В режиме LIVE_STREAM закрытие останавливает внутренний граф и поток колбэков
+        self.face_landmarker.close()
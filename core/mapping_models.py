@@ -0,0 +1,149 @@
+# core/mapping_models.py
+
+import numpy as np
+
+# Модели отображения нормализованного взгляда (gx, gy) в координаты экрана.
+# Коэффициенты хранятся как обычные float, поэтому map() не выделяет памяти
+# и не проходит валидацию входа, а map_many() считает всё одним векторным выражением.
+
+
+# Минимальный знаменатель гомографии: нормализованная матрица (h22 = 1) даёт w около 1 в рабочей области
+HORIZON_EPS = 1e-6
+
+
+class LinearAxisModel:
+    """Независимая линейная модель по каждой оси: sx = ax*gx + bx, sy = ay*gy + by."""
+
+    name = "linear"
+    min_points = 1
+
+    def __init__(self, params):
+        self.params = np.asarray(params, dtype=np.float64).reshape(2, 2)
+        (self._ax, self._bx), (self._ay, self._by) = self.params.tolist()
+
+    @classmethod
+    def fit(cls, gaze_coords, screen_coords):
+        params = [cls._fit_axis(gaze_coords[:, 0], screen_coords[:, 0]),
+                  cls._fit_axis(gaze_coords[:, 1], screen_coords[:, 1])]
+        return cls(params)
+
+    @staticmethod
+    def _fit_axis(x, y):
+        # Метод наименьших квадратов в закрытой форме; при нулевой дисперсии — константа (как у LinearRegression)
+        x_mean, y_mean = x.mean(), y.mean()
+        var = np.sum((x - x_mean) ** 2)
+        slope = np.sum((x - x_mean) * (y - y_mean)) / var if var > 1e-12 else 0.0
+        return slope, y_mean - slope * x_mean
+
+    def map(self, gaze_x, gaze_y):
+        return self._ax * gaze_x + self._bx, self._ay * gaze_y + self._by
+
+    def map_many(self, gaze):
+        return gaze * self.params[:, 0] + self.params[:, 1]
+
+
+class PolynomialModel:
+    """Совместная полиномиальная модель 2-й степени: признаки [1, x, y, xy, x², y²] для обеих осей."""
+
+    name = "poly2"
+    min_points = 6
+
+    def __init__(self, params):
+        self.params = np.asarray(params, dtype=np.float64).reshape(2, 6)
+        self._cx = tuple(self.params[0].tolist())
+        self._cy = tuple(self.params[1].tolist())
+
+    @staticmethod
+    def features(gaze):
+        x, y = gaze[:, 0], gaze[:, 1]
+        return np.stack([np.ones_like(x), x, y, x * y, x * x, y * y], axis=1)
+
+    @classmethod
+    def fit(cls, gaze_coords, screen_coords):
+        if len(gaze_coords) < cls.min_points:
+            raise ValueError(f"Для модели {cls.name} нужно не меньше {cls.min_points} точек.")
+        coef, _, _, _ = np.linalg.lstsq(cls.features(gaze_coords), screen_coords, rcond=None)
+        return cls(coef.T)
+
+    def map(self, gaze_x, gaze_y):
+        xy, xx, yy = gaze_x * gaze_y, gaze_x * gaze_x, gaze_y * gaze_y
+        c0, c1, c2, c3, c4, c5 = self._cx
+        d0, d1, d2, d3, d4, d5 = self._cy
+        return (c0 + c1 * gaze_x + c2 * gaze_y + c3 * xy + c4 * xx + c5 * yy,
+                d0 + d1 * gaze_x + d2 * gaze_y + d3 * xy + d4 * xx + d5 * yy)
+
+    def map_many(self, gaze):
+        return self.features(gaze) @ self.params.T
+
+
+class HomographyModel:
+    """Проективное преобразование 3x3 (гомография), оценённое методом DLT."""
+
+    name = "homography"
+    min_points = 4
+
+    def __init__(self, params):
+        self.params = np.asarray(params, dtype=np.float64).reshape(3, 3)
+        (self._h00, self._h01, self._h02,
+         self._h10, self._h11, self._h12,
+         self._h20, self._h21, self._h22) = self.params.ravel().tolist()
+
+    @staticmethod
+    def _normalization(points):
+        # Нормализация Хартли: центр в нуле, среднее расстояние sqrt(2)
+        mean = points.mean(axis=0)
+        dist = np.sqrt(((points - mean) ** 2).sum(axis=1)).mean()
+        scale = np.sqrt(2) / dist if dist > 1e-12 else 1.0
+        return np.array([[scale, 0, -scale * mean[0]],
+                         [0, scale, -scale * mean[1]],
+                         [0, 0, 1]])
+
+    @classmethod
+    def fit(cls, gaze_coords, screen_coords):
+        if len(gaze_coords) < cls.min_points:
+            raise ValueError(f"Для модели {cls.name} нужно не меньше {cls.min_points} точек.")
+        t_src = cls._normalization(gaze_coords)
+        t_dst = cls._normalization(screen_coords)
+        src = np.c_[gaze_coords, np.ones(len(gaze_coords))] @ t_src.T
+        dst = np.c_[screen_coords, np.ones(len(screen_coords))] @ t_dst.T
+
+        rows = []
+        for (x, y, _), (u, v, _) in zip(src, dst):
+            rows.append([-x, -y, -1, 0, 0, 0, u * x, u * y, u])
+            rows.append([0, 0, 0, -x, -y, -1, v * x, v * y, v])
+        _, _, vt = np.linalg.svd(np.asarray(rows))
+        h = vt[-1].reshape(3, 3)
+        h = np.linalg.inv(t_dst) @ h @ t_src
+        if abs(h[2, 2]) < 1e-12:
+            raise ValueError("Вырожденная гомография: проверьте точки калибровки.")
+        return cls(h / h[2, 2])
+
+    def map(self, gaze_x, gaze_y):
+        # За линией горизонта (w <= 0) гомография даёт бесконечность или отражённые точки — None
+        w = self._h20 * gaze_x + self._h21 * gaze_y + self._h22
+        if w <= HORIZON_EPS:
+            return None
+        return ((self._h00 * gaze_x + self._h01 * gaze_y + self._h02) / w,
+                (self._h10 * gaze_x + self._h11 * gaze_y + self._h12) / w)
+
+    def map_many(self, gaze):
+        # Точки за линией горизонта — строки NaN
+        projected = np.c_[gaze, np.ones(len(gaze))] @ self.params.T
+        w = projected[:, 2:3]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(w > HORIZON_EPS, projected[:, :2] / w, np.nan)
+
+
+MODELS = {model.name: model for model in (LinearAxisModel, PolynomialModel, HomographyModel)}
+
+
+def fit_model(name, gaze_coords, screen_coords):
+    if name not in MODELS:
+        raise ValueError(f"Неизвестная модель отображения: {name}")
+    return MODELS[name].fit(np.asarray(gaze_coords, dtype=np.float64), np.asarray(screen_coords, dtype=np.float64))
+
+
+def model_from_params(name, params):
+    if name not in MODELS:
+        raise ValueError(f"Неизвестная модель отображения: {name}")
+    return MODELS[name](params)
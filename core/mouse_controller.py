@@ -1,43 +1,71 @@
 # core/mouse_controller.py
 import time
 
-import pyautogui
-import numpy as np
-from config.settings import DWELL_TIME, SMOOTHING_WINDOW
+from config.settings import DWELL_TIME, SMOOTHING_WINDOW, CURSOR_FILTER, CURSOR_OUTPUT_THREADED, CURSOR_MAX_RATE_HZ
+from core.cursor_output import CursorOutput, create_backend
+from core.filters import MovingAverageFilter, create_filter
+from utils.metrics import NULL_METRICS
 
 class MouseController:
-    def __init__(self, dwell_time=DWELL_TIME, smoothing_window=SMOOTHING_WINDOW):
+    def __init__(self, dwell_time=DWELL_TIME, smoothing_window=SMOOTHING_WINDOW, backend=None, metrics=None,
+                 cursor_filter=None, threaded_output=CURSOR_OUTPUT_THREADED, max_rate_hz=CURSOR_MAX_RATE_HZ):
         self.dwell_time = dwell_time
+        self.metrics = metrics or NULL_METRICS
         self.last_gaze_x = None
         self.last_gaze_y = None
         self.fixation_start_time = None
         self.smoothing_window = smoothing_window
-        self.screen_x_history = []
-        self.screen_y_history = []
-        pyautogui.FAILSAFE = False
+        self.last_position = None  # последняя отправленная позиция курсора (после сглаживания)
+        self.paused = False  # при паузе позиция считается, но курсор не двигается (коррекция калибровки)
+        # cursor_filter — экземпляр из core.filters; по умолчанию выбирается по CURSOR_FILTER
+        if cursor_filter is None:
+            if CURSOR_FILTER == MovingAverageFilter.name:
+                cursor_filter = MovingAverageFilter(window=smoothing_window)
+            else:
+                cursor_filter = create_filter(CURSOR_FILTER)
+        self.cursor_filter = cursor_filter
+        # backend — бэкенд из core.cursor_output; по умолчанию выбирается по CURSOR_BACKEND.
+        # Перемещения и клики идут через одну упорядоченную очередь CursorOutput
+        self.backend = backend or create_backend()
+        self.output = CursorOutput(self.backend, max_rate_hz=max_rate_hz, threaded=threaded_output,
+                                   metrics=self.metrics)
 
-    def _smooth_position(self, screen_x, screen_y):
-        self.screen_x_history.append(screen_x)
-        self.screen_y_history.append(screen_y)
-        if len(self.screen_x_history) > self.smoothing_window:
-            self.screen_x_history.pop(0)
-            self.screen_y_history.pop(0)
-        return int(np.mean(self.screen_x_history)), int(np.mean(self.screen_y_history))
+    def _smooth_position(self, screen_x, screen_y, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        smoothed_x, smoothed_y = self.cursor_filter.update(screen_x, screen_y, timestamp)
+        return int(smoothed_x), int(smoothed_y)
 
-    def update_cursor(self, screen_x, screen_y):
-        smoothed_x, smoothed_y = self._smooth_position(screen_x, screen_y)
-        pyautogui.moveTo(smoothed_x, smoothed_y, _pause=False)
+    def update_cursor(self, screen_x, screen_y, timestamp=None):
+        # timestamp — время захвата кадра (time.monotonic); фильтрам нужны реальные интервалы между кадрами
+        with self.metrics.timer("smoothing"):
+            smoothed_x, smoothed_y = self._smooth_position(screen_x, screen_y, timestamp)
+        if self.paused:
+            return
+        self.last_position = (smoothed_x, smoothed_y)
+        self.output.move_to(smoothed_x, smoothed_y)
 
-    def handle_dwell_click(self, gaze_x, gaze_y):
+    def handle_dwell_click(self, gaze_x, gaze_y, timestamp=None):
+        # Возвращает True, если на этом кадре выполнен клик; timestamp — время кадра (при повторе сессии)
+        if self.paused:
+            return False
+        now = time.time() if timestamp is None else timestamp
         if self.last_gaze_x is None:
             self.last_gaze_x, self.last_gaze_y = gaze_x, gaze_y
-            self.fixation_start_time = time.time()
+            self.fixation_start_time = now
         else:
             move_dist = abs(gaze_x - self.last_gaze_x) + abs(gaze_y - self.last_gaze_y)
             if move_dist < 0.01:
-                if self.fixation_start_time and (time.time() - self.fixation_start_time) >= self.dwell_time:
-                    pyautogui.click()
-                    self.fixation_start_time = time.time() + 10
+                if self.fixation_start_time and (now - self.fixation_start_time) >= self.dwell_time:
+                    self.output.click()
+                    self.metrics.inc("clicks")
+                    self.fixation_start_time = now + 10
+                    return True
             else:
-                self.fixation_start_time = time.time()
-                self.last_gaze_x, self.last_gaze_y = gaze_x, gaze_y
\ No newline at end of file
+                self.fixation_start_time = now
+                self.last_gaze_x, self.last_gaze_y = gaze_x, gaze_y
+        return False
+
+    def close(self):
+        # Дожидаемся уже поставленных команд и останавливаем поток вывода
+        self.output.close()
@@ -0,0 +1,312 @@
+# core/pipeline.py
+#
+# Многопроцессный конвейер: захват, инференс landmark'ов и отображение/вывод курсора
+# работают в отдельных процессах и не делят GIL.
+#
+# Кадры передаются через кольцо буферов multiprocessing.shared_memory: процесс захвата
+# пишет кадр прямо в свободный слот, процесс инференса копирует слот в свой заранее выделенный
+# буфер (без pickle и выделений памяти). Каждый слот защищён счётчиком последовательности (seqlock):
+# читатель сверяет его после копирования и отбрасывает кадр, если слот успели перезаписать, —
+# до инференса, чтобы разорванный кадр не попал ни в модель, ни в состояние трекера и планировщика.
+# Результаты возвращаются через кольцо одного писателя и одного читателя (SPSC) в той же
+# разделяемой памяти — без блокировок: писатель двигает только head, читатель только tail.
+# Порядок записи "данные, затем индекс" опирается на порядок сохранений x86/TSO.
+# Дочерние процессы запускаются через spawn и делят трекер ресурсов родителя,
+# поэтому блоки памяти удаляет только создавший их процесс.
+
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from config.settings import PIPELINE_RING_SLOTS, PIPELINE_RESULT_CAPACITY
+
+# Поля записи результата
+RESULT_FIELDS = ("seq", "timestamp", "gaze_x", "gaze_y", "face_x", "face_y", "openness")
+
+
+class SharedFrameRing:
+    # Заголовок: [опубликованный seq, затем seq и временная метка по каждому слоту]
+    def __init__(self, shape, slots=PIPELINE_RING_SLOTS, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header_bytes = 8 * (1 + 2 * slots)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + frame_bytes * slots)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+
+        self._published = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self._slot_seq = np.ndarray((slots,), dtype=np.int64, buffer=self.shm.buf, offset=8)
+        self._slot_time = np.ndarray((slots,), dtype=np.float64, buffer=self.shm.buf, offset=8 + 8 * slots)
+        self._frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf, offset=header_bytes)
+        if self.owner:
+            self._published[0] = 0
+            self._slot_seq[:] = 0
+        self._next_seq = 1
+
+    # --- писатель (процесс захвата) ---
+    def acquire(self):
+        """Возвращает (seq, view) — слот, в который можно записать следующий кадр."""
+        seq = self._next_seq
+        slot = seq % self.slots
+        self._slot_seq[slot] = -seq  # отрицательный seq: слот в процессе записи
+        return seq, self._frames[slot]
+
+    def publish(self, seq, timestamp):
+        slot = seq % self.slots
+        self._slot_time[slot] = timestamp
+        self._slot_seq[slot] = seq
+        self._published[0] = seq
+        self._next_seq = seq + 1
+
+    # --- читатель (процесс инференса) ---
+    @property
+    def published(self):
+        return int(self._published[0])
+
+    def read_latest(self, last_seq):
+        """Возвращает (seq, timestamp, view) самого свежего кадра новее last_seq или None."""
+        seq = int(self._published[0])
+        if seq <= last_seq:
+            return None
+        slot = seq % self.slots
+        timestamp = float(self._slot_time[slot])
+        if int(self._slot_seq[slot]) != seq:
+            return None  # слот уже переписывается — следующий вызов возьмёт более новый кадр
+        return seq, timestamp, self._frames[slot]
+
+    def is_valid(self, seq):
+        return int(self._slot_seq[seq % self.slots]) == seq
+
+    def close(self):
+        # Представления NumPy держат буфер — освобождаем их до закрытия блока
+        del self._published, self._slot_seq, self._slot_time, self._frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedResultRing:
+    # Заголовок: [head, tail]; далее capacity записей по len(RESULT_FIELDS) float64
+    def __init__(self, capacity=PIPELINE_RESULT_CAPACITY, name=None):
+        self.capacity = capacity
+        record_bytes = 8 * len(RESULT_FIELDS)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=16 + record_bytes * capacity)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        self._indices = np.ndarray((2,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self._records = np.ndarray((capacity, len(RESULT_FIELDS)), dtype=np.float64, buffer=self.shm.buf, offset=16)
+        if self.owner:
+            self._indices[:] = 0
+        self.dropped = 0
+
+    def push(self, record):
+        head, tail = int(self._indices[0]), int(self._indices[1])
+        if head - tail >= self.capacity:
+            self.dropped += 1  # читатель не успевает — отбрасываем новую запись, не трогая tail
+            return False
+        self._records[head % self.capacity] = record
+        self._indices[0] = head + 1
+        return True
+
+    def pop_all(self):
+        head, tail = int(self._indices[0]), int(self._indices[1])
+        if head == tail:
+            return []
+        out = [tuple(self._records[i % self.capacity].tolist()) for i in range(tail, head)]
+        self._indices[1] = head
+        return out
+
+    def close(self):
+        del self._indices, self._records
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _capture_worker(ring_name, shape, slots, device_id, stop_event):
+    import cv2
+
+    from utils.camera import configure_capture
+
+    ring = SharedFrameRing(shape, slots=slots, name=ring_name)
+    cap = cv2.VideoCapture(device_id)
+    configure_capture(cap)
+    slot_shape = tuple(shape)
+    buffer = np.empty(slot_shape, dtype=np.uint8)
+    try:
+        while not stop_event.is_set():
+            ret, frame = cap.read(buffer)
+            timestamp = time.monotonic()
+            if not ret:
+                break
+            if frame.shape != slot_shape:
+                print(f"❌ Размер кадра изменился: {frame.shape} вместо {slot_shape}")
+                break
+            seq, slot = ring.acquire()
+            np.copyto(slot, frame)  # зеркалирование — в трекере над landmark'ами, кадр копируется как есть
+            ring.publish(seq, timestamp)
+    finally:
+        cap.release()
+        ring.close()
+        stop_event.set()
+
+
+def _inference_worker(ring_name, result_name, shape, slots, capacity, tracker_kwargs, stop_event, poll_interval,
+                      adaptive=False):
+    from core.gaze_tracker import GazeTracker
+    from core.scheduler import InferenceScheduler
+
+    ring = SharedFrameRing(shape, slots=slots, name=ring_name)
+    results = SharedResultRing(capacity, name=result_name)
+    scheduler = InferenceScheduler() if adaptive else None
+    frame = np.empty(tuple(shape), dtype=np.uint8)  # локальная копия слота
+    last_seq = 0
+    tracker = None
+    try:
+        tracker = GazeTracker(**tracker_kwargs)
+        while True:
+            # Прореживаются только запуски модели, кадры оптического потока обрабатываются все
+            if scheduler is not None and tracker.will_run_model() and scheduler.delay() > 0:
+                time.sleep(min(scheduler.delay(), poll_interval * 10))
+                continue
+            latest = ring.read_latest(last_seq)
+            if latest is None:
+                # Захват завершён, а новых кадров нет — выходим, дообработав последний
+                if stop_event.is_set():
+                    break
+                time.sleep(poll_interval)
+                continue
+            seq, timestamp, slot = latest
+            last_seq = seq
+            np.copyto(frame, slot)
+            if not ring.is_valid(seq):
+                continue  # слот перезаписан во время копирования — кадр разорван
+            started = time.monotonic()
+            gaze, face_center = tracker.get_gaze_point(frame, timestamp)
+            if scheduler is not None:
+                if tracker.last_ran_model:
+                    scheduler.started(started)
+                    scheduler.record_duration(time.monotonic() - started)
+                scheduler.observe(gaze if gaze and face_center else None, timestamp)
+            gx, gy = gaze if gaze else (np.nan, np.nan)
+            fx, fy = face_center if face_center else (np.nan, np.nan)
+            # Раскрытие глаз нужно онлайн-калибровке, чтобы отбрасывать образцы во время моргания
+            features = tracker.last_features if gaze else None
+            openness = float(features.eye_openness[0]) if features is not None else np.nan
+            results.push((seq, timestamp, gx, gy, fx, fy, openness))
+    except Exception as e:
+        print(f"❌ Ошибка процесса инференса: {e}")
+        raise
+    finally:
+        # Без инференса результатов не будет — останавливаем захват и главный цикл
+        stop_event.set()
+        if tracker is not None:
+            tracker.close()
+        results.close()
+        ring.close()
+
+
+class MultiprocessPipeline:
+    """Захват и инференс в дочерних процессах; poll() в главном процессе отдаёт готовые результаты.
+
+    Результат — (seq, timestamp, gaze, face_center, eye_openness); при отсутствии лица все три равны None.
+    С adaptive=True частоту инференса задаёт core.scheduler.InferenceScheduler.
+    """
+
+    def __init__(self, device_id=0, frame_shape=None, slots=PIPELINE_RING_SLOTS,
+                 result_capacity=PIPELINE_RESULT_CAPACITY, tracker_kwargs=None, poll_interval=0.001, adaptive=False):
+        if frame_shape is None:
+            frame_shape = self._probe_frame_shape(device_id)
+        self.frame_shape = tuple(frame_shape)
+        self.frames = SharedFrameRing(self.frame_shape, slots=slots)
+        self.results = SharedResultRing(result_capacity)
+        self.poll_interval = poll_interval
+        tracker_kwargs = dict(tracker_kwargs or {})
+        # Синхронный трекинг: LIVE_STREAM в процессе инференса не нужен
+        if tracker_kwargs.get("running_mode", "VIDEO").upper() == "LIVE_STREAM":
+            tracker_kwargs["running_mode"] = "VIDEO"
+
+        ctx = mp.get_context("spawn")
+        self.stop_event = ctx.Event()
+        self._processes = [
+            ctx.Process(target=_capture_worker, name="gz-capture", daemon=True,
+                        args=(self.frames.name, self.frame_shape, slots, device_id, self.stop_event)),
+            ctx.Process(target=_inference_worker, name="gz-inference", daemon=True,
+                        args=(self.frames.name, self.results.name, self.frame_shape, slots, result_capacity,
+                              tracker_kwargs, self.stop_event, poll_interval, adaptive)),
+        ]
+        self.results_received = 0
+        self._frames_captured = 0
+
+    @staticmethod
+    def _probe_frame_shape(device_id):
+        import cv2
+        from utils.camera import configure_capture
+
+        # Размер кадра — с теми же параметрами захвата, что и в процессе захвата
+        cap = cv2.VideoCapture(device_id)
+        configure_capture(cap)
+        ret, frame = cap.read()
+        cap.release()
+        if not ret:
+            raise RuntimeError(f"Не удалось открыть камеру с ID {device_id}.")
+        return frame.shape
+
+    def start(self):
+        for process in self._processes:
+            process.start()
+
+    @property
+    def running(self):
+        return not self.stop_event.is_set()
+
+    @property
+    def frames_captured(self):
+        return self._frames_captured if self.frames is None else self.frames.published
+
+    def poll(self, timeout=None):
+        """Возвращает список новых результатов; ждёт не дольше timeout секунд, если их ещё нет."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            records = self.results.pop_all()
+            if records or not self.running or (deadline is not None and time.monotonic() >= deadline):
+                break
+            time.sleep(self.poll_interval)
+        out = []
+        for seq, timestamp, gx, gy, fx, fy, openness in records:
+            gaze = None if np.isnan(gx) else (gx, gy)
+            face_center = None if np.isnan(fx) else (fx, fy)
+            out.append((int(seq), timestamp, gaze, face_center, None if np.isnan(openness) else openness))
+        self.results_received += len(out)
+        return out
+
+    def latest_frame(self):
+        """Копия последнего опубликованного кадра (для отладочного окна) или None."""
+        latest = self.frames.read_latest(0)
+        if latest is None:
+            return None
+        seq, _, view = latest
+        frame = view.copy()
+        return frame if self.frames.is_valid(seq) else None
+
+    def stop(self):
+        self.stop_event.set()
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self._frames_captured = self.frames.published
+        self.results.close()
+        self.frames.close()
+        self.frames = None
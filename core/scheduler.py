@@ -0,0 +1,107 @@
+# core/scheduler.py
+#
+# Планировщик инференса: частота запуска FaceLandmarker зависит от состояния трекера.
+#   active   — взгляд движется или лицо только что найдено: инференс на каждом кадре (до INFERENCE_MAX_FPS)
+#   fixation — взгляд устойчиво держится в одной точке: частота снижается до INFERENCE_FIXATION_FPS
+#   idle     — лица нет дольше INFERENCE_IDLE_TIMEOUT: редкие пробы с частотой INFERENCE_IDLE_FPS
+# Первая же саккада или вновь найденное лицо возвращают active. Бюджет INFERENCE_TARGET_CPU_PERCENT
+# ограничивает долю времени, которую инференс занимает на одном ядре, в любом состоянии.
+# В режиме LIVE_STREAM observe и record_duration вызываются из потока колбэка FaceLandmarker
+# одновременно с wait() в цикле захвата — состояние планировщика защищено блокировкой.
+
+import threading
+import time
+
+from config.settings import (
+    INFERENCE_MAX_FPS, INFERENCE_TARGET_CPU_PERCENT, INFERENCE_FIXATION_FPS, INFERENCE_IDLE_FPS,
+    INFERENCE_IDLE_TIMEOUT, FIXATION_MIN_DURATION, FIXATION_MAX_DISPERSION
+)
+from core.fixation import FixationDetector
+from utils.metrics import NULL_METRICS
+
+ACTIVE = "active"
+FIXATION = "fixation"
+IDLE = "idle"
+
+
+class InferenceScheduler:
+    def __init__(self, max_fps=INFERENCE_MAX_FPS, fixation_fps=INFERENCE_FIXATION_FPS, idle_fps=INFERENCE_IDLE_FPS,
+                 idle_timeout=INFERENCE_IDLE_TIMEOUT, fixation_time=FIXATION_MIN_DURATION,
+                 max_dispersion=FIXATION_MAX_DISPERSION, target_cpu_percent=INFERENCE_TARGET_CPU_PERCENT,
+                 metrics=None):
+        self.intervals = {
+            ACTIVE: 1.0 / max_fps if max_fps else 0.0,
+            FIXATION: 1.0 / fixation_fps,
+            IDLE: 1.0 / idle_fps,
+        }
+        self.idle_timeout = idle_timeout
+        self.fixation = FixationDetector(fixation_time, max_dispersion)
+        self.cpu_fraction = target_cpu_percent / 100.0 if target_cpu_percent else None
+        self.metrics = metrics or NULL_METRICS
+
+        self._lock = threading.RLock()
+        self.state = ACTIVE
+        self.inference_time = 0.0  # скользящее среднее длительности одного инференса
+        self._last_start = None
+        self._last_face_time = None
+
+    @property
+    def interval(self):
+        """Минимальный промежуток между запусками инференса в текущем состоянии, с учётом бюджета CPU."""
+        with self._lock:
+            interval = self.intervals[self.state]
+            if self.cpu_fraction is not None:
+                interval = max(interval, self.inference_time / self.cpu_fraction)
+            return interval
+
+    def delay(self, now=None):
+        """Сколько секунд осталось до следующего инференса (0 — можно запускать сейчас)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._last_start is None:
+                return 0.0
+            return max(0.0, self._last_start + self.interval - now)
+
+    def wait(self):
+        # Спим до следующего запуска; кадр после этого берётся самый свежий, поэтому задержка не растёт
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+        self.started()
+
+    def started(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._last_start = now
+            state = self.state
+        self.metrics.inc(f"inference_{state}")
+
+    def record_duration(self, duration):
+        # Длительность одного инференса; в LIVE_STREAM — от отправки кадра до колбэка с результатом
+        with self._lock:
+            self.inference_time = (duration if self.inference_time == 0.0
+                                   else 0.8 * self.inference_time + 0.2 * duration)
+
+    def observe(self, gaze, timestamp=None):
+        """Результат инференса: gaze — (gx, gy) или None, если лица нет. Возвращает новое состояние."""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self._lock:
+            return self._observe(gaze, timestamp)
+
+    def _observe(self, gaze, timestamp):
+        if gaze is None:
+            self.fixation.reset()
+            if self._last_face_time is None:
+                self._last_face_time = timestamp  # лица не было с запуска — отсчёт от первого кадра
+            if timestamp - self._last_face_time >= self.idle_timeout:
+                return self._set_state(IDLE)
+            return self.state
+
+        self._last_face_time = timestamp
+        return self._set_state(FIXATION if self.fixation.update(gaze, timestamp) else ACTIVE)
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.metrics.inc(f"scheduler_to_{state}")
+        return state
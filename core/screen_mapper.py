@@ -3,19 +3,42 @@
 import json
 import os
 import numpy as np
-from sklearn.linear_model import LinearRegression
+from calibration.profiles import CalibrationProfile, calibration_settings
+from config.settings import MAPPING_MODEL
+from core.mapping_models import fit_model
+from utils.metrics import NULL_METRICS
 from utils.screen import get_screen_size
 
 class ScreenMapper:
-    def __init__(self, calibration_file="calibration/calibration_data.json", screen_w=None, screen_h=None):
+    def __init__(self, calibration_file="calibration/calibration_data.json", screen_w=None, screen_h=None,
+                 model_type=MAPPING_MODEL, metrics=None, profile_store=None, profile_key=None):
+        # С profile_store калибровка берётся из профиля для profile_key (calibration.profiles);
+        # calibration_file — прежний JSON, читается, только пока в хранилище нет ни одного профиля
         self.calibration_file = calibration_file
+        self.profile_store = profile_store
+        self.profile_key = profile_key
+        self.metrics = metrics or NULL_METRICS
         self.screen_w = screen_w or get_screen_size()[0]
         self.screen_h = screen_h or get_screen_size()[1]
-        self.model_x = None
-        self.model_y = None
+        self.model_type = model_type
+        # Параметры активной конфигурации: профиль, снятый при других, не используется
+        self.calibration_settings = calibration_settings(model_type)
+        self.model = None  # модель из core.mapping_models с заранее вычисленными коэффициентами
+        self.gaze_coords = None  # точки взгляда исходной калибровки (начальная уверенность онлайн-калибровки)
+        self.screen_coords = None
         self.load_calibration()
 
+    @property
+    def is_calibrated(self):
+        return self.model is not None
+
     def load_calibration(self):
+        if self.profile_store is not None:
+            if self._load_profile():
+                return
+            if self.profile_store.profiles():
+                return  # профили есть, но не для этого пользователя и экрана или сняты при других параметрах
+
         if not os.path.exists(self.calibration_file):
             return
 
@@ -39,12 +62,72 @@ class ScreenMapper:
                 if screen_coords.ndim == 1:
                     screen_coords = screen_coords.reshape(-1, 2)
 
-                self.model_x = LinearRegression().fit(gaze_coords[:, 0].reshape(-1, 1), screen_coords[:, 0])
-                self.model_y = LinearRegression().fit(gaze_coords[:, 1].reshape(-1, 1), screen_coords[:, 1])
+                self.model = fit_model(self.model_type, gaze_coords, screen_coords)
+                self.gaze_coords = gaze_coords
+                self.screen_coords = screen_coords
         except Exception as e:
             print(f"⚠️ Ошибка загрузки калибровки: {e}")
+            return
+
+        if self.profile_store is not None:
+            path = self.save_profile()
+            print(f"Калибровка {self.calibration_file} перенесена в профиль {path}")
+
+    def _load_profile(self):
+        try:
+            profile = self.profile_store.find(self.profile_key)
+            if profile is None:
+                return False
+            if profile.settings is not None and profile.settings != self.calibration_settings:
+                changed = ", ".join(f"{name} {old} → {new}" for name, old, new in
+                                    zip(profile.settings._fields, profile.settings, self.calibration_settings)
+                                    if old != new)
+                print(f"⚠️ Профиль калибровки снят при других параметрах ({changed}) — нужна повторная калибровка.")
+                return False
+            self.model = self._profile_model(profile)
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки профиля калибровки: {e}")
+            return False
+        self.gaze_coords = profile.gaze_coords
+        self.screen_coords = profile.screen_coords
+        if profile.key != self.profile_key:
+            print(f"Используется профиль калибровки камеры {profile.key.camera_id}")
+        return True
+
+    def _profile_model(self, profile):
+        # Профиль снят под model_type: берём сохранённую модель как есть — это может быть запасная linear,
+        # если для model_type не хватило точек (save_calibration), и заново её не подбираем
+        if profile.settings is not None:
+            return profile.model()
+        # Профиль версии 1: модель подбирается под model_type, при нехватке точек — сохранённая
+        try:
+            return profile.model(self.model_type)
+        except ValueError as e:
+            print(f"⚠️ {e} Используется сохранённая модель {profile.model_name}.")
+            return profile.model()
+
+    def save_profile(self):
+        """Сохраняет текущую модель (в том числе уточнённую онлайн) в профиль для profile_key."""
+        empty = np.zeros((0, 2))
+        profile = CalibrationProfile(self.profile_key, self.model.name, self.model.params,
+                                     empty if self.gaze_coords is None else self.gaze_coords,
+                                     empty if self.screen_coords is None else self.screen_coords,
+                                     settings=self.calibration_settings)
+        return self.profile_store.save(profile)
 
     def save_calibration(self, gaze_coords, screen_coords):
+        if self.profile_store is not None:
+            try:
+                profile = CalibrationProfile.fit(self.profile_key, self.model_type, gaze_coords, screen_coords,
+                                                 settings=self.calibration_settings)
+            except ValueError as e:
+                # Например, для poly2 не хватило точек — сохраняем линейную модель, образцы остаются в профиле
+                print(f"⚠️ {e} Профиль сохранён с моделью linear.")
+                profile = CalibrationProfile.fit(self.profile_key, "linear", gaze_coords, screen_coords,
+                                                 settings=self.calibration_settings)
+            self.profile_store.save(profile)
+            return
+
         os.makedirs(os.path.dirname(self.calibration_file), exist_ok=True)
         data = {
             "gaze_coords": gaze_coords.tolist(),
@@ -54,16 +137,38 @@ class ScreenMapper:
             json.dump(data, f, indent=2)
 
     def map_to_screen(self, gaze_x, gaze_y):
+        with self.metrics.timer("map"):
+            return self._map_to_screen(gaze_x, gaze_y)
+
+    def _map_to_screen(self, gaze_x, gaze_y):
         if not (0.0 < gaze_x < 1.0 and 0.0 < gaze_y < 1.0):
             return self.screen_w // 2, self.screen_h // 2
 
-        if self.model_x is not None and self.model_y is not None:
-            screen_x = int(self.model_x.predict([[gaze_x]])[0])
-            screen_y = int(self.model_y.predict([[gaze_y]])[0])
+        if self.model is not None:
+            mapped = self.model.map(gaze_x, gaze_y)
+            if mapped is None:
+                # Модель не определена в этой точке (гомография за линией горизонта)
+                return self.screen_w // 2, self.screen_h // 2
+            screen_x, screen_y = int(mapped[0]), int(mapped[1])
         else:
             screen_x = int(gaze_x * self.screen_w)
             screen_y = int(gaze_y * self.screen_h)
 
         screen_x = max(0, min(screen_x, self.screen_w - 1))
         screen_y = max(0, min(screen_y, self.screen_h - 1))
-        return screen_x, screen_y
\ No newline at end of file
+        return screen_x, screen_y
+
+    def map_many(self, gaze_array):
+        # Векторный вариант map_to_screen для массива (N, 2): повтор сессий и офлайн-оценка
+        gaze = np.asarray(gaze_array, dtype=np.float64).reshape(-1, 2)
+        if self.model is not None:
+            screen = self.model.map_many(gaze)
+        else:
+            screen = gaze * (self.screen_w, self.screen_h)
+
+        screen = np.trunc(screen)
+        valid = np.all((gaze > 0.0) & (gaze < 1.0), axis=1) & np.isfinite(screen).all(axis=1)
+        screen[~valid] = (self.screen_w // 2, self.screen_h // 2)
+        np.clip(screen[:, 0], 0, self.screen_w - 1, out=screen[:, 0])
+        np.clip(screen[:, 1], 0, self.screen_h - 1, out=screen[:, 1])
+        return screen.astype(np.int64)
@@ -1,57 +1,373 @@
 # main.py
+#
+# Запуск разбит на этап сборки (GazeControlApp) и цикл. MediaPipe и OpenCV импортируются по
+# требованию: FaceLandmarker импортируется, создаётся и прогревается в фоновом потоке, пока
+# ищется профиль калибровки, открывается камера и создаётся бэкенд курсора.
 
-import cv2
-from config.settings import DWELL_TIME, CAMERA_DEVICE_ID
-from core.gaze_tracker import GazeTracker
+import argparse
+import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config.settings import (
+    DWELL_TIME, CAMERA_DEVICE_ID, CAMERA_THREADED, CAMERA_MIRROR, LANDMARKER_RUNNING_MODE,
+    LANDMARKER_OUTPUT_BLENDSHAPES, LANDMARKER_OUTPUT_TRANSFORMATION_MATRIXES, ROI_INFERENCE, OPTICAL_FLOW, PIPELINE_MODE,
+    ONLINE_CALIBRATION, ONLINE_CALIBRATION_CORRECT_KEY, INFERENCE_SCHEDULER, EVENT_LOG_PATH, HEADLESS,
+    METRICS_ENABLED, METRICS_JSONL_PATH, METRICS_JSONL_INTERVAL, METRICS_HTTP_PORT
+)
+from core.cursor_output import NullBackend
+from core.events import EventLogger, GazeEventBus
 from core.mouse_controller import MouseController
+from core.scheduler import InferenceScheduler
 from core.screen_mapper import ScreenMapper
-from utils.camera import Camera
-from utils.screen import get_screen_size
-from calibration.calibrator import Calibrator
+from utils.metrics import Metrics, NULL_METRICS, JsonLinesExporter, PrometheusExporter
+from calibration.online import OnlineCalibrator
+from calibration.profiles import ProfileKey, ProfileStore, current_user
 
-def main():
-    print("Запуск Gaze Control...")
-    screen_w, screen_h = get_screen_size()
-    print(f"Обнаружен экран: {screen_w}x{screen_h}")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gaze Control — управление курсором взглядом")
+    parser.add_argument("--record", metavar="DIR", help="Записать сессию (кадры, метки времени, landmark'и) в каталог")
+    parser.add_argument("--record-codec", choices=("raw", "mjpeg"), default="raw", help="Формат записи кадров")
+    parser.add_argument("--replay", metavar="DIR", help="Воспроизвести записанную сессию вместо камеры")
+    parser.add_argument("--realtime", action="store_true", help="Воспроизводить с исходной скоростью, а не максимально быстро")
+    parser.add_argument("--dry-run", action="store_true", help="Не двигать системный курсор (заглушка мыши)")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS,
+                        help="Без отладочного окна; выход по SIGINT/SIGTERM")
+    return parser.parse_args(argv)
+
+def create_tracker(tracker_kwargs, metrics):
+    # Выполняется в фоновом потоке: импорт MediaPipe, создание FaceLandmarker и пробный инференс
+    from core.gaze_tracker import GazeTracker
+    gaze_tracker = GazeTracker(metrics=metrics, **tracker_kwargs)
+    gaze_tracker.warm_up()
+    return gaze_tracker
+
+def open_camera(args, metrics):
+    if args.replay:
+        from utils.recording import ReplayCamera
+        camera = ReplayCamera(args.replay, realtime=args.realtime)
+        print(f"Воспроизведение сессии {args.replay}: {camera.session.frame_count} кадров")
+        return camera
+    from utils.camera import Camera
+    return Camera(device_id=CAMERA_DEVICE_ID, threaded=CAMERA_THREADED, metrics=metrics)
+
+class GazeControlApp:
+    """Собирает компоненты; parallel=False выполняет этапы запуска по очереди (для сравнения в бенчмарке)."""
+
+    def __init__(self, args, screen_size=None, mouse_backend=None, camera_factory=open_camera, profile_store=None,
+                 parallel=True):
+        self.args = args
+        self.startup_time = time.monotonic()
+        self.first_move_time = None
+        self.stop_requested = threading.Event()  # выставляется клавишей 'q', SIGINT или SIGTERM
+        self.overlay = None
+        self.last_capture_time = None  # метка последнего кадра с лицом — время для образцов коррекции
+        self.camera = None
+        self.gaze_tracker = None
+        self.pipeline = None
+        self.live_stream = False
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") if parallel else None
+
+        self.tracker_kwargs = dict(
+            running_mode=LANDMARKER_RUNNING_MODE,
+            output_blendshapes=LANDMARKER_OUTPUT_BLENDSHAPES,
+            output_transformation_matrixes=LANDMARKER_OUTPUT_TRANSFORMATION_MATRIXES,
+            roi_inference=ROI_INFERENCE,
+            optical_flow=OPTICAL_FLOW,
+            mirror=CAMERA_MIRROR,
+        )
+        self.multiprocess = PIPELINE_MODE == "multiprocess"
+        if self.multiprocess and (args.replay or args.record):
+            print("⚠️ Запись и воспроизведение работают только в однопроцессном режиме.")
+            self.multiprocess = False
+
+        self.metrics = Metrics() if METRICS_ENABLED else NULL_METRICS
+        # Самый долгий этап — импорт MediaPipe и создание модели — запускаем первым
+        tracker_future = None
+        if not self.multiprocess:
+            tracker_future = self._submit(create_tracker, self.tracker_kwargs, self.metrics)
+
+        if screen_size is None:
+            from utils.screen import get_screen_size
+            screen_size = get_screen_size()
+        screen_w, screen_h = screen_size
+        print(f"Обнаружен экран: {screen_w}x{screen_h}")
+
+        self.exporters = []
+        if METRICS_ENABLED and METRICS_JSONL_PATH:
+            self.exporters.append(JsonLinesExporter(self.metrics, METRICS_JSONL_PATH, METRICS_JSONL_INTERVAL))
+        if METRICS_ENABLED and METRICS_HTTP_PORT:
+            self.exporters.append(PrometheusExporter(self.metrics, METRICS_HTTP_PORT))
+            print(f"Метрики: http://127.0.0.1:{METRICS_HTTP_PORT}/metrics")
+
+        # Запись открывается до калибровки: кадры калибровки попадают в сессию с точками калибровки как целями
+        self.recorder = None
+        if args.record:
+            from utils.recording import SessionRecorder
+            self.recorder = SessionRecorder(args.record, codec=args.record_codec, screen_size=(screen_w, screen_h))
+
+        profile_key = ProfileKey(current_user(), CAMERA_DEVICE_ID, screen_w, screen_h)
+        self.mapper = ScreenMapper(screen_w=screen_w, screen_h=screen_h, metrics=self.metrics,
+                                   profile_store=profile_store or ProfileStore(), profile_key=profile_key)
+        if not self.mapper.is_calibrated:
+            print(f"Калибровка для {profile_key.user} ({screen_w}x{screen_h}, камера {CAMERA_DEVICE_ID}) "
+                  "не найдена или повреждена. Запускаю калибровку...")
+            from calibration.calibrator import Calibrator
+            calibrator = Calibrator(mapper=self.mapper, recorder=self.recorder)
+            calibrator.start()
+            self.mapper.load_calibration()
+
+        # Камера открывается после калибровки: калибратор сам занимает устройство
+        camera_future = None
+        if not self.multiprocess:
+            camera_future = self._submit(camera_factory, args, self.metrics)
+
+        if mouse_backend is None and args.dry_run:
+            mouse_backend = NullBackend()
+        self.mouse_controller = MouseController(dwell_time=DWELL_TIME, backend=mouse_backend, metrics=self.metrics)
+
+        self.online = None
+        if ONLINE_CALIBRATION:
+            try:
+                self.online = OnlineCalibrator(self.mapper, metrics=self.metrics)
+            except ValueError as e:
+                print(f"⚠️ Онлайн-калибровка отключена: {e}")
+
+        # Результаты инференса расходятся подписчикам шины (журнал, оверлей, внешние приложения)
+        self.events = GazeEventBus(metrics=self.metrics)
+        self.event_logger = EventLogger(self.events, EVENT_LOG_PATH) if EVENT_LOG_PATH else None
+
+        # Частота инференса по состоянию трекера; записанную сессию прогоняем целиком, без прореживания
+        self.scheduler = None
+        if INFERENCE_SCHEDULER and not self.multiprocess and not args.replay:
+            self.scheduler = InferenceScheduler(metrics=self.metrics)
 
-    mapper = ScreenMapper(screen_w=screen_w, screen_h=screen_h)
-    if mapper.model_x is None or mapper.model_y is None:
-        print("Калибровка не найдена или повреждена. Запускаю калибровку...")
-        calibrator = Calibrator()
-        calibrator.start()
-        mapper.load_calibration()
+        if self.multiprocess:
+            from core.pipeline import MultiprocessPipeline
+            self.pipeline = MultiprocessPipeline(CAMERA_DEVICE_ID, tracker_kwargs=self.tracker_kwargs,
+                                                 adaptive=INFERENCE_SCHEDULER)
+        else:
+            self.camera = camera_future.result()
+            self.gaze_tracker = tracker_future.result()
+            # В режиме LIVE_STREAM курсором управляет колбэк FaceLandmarker; подключаем его,
+            # когда всё готово, — результат прогрева уходит в никуда
+            self.live_stream = self.gaze_tracker.running_mode == "LIVE_STREAM"
+            if self.live_stream:
+                self.gaze_tracker.result_callback = self.on_live_result
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        print(f"Запуск занял {time.monotonic() - self.startup_time:.2f} с")
 
-    camera = Camera(device_id=CAMERA_DEVICE_ID)
-    gaze_tracker = GazeTracker()
-    mouse_controller = MouseController(dwell_time=DWELL_TIME)
+    def _submit(self, fn, *args):
+        if self._executor is not None:
+            return self._executor.submit(fn, *args)
+        future = Future()
+        future.set_result(fn(*args))
+        return future
 
-    print("Управление активно. Нажмите 'q' для выхода.")
+    def on_gaze(self, gaze, face_center, capture_time=None, eye_openness=None):
+        self.metrics.mark_frame()
+        if self.scheduler is not None:
+            self.scheduler.observe(gaze if gaze and face_center else None, capture_time)
+        timestamp = time.monotonic() if capture_time is None else capture_time
+        if not (gaze and face_center):
+            self.events.publish_sample(timestamp, None, None)
+            return
+        gx, gy = gaze
+        self.last_capture_time = capture_time
+        if self.online is not None:
+            self.online.observe(gx, gy, capture_time, eye_openness)
+        screen_x, screen_y = self.mapper.map_to_screen(gx, gy)
+        self.mouse_controller.update_cursor(screen_x, screen_y, capture_time)
+        self.events.publish_sample(timestamp, (gx, gy), face_center, (screen_x, screen_y))
+        # Клик фиксацией в онлайн-калибровку не идёт: позиция курсора — прогноз самой модели (с задержкой
+        # фильтра), и такой образец только закреплял бы её смещение. Образцы — только из независимых
+        # источников: коррекция физической мышью (on_key) или элементы интерфейса (add_known_target)
+        self.mouse_controller.handle_dwell_click(gx, gy)
+        # Метки записанной сессии не связаны с текущим временем — задержку меряем только вживую
+        if capture_time is not None and not self.args.replay:
+            self.metrics.observe("frame_to_cursor", time.monotonic() - capture_time)
+        if self.first_move_time is None and self.mouse_controller.last_position is not None:
+            self.first_move_time = time.monotonic()
+            startup = self.first_move_time - self.startup_time
+            self.metrics.set_gauge("startup_to_first_move_seconds", startup)
+            print(f"Первое перемещение курсора через {startup:.2f} с после запуска")
 
-    while True:
-        frame = camera.get_frame()
+    def on_live_result(self, gaze, face_center, timestamp_ms, eye_openness):
+        # Колбэк LIVE_STREAM (поток FaceLandmarker): длительность инференса — от отправки кадра до результата
+        if self.scheduler is not None and self.gaze_tracker.last_inference_time is not None:
+            self.scheduler.record_duration(self.gaze_tracker.last_inference_time)
+        self.on_gaze(gaze, face_center, timestamp_ms / 1000.0, eye_openness)
+
+    def on_key(self, key):
+        # Коррекция: первое нажатие останавливает курсор, пользователь ставит физическую мышь туда,
+        # куда смотрит, второе нажатие добавляет образец и возвращает управление взгляду
+        online, mouse_controller = self.online, self.mouse_controller
+        if online is None or key != ord(ONLINE_CALIBRATION_CORRECT_KEY):
+            return
+        if not mouse_controller.paused:
+            mouse_controller.paused = True
+            print("🎯 Коррекция: наведите мышь на точку, куда смотрите, и нажмите клавишу ещё раз.")
+            return
+        position = mouse_controller.backend.position()
+        mouse_controller.paused = False
+        if position is None:
+            print("⚠️ Бэкенд курсора не сообщает позицию указателя — коррекция невозможна.")
+        elif self.add_known_target(*position, self.last_capture_time):
+            print(f"✅ Калибровка уточнена по точке {position}")
+        else:
+            print(f"⚠️ Образец коррекции отброшен: {online.last_rejection}")
+
+    def add_known_target(self, screen_x, screen_y, timestamp=None):
+        """Точка экрана с известным положением (элемент интерфейса, коррекция мышью), на которую
+        пользователь смотрел к моменту timestamp. Возвращает True, если онлайн-калибровка приняла образец."""
+        if self.online is None:
+            return False
+        return self.online.add_target(screen_x, screen_y, timestamp)
+
+    def step(self):
+        """Один кадр однопроцессного цикла; возвращает (frame, face_center) или (None, None) в конце потока."""
+        # Планировщик прореживает только запуски модели: кадры оптического потока дешёвые и идут
+        # с частотой камеры
+        if self.scheduler is not None and self.gaze_tracker.will_run_model():
+            self.scheduler.wait()
+        frame, _, timestamp = self.camera.read_latest()
         if frame is None:
-            break
-
-        gaze, face_center = gaze_tracker.get_gaze_point(frame)
-        if gaze and face_center:
-            gx, gy = gaze
-            fcx, fcy = face_center  # координаты центра лица
-            screen_x, screen_y = mapper.map_to_screen(gx, gy)
-            mouse_controller.update_cursor(screen_x, screen_y)
-            mouse_controller.handle_dwell_click(gx, gy)
-
-            # Отладка: точка в центре лица (зеленая)
-            h, w = frame.shape[:2]
-            cv2.circle(frame, (int(fcx * w), int(fcy * h)), 3, (0, 255, 0), -1)
-
-        cv2.imshow("Gaze Control — нажмите 'q'", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    gaze_tracker.close()
-    camera.release()
-    cv2.destroyAllWindows()
+            return None, None
+
+        started = time.monotonic()
+        gaze, face_center = self.gaze_tracker.get_gaze_point(frame, timestamp)
+        # В LIVE_STREAM вызов лишь ставит кадр в очередь: длительность и результат приходят в on_live_result
+        if not self.live_stream:
+            if self.scheduler is not None and self.gaze_tracker.last_ran_model:
+                self.scheduler.record_duration(time.monotonic() - started)
+            features = self.gaze_tracker.last_features
+            self.on_gaze(gaze, face_center, timestamp,
+                         float(features.eye_openness[0]) if features is not None else None)
+        if self.recorder is not None:
+            # Записываем кадр до отрисовки отладочной информации. В LIVE_STREAM результата для этого кадра
+            # ещё нет, а last_landmarks — от более раннего: пишем NaN, чтобы не сдвинуть landmark'и относительно кадров
+            landmarks = None if self.live_stream else self.gaze_tracker.last_landmarks
+            self.recorder.write(frame, timestamp, landmarks)
+        return frame, face_center if gaze else None
+
+    def request_stop(self, signum=None, frame=None):
+        self.stop_requested.set()
+
+    def _install_signal_handlers(self):
+        # Обработчики ставятся только из главного потока; возвращаются прежние, чтобы их восстановить
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        return {signum: signal.signal(signum, self.request_stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+
+    def run(self):
+        previous_handlers = self._install_signal_handlers()
+        try:
+            if self.args.headless:
+                self._run_loop()
+                return
+            # HighGUI работает только из главного потока (Cocoa, Qt): главный поток рисует окно с частотой
+            # DEBUG_OVERLAY_HZ, цикл взгляда уходит в рабочий поток и HighGUI не вызывает
+            from utils.visual_feedback import DebugOverlay
+            self.overlay = DebugOverlay(self.events)
+            errors = []
+            worker = threading.Thread(target=self._run_loop_worker, args=(errors,), name="gaze-loop", daemon=True)
+            worker.start()
+            while worker.is_alive():
+                self.overlay.render()
+            worker.join()
+            if errors:
+                raise errors[0]
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def _run_loop(self):
+        if self.multiprocess:
+            self._run_multiprocess()
+        else:
+            self._run_single()
+
+    def _run_loop_worker(self, errors):
+        # Исключение цикла пробрасывается в главный поток после остановки окна
+        try:
+            self._run_loop()
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            self.stop_requested.set()
+
+    def _exit_hint(self):
+        return "Ctrl+C для выхода." if self.overlay is None else "Нажмите 'q' в окне отладки или Ctrl+C для выхода."
+
+    def _service_overlay(self, frame=None):
+        if self.overlay is None:
+            return
+        if frame is not None:
+            self.overlay.submit_frame(frame)
+        for key in self.overlay.keys():
+            if key == ord('q'):
+                self.request_stop()
+            else:
+                self.on_key(key)
+
+    def _run_single(self):
+        print(f"Управление активно. {self._exit_hint()}")
+        while not self.stop_requested.is_set():
+            frame, _ = self.step()
+            if frame is None:
+                break
+            self._service_overlay(frame)
+
+    def _run_multiprocess(self):
+        # Главный процесс только отображает взгляд на экран и двигает курсор; захват и инференс — в дочерних
+        pipeline = self.pipeline
+        pipeline.start()
+        print(f"Управление активно (многопроцессный режим). {self._exit_hint()}")
+        while pipeline.running and not self.stop_requested.is_set():
+            results = pipeline.poll(timeout=0.05)
+            for _, timestamp, gaze, face_center, eye_openness in results:
+                self.on_gaze(gaze, face_center, timestamp, eye_openness)
+            # Копия кадра из разделяемой памяти снимается, только когда окно готово его показать
+            frame = pipeline.latest_frame() if self.overlay is not None and self.overlay.wants_frame() else None
+            self._service_overlay(frame)
+
+    def close(self):
+        if self.overlay is not None:
+            self.overlay.close()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            print(f"Кадров захвачено: {self.pipeline.frames_captured}, обработано: {self.pipeline.results_received}")
+        if self.gaze_tracker is not None:
+            self.gaze_tracker.close()
+        if self.camera is not None:
+            self.camera.release()
+            print(f"Кадров захвачено: {self.camera.frames_captured}, пропущено: {self.camera.frames_dropped}")
+        self.mouse_controller.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Сессия записана: {self.args.record} ({self.recorder.frame_count} кадров)")
+        if self.event_logger is not None:
+            self.event_logger.close()
+        self.events.close()
+        for exporter in self.exporters:
+            exporter.close()
+        # Уточнения за сессию сохраняются в профиль и подхватываются при следующем запуске
+        if self.online is not None:
+            print(f"Онлайн-калибровка: принято {self.online.samples_accepted}, отброшено {self.online.samples_rejected}")
+            if self.online.samples_accepted:
+                print(f"Профиль калибровки обновлён: {self.mapper.save_profile()}")
+
+def main():
+    args = parse_args()
+    print("Запуск Gaze Control...")
+    app = GazeControlApp(args)
+    try:
+        app.run()
+    finally:
+        app.close()
     print("Выход.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
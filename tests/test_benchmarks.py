@@ -0,0 +1,35 @@
+import unittest
+from benchmarks.bench_pipeline import STAGES, compare_reports, run_benchmark
+from benchmarks import bench_startup
+
+
+class TestPipelineBenchmark(unittest.TestCase):
+    def test_run_benchmark_reports_every_stage(self):
+        """Тест: бенчмарк работает без камеры и дисплея и выдаёт перцентили по всем этапам"""
+        report = run_benchmark(frames=5, width=64, height=48)
+        self.assertEqual(set(report["stages"]), set(STAGES))
+        for stats in report["stages"].values():
+            self.assertEqual(stats["count"], 5)
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+        self.assertEqual(report["end_to_end"]["count"], 5)
+
+    def test_compare_reports_flags_slower_stage(self):
+        """Тест: сравнение отчётов находит этап, p50 которого вырос сверх порога"""
+        baseline = {"stages": {"capture": {"count": 1, "p50_ms": 1.0}}, "end_to_end": {"count": 1, "p50_ms": 5.0}}
+        current = {"stages": {"capture": {"count": 1, "p50_ms": 1.5}}, "end_to_end": {"count": 1, "p50_ms": 5.1}}
+        regressions = compare_reports(current, baseline, threshold=0.2)
+        self.assertEqual([r["stage"] for r in regressions], ["capture"])
+
+
+class TestStartupBenchmark(unittest.TestCase):
+    def test_reports_first_move_for_both_modes(self):
+        """Тест: оба режима запуска доходят до первого перемещения курсора, сборка — раньше него"""
+        report = bench_startup.run_benchmark(repeats=1, camera_delay=0.0)
+        for mode in bench_startup.MODES:
+            stats = report["modes"][mode]
+            self.assertEqual(stats["first_move"]["count"], 1)
+            self.assertLessEqual(stats["build"]["p50_ms"], stats["first_move"]["p50_ms"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import threading
+import tracemalloc
+import unittest
+from unittest.mock import patch
+import numpy as np
+from utils.camera import Camera
+
+
+class FakeCapture:
+    """Имитация cv2.VideoCapture: отдаёт кадры с номером в первом пикселе; как и OpenCV, пишет в переданный буфер."""
+
+    def __init__(self, device_id, frame_count=50, shape=(4, 4, 3)):
+        self.frame_count = frame_count
+        self.shape = shape
+        self.properties = {}
+        self.index = 0
+        self.gate = threading.Semaphore(0)
+        self.blocking = False
+        self.released = threading.Event()
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        self.properties[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.properties.get(prop, 0)
+
+    def read(self, image=None):
+        if self.blocking:
+            self.gate.acquire()
+        if self.index >= self.frame_count:
+            return False, None
+        self.index += 1
+        frame = image if image is not None and image.shape == self.shape else np.empty(self.shape, dtype=np.uint8)
+        frame[0, 0, 0] = self.index
+        return True, frame
+
+    def release(self):
+        self.released.set()
+
+
+class TestCamera(unittest.TestCase):
+    def setUp(self):
+        self.capture = FakeCapture(0)
+        self.capture_patcher = patch('cv2.VideoCapture', return_value=self.capture)
+        self.capture_patcher.start()
+
+    def tearDown(self):
+        self.capture_patcher.stop()
+
+    def test_sync_read_returns_sequence_and_timestamp(self):
+        """Тест: синхронный режим нумерует кадры по порядку"""
+        camera = Camera(device_id=0)
+        frame, seq, timestamp = camera.read_latest()
+        self.assertEqual(seq, 1)
+        self.assertEqual(frame[0, 0, 0], 1)
+        self.assertIsNotNone(timestamp)
+        _, seq, _ = camera.read_latest()
+        self.assertEqual(seq, 2)
+        self.assertEqual(camera.frames_dropped, 0)
+        camera.release()
+
+    def test_threaded_returns_latest_frame_and_counts_drops(self):
+        """Тест: фоновый захват отдаёт только самый свежий кадр и считает пропущенные"""
+        self.capture.blocking = True
+        camera = Camera(device_id=0, threaded=True)
+        for _ in range(5):
+            self.capture.gate.release()
+        # Дожидаемся, пока поток захватит все пять кадров
+        with camera._cond:
+            camera._cond.wait_for(lambda: camera.frames_captured == 5, timeout=2.0)
+
+        frame, seq, timestamp = camera.read_latest(timeout=1.0)
+        self.assertEqual(seq, 5)
+        self.assertEqual(frame[0, 0, 0], 5)
+        self.assertEqual(camera.frames_dropped, 4)
+
+        # Новых кадров нет — по таймауту возвращается None
+        frame, _, _ = camera.read_latest(timeout=0.05)
+        self.assertIsNone(frame)
+
+        self.capture.frame_count = 0
+        self.capture.gate.release()
+        camera.release()
+
+    def test_threaded_returns_none_when_stream_ends(self):
+        """Тест: после окончания потока кадров get_frame возвращает None"""
+        self.capture.frame_count = 1
+        camera = Camera(device_id=0, threaded=True)
+        self.assertIsNotNone(camera.get_frame())
+        self.assertIsNone(camera.get_frame())
+        camera.release()
+
+    def test_release_waits_for_blocked_read(self):
+        """Тест: камера не освобождается, пока поток захвата заблокирован в read()"""
+        self.capture.blocking = True
+        camera = Camera(device_id=0, threaded=True)
+        camera.release(timeout=0.05)
+        self.assertFalse(self.capture.released.is_set())
+        # read() вернулся — поток выходит и освобождает камеру сам
+        self.capture.gate.release()
+        self.assertTrue(self.capture.released.wait(timeout=2.0))
+
+    def test_capture_parameters_are_requested(self):
+        """Тест: формат, разрешение, частота и размер очереди передаются драйверу"""
+        import cv2
+        camera = Camera(device_id=0, fourcc="MJPG", width=1280, height=720, fps=60, buffer_size=1)
+        props = self.capture.properties
+        self.assertEqual(props[cv2.CAP_PROP_FOURCC], cv2.VideoWriter_fourcc(*"MJPG"))
+        self.assertEqual((props[cv2.CAP_PROP_FRAME_WIDTH], props[cv2.CAP_PROP_FRAME_HEIGHT]), (1280, 720))
+        self.assertEqual(props[cv2.CAP_PROP_FPS], 60)
+        self.assertEqual(props[cv2.CAP_PROP_BUFFERSIZE], 1)
+        self.assertEqual((camera.width, camera.height), (1280, 720))
+        camera.release()
+
+    def test_sync_capture_does_not_allocate_per_frame(self):
+        """Тест: кадры читаются в один и тот же буфер — на кадр почти нет выделений памяти"""
+        self.capture.shape = (480, 640, 3)
+        self.capture.frame_count = 1000
+        camera = Camera(device_id=0)
+        first, _, _ = camera.read_latest()
+
+        tracemalloc.start()
+        try:
+            for _ in range(100):
+                frame, _, _ = camera.read_latest()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertIs(frame, first)
+        # Один новый кадр 640x480 — 900 КБ; на 100 кадров допускаем лишь мелкие служебные объекты
+        self.assertLess(peak, 64 * 1024)
+        camera.release()
+
+    def test_threaded_capture_reuses_buffers(self):
+        """Тест: фоновый захват пишет кадры по кругу в несколько заранее выделенных буферов"""
+        self.capture.blocking = True
+        camera = Camera(device_id=0, threaded=True)
+        seen = set()
+        for i in range(1, 11):
+            self.capture.gate.release()
+            frame, seq, _ = camera.read_latest(timeout=1.0)
+            self.assertEqual(frame[0, 0, 0], seq)
+            seen.add(id(frame))
+        self.assertLessEqual(len(seen), 3)
+
+        self.capture.frame_count = 0
+        self.capture.gate.release()
+        camera.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import threading
+import time
+import unittest
+from core.cursor_output import CursorOutput, NullBackend, RecordingBackend, create_backend
+
+
+class BlockingBackend(RecordingBackend):
+    """Бэкенд, который держит первое перемещение, пока тест не отпустит его."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.entered = threading.Event()
+        self.closed = threading.Event()
+
+    def move(self, x, y):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(timeout=2.0)
+        super().move(x, y)
+
+    def close(self):
+        self.closed.set()
+
+
+class TestCursorOutput(unittest.TestCase):
+    def test_moves_are_coalesced_while_backend_is_busy(self):
+        """Тест: пока бэкенд занят, из очереди выполняется только последняя цель"""
+        backend = BlockingBackend()
+        output = CursorOutput(backend, max_rate_hz=None)
+        output.move_to(1, 1)
+        self.assertTrue(backend.entered.wait(timeout=1.0))
+        for i in range(2, 10):
+            output.move_to(i, i)
+        backend.release.set()
+        self.assertTrue(output.flush())
+        output.close()
+
+        self.assertEqual(backend.moves, [(1, 1), (9, 9)])
+        self.assertEqual(output.moves_coalesced, 7)
+
+    def test_clicks_keep_order_relative_to_moves(self):
+        """Тест: клик выполняется после перемещений, поставленных до него, и до последующих"""
+        backend = BlockingBackend()
+        output = CursorOutput(backend, max_rate_hz=None)
+        output.move_to(0, 0)
+        self.assertTrue(backend.entered.wait(timeout=1.0))
+        output.move_to(10, 10)
+        output.move_to(20, 20)
+        output.click()
+        output.move_to(30, 30)
+        output.move_to(40, 40)
+        backend.release.set()
+        self.assertTrue(output.flush())
+        output.close()
+
+        self.assertEqual(backend.events, [("move", 0, 0), ("move", 20, 20), ("click",), ("move", 40, 40)])
+        self.assertEqual(backend.clicks, [(20, 20)])
+
+    def test_close_waits_for_busy_backend(self):
+        """Тест: бэкенд не закрывается, пока поток вывода выполняет в нём команду"""
+        backend = BlockingBackend()
+        output = CursorOutput(backend, max_rate_hz=None)
+        output.move_to(1, 1)
+        self.assertTrue(backend.entered.wait(timeout=1.0))
+        output.close(timeout=0.05)
+        self.assertFalse(backend.closed.is_set())
+        # Команда завершилась — поток выходит и закрывает бэкенд сам
+        backend.release.set()
+        self.assertTrue(backend.closed.wait(timeout=2.0))
+        self.assertEqual(backend.moves, [(1, 1)])
+
+    def test_move_rate_is_limited(self):
+        """Тест: перемещения выполняются не чаще max_rate_hz"""
+        backend = RecordingBackend()
+        output = CursorOutput(backend, max_rate_hz=20)
+        start = time.monotonic()
+        for i in range(40):
+            output.move_to(i, i)
+            time.sleep(0.005)
+        self.assertTrue(output.flush())
+        elapsed = time.monotonic() - start
+        output.close()
+
+        self.assertLessEqual(len(backend.moves), elapsed * 20 + 2)
+        self.assertEqual(backend.moves[-1], (39, 39))
+
+    def test_unthreaded_output_is_synchronous(self):
+        """Тест: без потока команды выполняются сразу в вызывающем потоке"""
+        backend = RecordingBackend()
+        output = CursorOutput(backend, threaded=False)
+        output.move_to(5, 6)
+        output.click()
+        self.assertEqual(backend.events, [("move", 5, 6), ("click",)])
+
+    def test_create_backend(self):
+        """Тест: бэкенды создаются по имени, неизвестное имя вызывает ValueError"""
+        self.assertIsInstance(create_backend("null"), NullBackend)
+        with self.assertRaises(ValueError):
+            create_backend("wayland-magic")
+
+
+if __name__ == '__main__':
+    unittest.main()
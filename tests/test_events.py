@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+import unittest
+from core.events import (FACE_FOUND, FACE_LOST, FIXATION_END, FIXATION_START, GAZE, GazeEvent, GazeEventBus)
+from core.fixation import FixationDetector
+
+
+def gaze_event(t, x=0.5):
+    return GazeEvent(GAZE, t, (x, 0.5), (0.5, 0.5), None)
+
+
+class TestGazeEventBus(unittest.TestCase):
+    def setUp(self):
+        self.bus = GazeEventBus(fixation=FixationDetector(min_duration=0.25, max_dispersion=0.02))
+
+    def tearDown(self):
+        self.bus.close()
+
+    def test_fan_out_with_kind_filter(self):
+        """Тест: событие получают все подписчики, фильтр по видам отсекает лишнее"""
+        everything = self.bus.subscribe()
+        faces_only = self.bus.subscribe(kinds={FACE_LOST})
+        self.bus.publish_sample(1.0, (0.5, 0.5), (0.5, 0.5))
+        self.bus.publish_sample(1.1, None, None)
+
+        self.assertEqual([everything.get(0).kind for _ in range(3)], [FACE_FOUND, GAZE, FACE_LOST])
+        self.assertEqual(faces_only.get(0).kind, FACE_LOST)
+        self.assertIsNone(faces_only.get(0))
+
+    def test_conflate_keeps_latest_gaze_and_all_discrete_events(self):
+        """Тест: при conflate отсчёты взгляда схлопываются до последнего, дискретные события сохраняются по порядку"""
+        subscription = self.bus.subscribe(policy="conflate")
+        for i in range(100):
+            self.bus.publish(gaze_event(i / 100))
+        self.bus.publish(GazeEvent(FACE_LOST, 1.0, None, None, None))
+
+        events = [subscription.get(0) for _ in range(3)]
+        self.assertEqual(events[0].timestamp, 0.99)
+        self.assertEqual(events[1].kind, FACE_LOST)
+        self.assertIsNone(events[2])
+        self.assertEqual(subscription.dropped, 99)
+
+    def test_drop_oldest_bounds_queue(self):
+        """Тест: при drop_oldest переполненная очередь вытесняет самые старые события"""
+        subscription = self.bus.subscribe(maxsize=3, policy="drop_oldest")
+        for i in range(10):
+            self.bus.publish(gaze_event(i))
+        self.assertEqual([subscription.get(0).timestamp for _ in range(3)], [7, 8, 9])
+        self.assertEqual(subscription.dropped, 7)
+
+    def test_fixation_events(self):
+        """Тест: устойчивый взгляд даёт начало фиксации, саккада — её конец"""
+        subscription = self.bus.subscribe(kinds={FIXATION_START, FIXATION_END})
+        for i in range(12):
+            self.bus.publish_sample(i / 30, (0.5 + 0.001 * (i % 2), 0.5), (0.5, 0.5))
+        self.bus.publish_sample(0.5, (0.8, 0.2), (0.5, 0.5))
+
+        start, end = subscription.get(0), subscription.get(0)
+        self.assertEqual(start.kind, FIXATION_START)
+        self.assertAlmostEqual(start.gaze[0], 0.5, delta=0.002)
+        self.assertEqual(end.kind, FIXATION_END)
+        self.assertEqual(end.timestamp, 0.5)
+
+    def test_slow_callback_does_not_stall_publisher(self):
+        """Тест: медленный колбэк получает события в своём потоке и не задерживает публикацию"""
+        received = []
+        gate = threading.Event()
+
+        def slow(event):
+            gate.wait(1.0)
+            received.append(event)
+
+        subscription = self.bus.subscribe_callback(slow, policy="drop_oldest", maxsize=8)
+        start = time.perf_counter()
+        for i in range(1000):
+            self.bus.publish(gaze_event(i))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        gate.set()
+        subscription.close()
+        self.assertLessEqual(len(received), 9)
+        self.assertEqual(received[-1].timestamp, 999)
+
+    def test_async_iterator_receives_events_from_tracker_thread(self):
+        """Тест: asyncio-подписчик получает события, опубликованные из другого потока"""
+        subscription = self.bus.subscribe(policy="drop_oldest")
+
+        def tracker():
+            for i in range(5):
+                time.sleep(0.005)
+                self.bus.publish(gaze_event(i))
+            subscription.close()
+
+        async def consume():
+            return [event.timestamp async for event in subscription]
+
+        thread = threading.Thread(target=tracker)
+        thread.start()
+        timestamps = asyncio.run(asyncio.wait_for(consume(), timeout=2.0))
+        thread.join()
+        self.assertEqual(timestamps, [0, 1, 2, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from core.cursor_output import RecordingBackend
+from core.filters import MovingAverageFilter, OneEuroFilter, KalmanFilter, create_filter
+from core.mouse_controller import MouseController
+
+
+class TestCursorFilters(unittest.TestCase):
+    def test_moving_average_matches_window_mean(self):
+        """Тест: кольцевой буфер даёт то же среднее, что и окно последних значений"""
+        cursor_filter = MovingAverageFilter(window=3)
+        values = [10, 20, 30, 40, 50]
+        for i, value in enumerate(values):
+            x, y = cursor_filter.update(value, -value, i)
+            window = values[max(0, i - 2):i + 1]
+            self.assertAlmostEqual(x, np.mean(window))
+            self.assertAlmostEqual(y, -np.mean(window))
+
+    def test_filters_converge_to_constant_input(self):
+        """Тест: на неподвижной цели все фильтры сходятся к её положению"""
+        for name in ("moving_average", "one_euro", "kalman"):
+            cursor_filter = create_filter(name)
+            cursor_filter.update(0.0, 0.0, 0.0)
+            for i in range(1, 120):
+                x, y = cursor_filter.update(500.0, 300.0, i / 30)
+            self.assertAlmostEqual(x, 500.0, delta=1.0, msg=name)
+            self.assertAlmostEqual(y, 300.0, delta=1.0, msg=name)
+
+    def test_one_euro_reduces_jitter_but_follows_saccade(self):
+        """Тест: One Euro гасит шум на фиксации и быстро догоняет саккаду"""
+        rng = np.random.default_rng(0)
+        cursor_filter = OneEuroFilter()
+        noisy = 500 + rng.normal(0, 10, 60)
+        out = [cursor_filter.update(v, 0.0, i / 30)[0] for i, v in enumerate(noisy)]
+        self.assertLess(np.std(np.diff(out[30:])), np.std(np.diff(noisy[30:])) / 2)
+
+        for i in range(60, 66):
+            x, _ = cursor_filter.update(1500.0, 0.0, i / 30)
+        self.assertGreater(x, 1400.0)
+
+    def test_kalman_tracks_constant_velocity(self):
+        """Тест: фильтр Калмана без отставания следует за равномерным движением"""
+        cursor_filter = KalmanFilter()
+        for i in range(90):
+            x, _ = cursor_filter.update(300.0 * i / 30, 0.0, i / 30)
+        self.assertAlmostEqual(x, 300.0 * 89 / 30, delta=5.0)
+
+    def test_reset_and_unknown_filter(self):
+        """Тест: reset сбрасывает состояние, неизвестное имя фильтра вызывает ValueError"""
+        cursor_filter = OneEuroFilter()
+        cursor_filter.update(100.0, 100.0, 0.0)
+        cursor_filter.reset()
+        self.assertEqual(cursor_filter.update(7.0, 8.0, 1.0), (7.0, 8.0))
+        with self.assertRaises(ValueError):
+            create_filter("median")
+
+    def test_mouse_controller_uses_filter(self):
+        """Тест: MouseController передаёт позицию через выбранный фильтр"""
+        mouse = RecordingBackend()
+        controller = MouseController(backend=mouse, cursor_filter=MovingAverageFilter(window=2),
+                                     threaded_output=False)
+        controller.update_cursor(100, 100, 0.0)
+        controller.update_cursor(200, 300, 0.033)
+        self.assertEqual(mouse.moves, [(100, 100), (150, 200)])
+
+
+if __name__ == '__main__':
+    unittest.main()
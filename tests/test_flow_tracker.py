@@ -0,0 +1,66 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from core.flow_tracker import EyeFlowTracker
+from core.gaze_tracker import FLOW_POINTS, GazeTracker, Landmark
+
+
+def textured_frame(shift=(0, 0)):
+    # Сглаженный шум — текстура, за которую надёжно цепляется поток Лукаса–Канаде
+    rng = np.random.default_rng(0)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8), (7, 7), 0)
+    return np.roll(frame, shift, axis=(0, 1))
+
+
+def face_landmarks():
+    rng = np.random.default_rng(1)
+    landmarks = np.full((478, 3), 0.5, dtype=np.float32)
+    landmarks[FLOW_POINTS, 0] = rng.uniform(0.4, 0.6, len(FLOW_POINTS))
+    landmarks[FLOW_POINTS, 1] = rng.uniform(0.4, 0.5, len(FLOW_POINTS))
+    landmarks[:, 2] = 0.0
+    return landmarks
+
+
+class TestEyeFlowTracker(unittest.TestCase):
+    def test_points_follow_image_shift(self):
+        """Тест: точки переносятся вслед за сдвигом изображения, остальные landmark'и не меняются"""
+        tracker = EyeFlowTracker(FLOW_POINTS)
+        landmarks = face_landmarks()
+        self.assertTrue(tracker.anchor(textured_frame(), landmarks))
+
+        moved = tracker.track(textured_frame(shift=(2, 3)))
+
+        self.assertIsNotNone(moved)
+        np.testing.assert_allclose(moved[FLOW_POINTS, 0] - landmarks[FLOW_POINTS, 0], 3 / 640, atol=0.2 / 640)
+        np.testing.assert_allclose(moved[FLOW_POINTS, 1] - landmarks[FLOW_POINTS, 1], 2 / 480, atol=0.2 / 480)
+        np.testing.assert_array_equal(moved[0], landmarks[0])
+
+    def test_lost_texture_requires_new_anchor(self):
+        """Тест: без опоры и при потере текстуры поток ничего не возвращает"""
+        tracker = EyeFlowTracker(FLOW_POINTS)
+        self.assertIsNone(tracker.track(textured_frame()))
+        tracker.anchor(textured_frame(), face_landmarks())
+        self.assertIsNone(tracker.track(np.zeros((480, 640, 3), dtype=np.uint8)))
+        self.assertFalse(tracker.anchored)
+
+
+class TestGazeTrackerOpticalFlow(unittest.TestCase):
+    def test_landmarker_runs_every_nth_frame(self):
+        """Тест: модель запускается на каждом N-м кадре, на промежуточных взгляд даёт поток"""
+        face = SimpleNamespace(face_landmarks=[[Landmark(*lm) for lm in face_landmarks().tolist()]])
+        with patch.object(mp.tasks.vision.FaceLandmarker, "create_from_options") as create:
+            create.return_value.detect.return_value = face
+            tracker = GazeTracker(optical_flow=True, flow_interval=3)
+            gazes = [tracker.get_gaze_point(textured_frame(shift=(0, i)))[0] for i in range(6)]
+
+        self.assertEqual(create.return_value.detect.call_count, 2)
+        self.assertTrue(all(gaze is not None for gaze in gazes))
+
+
+if __name__ == '__main__':
+    unittest.main()
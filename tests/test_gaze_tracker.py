@@ -1,7 +1,8 @@
+import threading
 import unittest
 from unittest.mock import Mock, patch
 import numpy as np
-from core.gaze_tracker import GazeTracker
+from core.gaze_tracker import GazeTracker, features_from_landmarks, mirror_landmarks
 
 
 class TestGazeTracker(unittest.TestCase):
@@ -37,7 +38,7 @@ class TestGazeTracker(unittest.TestCase):
         mock_results.face_landmarks = []
         
         # Мокаем метод detect
-        self.mock_face_landmarker_class.return_value.detect.return_value = mock_results
+        self.mock_face_landmarker_class.create_from_options.return_value.detect.return_value = mock_results
 
         # Создаем фиктивный кадр
         frame = np.zeros((480, 640, 3), dtype=np.uint8)
@@ -56,30 +57,36 @@ class TestGazeTracker(unittest.TestCase):
         for lm in mock_landmarks:
             lm.x = 0.5
             lm.y = 0.5
+            lm.z = 0.0
         
         # Устанавливаем специфические значения для ключевых точек
         mock_landmarks[1] = Mock()  # nose_tip
         mock_landmarks[1].x = 0.5
         mock_landmarks[1].y = 0.3
+        mock_landmarks[1].z = 0.0
         mock_landmarks[175] = Mock()  # chin
         mock_landmarks[175].x = 0.5
         mock_landmarks[175].y = 0.7
+        mock_landmarks[175].z = 0.0
         mock_landmarks[468] = Mock()  # left eye (now used as left eye inner)
         mock_landmarks[468].x = 0.45
         mock_landmarks[468].y = 0.45
+        mock_landmarks[468].z = 0.0
         mock_landmarks[473] = Mock()  # right eye (now used as right eye inner)
         mock_landmarks[473].x = 0.55
         mock_landmarks[473].y = 0.45
+        mock_landmarks[473].z = 0.0
         mock_landmarks[6] = Mock()  # nose bridge
         mock_landmarks[6].x = 0.5
         mock_landmarks[6].y = 0.4
+        mock_landmarks[6].z = 0.0
         
         # Создаем mock для результатов детекции
         mock_results = Mock()
         mock_results.face_landmarks = [mock_landmarks]
         
         # Мокаем метод detect
-        self.mock_face_landmarker_class.return_value.detect.return_value = mock_results
+        self.mock_face_landmarker_class.create_from_options.return_value.detect.return_value = mock_results
 
         # Создаем фиктивный кадр
         frame = np.zeros((480, 640, 3), dtype=np.uint8)
@@ -107,6 +114,159 @@ class TestGazeTracker(unittest.TestCase):
         # Проверяем, что prev_face_center инициализирован как None
         self.assertIsNone(self.tracker.prev_face_center)
 
+    def test_roi_inference_projects_landmarks_to_full_frame(self):
+        """Тест: в режиме области лица landmark'и переводятся в координаты полного кадра"""
+        tracker = GazeTracker(roi_inference=True, roi_size=128)
+        mock_landmarks = [Mock(x=0.5, y=0.5, z=0.0) for _ in range(478)]
+        mock_landmarks[0] = Mock(x=0.4, y=0.4, z=0.0)
+        mock_landmarks[1] = Mock(x=0.6, y=0.6, z=0.0)
+        mock_results = Mock()
+        mock_results.face_landmarks = [mock_landmarks]
+        detect = self.mock_face_landmarker_class.create_from_options.return_value.detect
+        detect.return_value = mock_results
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        # Первый кадр — полный, после него известна область лица
+        _, face_center = tracker.get_gaze_point(frame)
+        self.assertAlmostEqual(face_center[0], 0.5)
+        self.assertIsNotNone(tracker._roi)
+        x0, y0, x1, y1 = tracker._roi
+        self.assertEqual(x1 - x0, y1 - y0)
+
+        # Второй кадр — по области; центр области соответствует 0.5 в её координатах
+        _, face_center = tracker.get_gaze_point(frame)
+        self.assertAlmostEqual(face_center[0], (x0 + x1) / 2 / 640, places=5)
+        self.assertAlmostEqual(face_center[1], (y0 + y1) / 2 / 480, places=5)
+
+    def test_roi_stays_fixed_until_face_nears_edge(self):
+        """Тест: область лица не меняется от кадра к кадру, пока лицо не подойдёт к её краю"""
+        def face(low, high):
+            landmarks = [Mock(x=(low + high) / 2, y=(low + high) / 2, z=0.0) for _ in range(478)]
+            landmarks[0] = Mock(x=low, y=low, z=0.0)
+            landmarks[1] = Mock(x=high, y=high, z=0.0)
+            return Mock(face_landmarks=[landmarks])
+
+        tracker = GazeTracker(roi_inference=True, roi_size=128)
+        detect = self.mock_face_landmarker_class.create_from_options.return_value.detect
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        detect.return_value = face(0.4, 0.6)
+        tracker.get_gaze_point(frame)
+        roi = tracker._roi
+
+        # Лицо в координатах области немного смещается — область та же
+        for low in (0.3, 0.32, 0.28):
+            detect.return_value = face(low, low + 0.4)
+            tracker.get_gaze_point(frame)
+            self.assertEqual(tracker._roi, roi)
+
+        # Лицо у края области — новая область
+        detect.return_value = face(0.55, 0.95)
+        tracker.get_gaze_point(frame)
+        self.assertNotEqual(tracker._roi, roi)
+
+    def test_roi_inference_falls_back_to_full_frame(self):
+        """Тест: если в области лица не найдено, выполняется проход по полному кадру"""
+        tracker = GazeTracker(roi_inference=True)
+        tracker._roi = (100, 100, 300, 300)
+        empty_results = Mock()
+        empty_results.face_landmarks = []
+        detect = self.mock_face_landmarker_class.create_from_options.return_value.detect
+        detect.return_value = empty_results
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        gaze, face_center = tracker.get_gaze_point(frame)
+
+        self.assertIsNone(gaze)
+        self.assertEqual(detect.call_count, 2)
+        self.assertIsNone(tracker._roi)
+
+    def test_live_stream_times_submit_to_callback(self):
+        """Тест: в LIVE_STREAM длительность инференса — от отправки кадра до колбэка, а не постановка в очередь"""
+        received = []
+        tracker = GazeTracker(running_mode="LIVE_STREAM",
+                              result_callback=lambda *args: received.append(tracker.last_inference_time))
+        detect_async = self.mock_face_landmarker_class.create_from_options.return_value.detect_async
+        no_face = Mock()
+        no_face.face_landmarks = []
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        with patch('core.gaze_tracker.time.monotonic', side_effect=[100.0, 100.04]):
+            tracker.get_gaze_point(frame, timestamp=10.0)
+            self.assertIsNone(tracker.last_inference_time)
+            tracker._on_async_result(no_face, None, detect_async.call_args[0][1])
+
+        self.assertEqual(len(received), 1)
+        self.assertAlmostEqual(received[0], 0.04)
+        self.assertEqual(tracker._pending_rois, {})
+
+    def test_flow_frames_report_that_model_did_not_run(self):
+        """Тест: трекер сообщает, запустит ли следующий кадр модель, и запускал ли её последний"""
+        face = Mock()
+        face.face_landmarks = [[Mock(x=0.5, y=0.5, z=0.0) for _ in range(478)]]
+        detect = self.mock_face_landmarker_class.create_from_options.return_value.detect
+        detect.return_value = face
+        tracker = GazeTracker(optical_flow=True, flow_interval=3)
+        tracker.flow = Mock(anchored=False)
+        tracker.flow.track.return_value = np.full((478, 3), 0.5, dtype=np.float32)
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+        self.assertTrue(tracker.will_run_model())
+        tracker.get_gaze_point(frame)
+        self.assertTrue(tracker.last_ran_model)
+        tracker.flow.anchored = True
+
+        ran = []
+        for _ in range(3):
+            expected = tracker.will_run_model()
+            tracker.get_gaze_point(frame)
+            self.assertEqual(tracker.last_ran_model, expected)
+            ran.append(expected)
+        self.assertEqual(ran, [False, False, True])
+        self.assertEqual(detect.call_count, 2)
+
+    def test_video_warm_up_does_not_advance_timestamps(self):
+        """Тест: прогрев в режиме VIDEO идёт с меткой 0, кадры записанной сессии не прижимаются к ней"""
+        tracker = GazeTracker(running_mode="VIDEO")
+        detect_for_video = self.mock_face_landmarker_class.create_from_options.return_value.detect_for_video
+        detect_for_video.return_value = Mock(face_landmarks=[])
+        tracker.warm_up()
+        tracker.get_gaze_point(np.zeros((480, 640, 3), dtype=np.uint8), timestamp=0.5)
+        self.assertEqual([c[0][1] for c in detect_for_video.call_args_list], [0, 500])
+
+    def test_live_stream_warm_up_waits_for_callback(self):
+        """Тест: прогрев в LIVE_STREAM ждёт колбэк пробного кадра, результат прогрева никуда не уходит"""
+        received = []
+        tracker = GazeTracker(running_mode="LIVE_STREAM", result_callback=lambda *args: received.append(args))
+        no_face = Mock(face_landmarks=[])
+
+        def detect_async(image, timestamp_ms):
+            threading.Timer(0.05, tracker._on_async_result, (no_face, None, timestamp_ms)).start()
+
+        self.mock_face_landmarker_class.create_from_options.return_value.detect_async.side_effect = detect_async
+        tracker.warm_up(timeout=2.0)
+        self.assertTrue(tracker._warm_up_done.is_set())
+        self.assertEqual(received, [])
+        self.assertEqual(tracker._pending_rois, {})
+        self.assertIsNone(tracker.last_inference_time)
+
+    def test_get_gaze_points_batch(self):
+        """Тест: пакетная обработка возвращает массивы (B, 2) и NaN для кадров без лица"""
+        landmarks = [Mock(x=0.5, y=0.5, z=0.0) for _ in range(478)]
+        face = Mock()
+        face.face_landmarks = [landmarks]
+        no_face = Mock()
+        no_face.face_landmarks = []
+        detect = self.mock_face_landmarker_class.create_from_options.return_value.detect
+        detect.side_effect = [face, no_face, face]
+
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8)] * 3
+        gaze, face_center = self.tracker.get_gaze_points(frames)
+
+        self.assertEqual(gaze.shape, (3, 2))
+        self.assertTrue(np.isnan(gaze[1]).all())
+        np.testing.assert_allclose(face_center[[0, 2]], 0.5)
+        self.assertEqual(self.tracker.prev_face_center, (0.5, 0.5))
+
     def tearDown(self):
         # Останавливаем все патчеры
         self.mp_patcher.stop()
@@ -117,5 +277,43 @@ class TestGazeTracker(unittest.TestCase):
         self.tracker.close()
 
 
+class TestLandmarkFeatures(unittest.TestCase):
+    def make_landmarks(self, shift=0.0):
+        landmarks = np.full((478, 3), 0.5, dtype=np.float32)
+        landmarks[468:473, :2] = (0.45 + shift, 0.45)
+        landmarks[473:478, :2] = (0.55 + shift, 0.45)
+        landmarks[6, :2] = (0.5, 0.4)
+        landmarks[[33, 133], :2] = [(0.42, 0.45), (0.48, 0.45)]
+        landmarks[[362, 263], :2] = [(0.52, 0.45), (0.58, 0.45)]
+        return landmarks
+
+    def test_single_frame_features(self):
+        """Тест: центр лица и смещения считаются по радужкам, переносице и уголкам глаз"""
+        features = features_from_landmarks(self.make_landmarks(shift=0.006))
+        np.testing.assert_allclose(features.left_iris, [0.456, 0.45], atol=1e-6)
+        np.testing.assert_allclose(features.face_center, [0.4 * 0.506 + 0.6 * 0.5, 0.42], atol=1e-6)
+        np.testing.assert_allclose(features.eye_offset, [0.1, 0.0], atol=1e-5)
+
+    def test_batch_matches_single_frames(self):
+        """Тест: пакетный расчёт совпадает с покадровым, кадры без лица дают NaN"""
+        batch = np.stack([self.make_landmarks(0.0), np.full((478, 3), np.nan), self.make_landmarks(0.01)])
+        features = features_from_landmarks(batch)
+        self.assertEqual(features.gaze_offset.shape, (3, 2))
+        self.assertTrue(np.isnan(features.gaze_offset[1]).all())
+        for i in (0, 2):
+            single = features_from_landmarks(batch[i])
+            for batched, expected in zip(features, single):
+                np.testing.assert_allclose(batched[i], expected)
+
+    def test_mirrored_landmarks_mirror_gaze_offset(self):
+        """Тест: отражение landmark'ов отражает горизонтальное смещение взгляда и не меняет вертикальное"""
+        landmarks = self.make_landmarks(shift=0.006)
+        features = features_from_landmarks(landmarks)
+        mirrored = features_from_landmarks(mirror_landmarks(landmarks))
+        np.testing.assert_allclose(mirrored.face_center, [1 - features.face_center[0], features.face_center[1]], atol=1e-6)
+        np.testing.assert_allclose(mirrored.gaze_offset, features.gaze_offset * [-1, 1], atol=1e-6)
+        np.testing.assert_array_equal(landmarks, self.make_landmarks(shift=0.006))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
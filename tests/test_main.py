@@ -0,0 +1,141 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+import main
+from benchmarks.bench_startup import SlowOpenCamera
+from calibration.profiles import CalibrationProfile, ProfileKey, ProfileStore, current_user
+from config.settings import CAMERA_DEVICE_ID
+from core.cursor_output import NullBackend
+
+
+class FakeTracker:
+    """Трекер без модели: лицо всегда в центре кадра."""
+
+    running_mode = "VIDEO"
+    last_features = None
+    last_landmarks = None
+    last_ran_model = True
+
+    def will_run_model(self):
+        return True
+
+    def get_gaze_point(self, frame, timestamp=None):
+        return (0.5, 0.5), (0.5, 0.5)
+
+    def close(self):
+        pass
+
+
+class TestMainImport(unittest.TestCase):
+    def test_import_does_not_load_heavy_modules(self):
+        """Тест: импорт main не тянет MediaPipe, OpenCV и pyautogui — они загружаются при запуске"""
+        code = ("import sys, main; "
+                "print(','.join(m for m in ('mediapipe', 'cv2', 'pyautogui') if m in sys.modules))")
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(completed.stdout.strip(), "")
+
+
+class TestHeadlessRun(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        store = ProfileStore(self.tmpdir.name)
+        key = ProfileKey(current_user(), CAMERA_DEVICE_ID, 1920, 1080)
+        gaze = np.array([[0.1, 0.1], [0.9, 0.1], [0.1, 0.9], [0.9, 0.9]])
+        store.save(CalibrationProfile.fit(key, "linear", gaze, gaze * (1920, 1080)))
+        with patch.object(main, "create_tracker", lambda *_: FakeTracker()):
+            self.app = main.GazeControlApp(main.parse_args(["--headless", "--dry-run"]), screen_size=(1920, 1080),
+                                           mouse_backend=NullBackend(), camera_factory=lambda *_: SlowOpenCamera(0),
+                                           profile_store=store)
+
+    def tearDown(self):
+        self.app.close()
+        self.tmpdir.cleanup()
+
+    def test_sigterm_stops_loop_without_highgui(self):
+        """Тест: в режиме без окна цикл не вызывает HighGUI и завершается по SIGTERM"""
+        timer = threading.Timer(0.2, os.kill, (os.getpid(), signal.SIGTERM))
+        previous = signal.getsignal(signal.SIGTERM)
+        with patch("cv2.imshow", side_effect=AssertionError("imshow")), \
+                patch("cv2.waitKey", side_effect=AssertionError("waitKey")):
+            timer.start()
+            self.app.run()
+        timer.join()
+        self.assertTrue(self.app.stop_requested.is_set())
+        self.assertIsNotNone(self.app.first_move_time)
+        self.assertIs(signal.getsignal(signal.SIGTERM), previous)
+
+    def test_dwell_click_does_not_feed_online_calibration(self):
+        """Тест: клик фиксацией не становится образцом калибровки, известная точка — становится"""
+        self.assertIsNotNone(self.app.online)
+        self.app.online.add_target = Mock(return_value=True)
+        self.app.mouse_controller.dwell_time = 0.0
+        with patch.object(self.app.mouse_controller.output, "click") as click:
+            for i in range(5):
+                self.app.on_gaze((0.5, 0.5), (0.5, 0.5), 100.0 + i / 30, 0.3)
+        click.assert_called()
+        self.app.online.add_target.assert_not_called()
+
+        self.assertTrue(self.app.add_known_target(100, 200, 101.0))
+        self.app.online.add_target.assert_called_once_with(100, 200, 101.0)
+
+    def test_scheduler_gates_only_model_runs(self):
+        """Тест: кадры оптического потока не ждут планировщик и не входят в среднее время инференса"""
+        self.app.scheduler = Mock()
+        self.app.camera = Mock()
+        self.app.camera.read_latest.return_value = (np.zeros((4, 4, 3), dtype=np.uint8), 1, 100.0)
+        tracker = self.app.gaze_tracker
+        with patch.object(tracker, "will_run_model", return_value=False), \
+                patch.object(tracker, "last_ran_model", False):
+            self.app.step()
+        self.app.scheduler.wait.assert_not_called()
+        self.app.scheduler.record_duration.assert_not_called()
+        self.app.scheduler.observe.assert_called_once()
+
+        self.app.step()
+        self.app.scheduler.wait.assert_called_once()
+        self.app.scheduler.record_duration.assert_called_once()
+
+    def test_overlay_renders_on_main_thread(self):
+        """Тест: окно отладки обслуживает главный поток, цикл взгляда работает в рабочем и HighGUI не вызывает"""
+        self.app.args.headless = False
+        threads = set()
+
+        def record_thread(*args):
+            threads.add(threading.current_thread())
+            return -1
+
+        timer = threading.Timer(0.3, self.app.request_stop)
+        with patch("cv2.imshow", side_effect=record_thread), patch("cv2.waitKey", side_effect=record_thread), \
+                patch("cv2.destroyWindow"):
+            timer.start()
+            self.app.run()
+            self.app.overlay.close()
+        timer.join()
+        self.assertGreater(self.app.overlay.frames_rendered, 0)
+        self.assertEqual(threads, {threading.main_thread()})
+
+    def test_live_stream_records_no_stale_landmarks(self):
+        """Тест: в LIVE_STREAM кадр записывается без landmark'ов прошлого асинхронного результата"""
+        self.app.camera = Mock()
+        self.app.camera.read_latest.return_value = (np.zeros((4, 4, 3), dtype=np.uint8), 1, 100.0)
+        self.app.recorder = Mock()
+        self.app.gaze_tracker.last_landmarks = np.zeros((478, 3), dtype=np.float32)
+        self.app.step()
+        self.assertIs(self.app.recorder.write.call_args[0][2], self.app.gaze_tracker.last_landmarks)
+
+        self.app.live_stream = True
+        self.app.step()
+        self.assertIsNone(self.app.recorder.write.call_args[0][2])
+        self.app.recorder = None
+
+
+if __name__ == '__main__':
+    unittest.main()
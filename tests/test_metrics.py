@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+from utils.metrics import Histogram, Metrics, NULL_METRICS, JsonLinesExporter, PrometheusExporter
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_counts_and_quantiles(self):
+        """Тест: гистограмма раскладывает значения по корзинам и оценивает перцентили"""
+        histogram = Histogram(buckets=(0.01, 0.02, 0.05))
+        for value in (0.005, 0.015, 0.015, 0.03, 1.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 2, 1, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertGreater(histogram.quantile(0.5), 0.01)
+        self.assertLessEqual(histogram.quantile(0.5), 0.02)
+        self.assertEqual(histogram.quantile(0.99), 0.05)
+
+    def test_snapshot_contains_derived_face_lost_ratio(self):
+        """Тест: снимок содержит счётчики, гистограммы и долю кадров без лица"""
+        metrics = Metrics()
+        with metrics.timer("detect"):
+            pass
+        metrics.inc("frames_processed", 4)
+        metrics.inc("faces_lost")
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["histograms"]["detect"]["count"], 1)
+        self.assertAlmostEqual(snapshot["gauges"]["face_lost_ratio"], 0.25)
+
+    def test_mark_frame_computes_fps(self):
+        """Тест: эффективный FPS считается по окну кадров"""
+        metrics = Metrics()
+        for i in range(31):
+            metrics.mark_frame(now=i / 30)
+        self.assertAlmostEqual(metrics.snapshot()["gauges"]["fps"], 30.0)
+
+    def test_prometheus_text_format(self):
+        """Тест: экспорт в текстовом формате Prometheus с накопительными корзинами"""
+        metrics = Metrics(buckets=(0.01, 0.1))
+        metrics.observe("map", 0.005)
+        metrics.observe("map", 0.05)
+        metrics.inc("frames_captured", 3)
+        text = metrics.to_prometheus()
+        self.assertIn("gz_ctrl_frames_captured_total 3", text)
+        self.assertIn('gz_ctrl_map_seconds_bucket{le="0.01"} 1', text)
+        self.assertIn('gz_ctrl_map_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('gz_ctrl_map_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn("gz_ctrl_map_seconds_count 2", text)
+
+    def test_null_metrics_is_noop(self):
+        """Тест: выключенная телеметрия принимает те же вызовы и ничего не делает"""
+        with NULL_METRICS.timer("detect"):
+            NULL_METRICS.inc("frames_processed")
+            NULL_METRICS.observe("map", 0.1)
+            NULL_METRICS.mark_frame()
+        self.assertFalse(NULL_METRICS.enabled)
+
+    def test_exporters(self):
+        """Тест: JSON lines пишутся в файл, /metrics отдаётся по HTTP"""
+        metrics = Metrics()
+        metrics.inc("clicks")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "metrics.jsonl")
+            exporter = JsonLinesExporter(metrics, path, interval=60)
+            exporter.close()
+            with open(path, 'r') as f:
+                self.assertEqual(json.loads(f.readline())["counters"]["clicks"], 1)
+
+        server = PrometheusExporter(metrics, port=0)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=2) as response:
+                self.assertIn("gz_ctrl_clicks_total 1", response.read().decode("utf-8"))
+        finally:
+            server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
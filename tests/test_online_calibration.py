@@ -0,0 +1,96 @@
+import io
+import threading
+import unittest
+from contextlib import redirect_stdout
+import numpy as np
+from calibration.online import OnlineCalibrator
+from core.mapping_models import LinearAxisModel, fit_model
+from core.screen_mapper import ScreenMapper
+
+
+def true_map(gx, gy):
+    return 1920 * gx + 40, 1080 * gy - 30
+
+
+class TestOnlineCalibration(unittest.TestCase):
+    def setUp(self):
+        self.mapper = ScreenMapper(calibration_file="/nonexistent/calibration.json", screen_w=1920, screen_h=1080)
+        # Исходная калибровка без смещения — за время работы накопился дрейф (+40, -30)
+        self.mapper.model = LinearAxisModel([[1920, 0.0], [1080, 0.0]])
+        self.rng = np.random.default_rng(0)
+
+    def fixate(self, online, gx, gy, t, openness=0.3, spread=0.002):
+        for i in range(10):
+            online.observe(gx + self.rng.normal(0, spread), gy + self.rng.normal(0, spread), t + i / 30, openness)
+        return t + 9 / 30
+
+    def test_drift_is_corrected(self):
+        """Тест: образцы с известной точкой экрана устраняют дрейф модели"""
+        online = OnlineCalibrator(self.mapper, forgetting=0.98)
+        t = 0.0
+        for _ in range(40):
+            gx, gy = self.rng.uniform(0.1, 0.9, 2)
+            t = self.fixate(online, gx, gy, t)
+            self.assertTrue(online.add_target(*true_map(gx, gy), t))
+            t += 1.0
+        error = np.subtract(self.mapper.model.map(0.5, 0.5), true_map(0.5, 0.5))
+        self.assertLess(np.abs(error).max(), 5)
+        self.assertEqual(online.samples_accepted, 40)
+
+    def test_blink_and_saccade_are_rejected(self):
+        """Тест: окна с морганием или саккадой не обновляют модель"""
+        online = OnlineCalibrator(self.mapper)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            t = self.fixate(online, 0.5, 0.5, 0.0, openness=0.05)
+            self.assertFalse(online.add_target(*true_map(0.5, 0.5), t))
+            t = self.fixate(online, 0.5, 0.5, 10.0, spread=0.05)
+            self.assertFalse(online.add_target(*true_map(0.5, 0.5), t))
+        self.assertEqual(online.samples_rejected, 2)
+        self.assertIsNotNone(online.last_rejection)
+        self.assertEqual(output.getvalue(), "")  # отказы только в счётчиках, без печати на каждый образец
+        self.assertEqual(self.mapper.model.map(0.5, 0.5), (960.0, 540.0))
+
+    def test_observe_from_another_thread(self):
+        """Тест: observe из потока колбэка не мешает add_target обходить окно фиксации"""
+        online = OnlineCalibrator(self.mapper)
+        stop = threading.Event()
+
+        def callback_thread():
+            t = 0.0
+            while not stop.is_set():
+                online.observe(0.5, 0.5, t, 0.3)
+                t += 1 / 30
+
+        thread = threading.Thread(target=callback_thread)
+        thread.start()
+        try:
+            for _ in range(200):
+                online.add_target(*true_map(0.5, 0.5), 1e9)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual(online.samples_accepted + online.samples_rejected, 200)
+
+    def test_far_target_is_rejected(self):
+        """Тест: цель далеко от прогноза считается выбросом"""
+        online = OnlineCalibrator(self.mapper, max_error=200)
+        t = self.fixate(online, 0.2, 0.2, 0.0)
+        self.assertFalse(online.add_target(1800, 1000, t))
+
+    def test_poly_model_and_unsupported_homography(self):
+        """Тест: полиномиальная модель уточняется, гомография не поддерживается"""
+        grid = np.array([[x, y] for x in (0.1, 0.5, 0.9) for y in (0.1, 0.5, 0.9)])
+        self.mapper.model = fit_model("poly2", grid, grid * (1920, 1080))
+        online = OnlineCalibrator(self.mapper, gaze_coords=grid)
+        t = self.fixate(online, 0.3, 0.6, 0.0)
+        self.assertTrue(online.add_target(*true_map(0.3, 0.6), t))
+        self.assertEqual(self.mapper.model.name, "poly2")
+
+        self.mapper.model = fit_model("homography", grid, grid * (1920, 1080))
+        with self.assertRaises(ValueError):
+            OnlineCalibrator(self.mapper)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import io
+import multiprocessing as mp
+import threading
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+import unittest
+from unittest.mock import Mock, patch
+import numpy as np
+from core.pipeline import SharedFrameRing, SharedResultRing, _inference_worker
+
+
+def write_frames(ring_name, shape, slots, count):
+    ring = SharedFrameRing(shape, slots=slots, name=ring_name)
+    for i in range(count):
+        seq, slot = ring.acquire()
+        slot[:] = i
+        ring.publish(seq, 100.0 + i)
+    ring.close()
+
+
+class TestSharedFrameRing(unittest.TestCase):
+    def setUp(self):
+        self.ring = SharedFrameRing((4, 6, 3), slots=3)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_reader_gets_latest_frame_in_place(self):
+        """Тест: читатель получает самый свежий кадр как представление разделяемой памяти"""
+        for i in range(5):
+            seq, slot = self.ring.acquire()
+            slot[:] = i
+            self.ring.publish(seq, float(i))
+        seq, timestamp, frame = self.ring.read_latest(0)
+        self.assertEqual(seq, 5)
+        self.assertEqual(timestamp, 4.0)
+        self.assertTrue((frame == 4).all())
+        self.assertIsNone(self.ring.read_latest(seq))
+
+    def test_overwritten_slot_is_invalid(self):
+        """Тест: после перезаписи слота seqlock помечает прочитанный кадр недействительным"""
+        seq, slot = self.ring.acquire()
+        self.ring.publish(seq, 0.0)
+        seq, _, _ = self.ring.read_latest(0)
+        self.assertTrue(self.ring.is_valid(seq))
+        for _ in range(3):
+            next_seq, _ = self.ring.acquire()
+            self.ring.publish(next_seq, 0.0)
+        self.assertFalse(self.ring.is_valid(seq))
+
+    def test_frames_from_another_process(self):
+        """Тест: кадры, записанные другим процессом, видны без копирования через pickle"""
+        process = mp.get_context("spawn").Process(target=write_frames, args=(self.ring.name, (4, 6, 3), 3, 7))
+        process.start()
+        process.join(timeout=30)
+        self.assertEqual(process.exitcode, 0)
+        seq, timestamp, frame = self.ring.read_latest(0)
+        self.assertEqual((seq, timestamp), (7, 106.0))
+        self.assertTrue((frame == 6).all())
+
+
+class TestSharedResultRing(unittest.TestCase):
+    def test_fifo_and_overflow(self):
+        """Тест: результаты читаются по порядку, при переполнении новые записи отбрасываются"""
+        ring = SharedResultRing(capacity=4)
+        reader = SharedResultRing(capacity=4, name=ring.name)
+        for i in range(6):
+            ring.push((i, 0.0, 0.5, 0.5, np.nan, np.nan, np.nan))
+        records = reader.pop_all()
+        self.assertEqual([r[0] for r in records], [0, 1, 2, 3])
+        self.assertEqual(ring.dropped, 2)
+        self.assertTrue(ring.push((6, 0.0, 0.5, 0.5, 0.5, 0.5, 0.3)))
+        self.assertEqual(reader.pop_all()[0][0], 6)
+        reader.close()
+        ring.close()
+
+
+class FakeTracker:
+    """Замена GazeTracker для процесса инференса: запоминает переданные кадры."""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.frames = []
+        self.last_features = SimpleNamespace(eye_openness=np.array([0.3]))
+        FakeTracker.instances.append(self)
+
+    def get_gaze_point(self, frame, timestamp=None):
+        self.frames.append(frame)
+        return (0.5, 0.5), (0.5, 0.5)
+
+    def close(self):
+        pass
+
+
+class TestInferenceWorker(unittest.TestCase):
+    def setUp(self):
+        FakeTracker.instances = []
+        self.shape = (4, 6, 3)
+        self.ring = SharedFrameRing(self.shape, slots=3)
+        self.results = SharedResultRing(capacity=8)
+        seq, slot = self.ring.acquire()
+        slot[:] = 7
+        self.ring.publish(seq, 100.0)
+
+    def tearDown(self):
+        self.results.close()
+        self.ring.close()
+
+    def run_worker(self):
+        stop_event = threading.Event()
+        stop_event.set()  # захват «завершён»: воркер обработает опубликованный кадр и выйдет
+        with patch("core.gaze_tracker.GazeTracker", FakeTracker):
+            _inference_worker(self.ring.name, self.results.name, self.shape, 3, 8, {}, stop_event, 0.001)
+        return FakeTracker.instances[0]
+
+    def test_inference_runs_on_private_copy(self):
+        """Тест: инференс получает копию слота, а не представление разделяемой памяти"""
+        tracker = self.run_worker()
+        self.assertEqual(len(tracker.frames), 1)
+        self.assertTrue((tracker.frames[0] == 7).all())
+        self.assertFalse(np.shares_memory(tracker.frames[0], self.ring._frames))
+        records = self.results.pop_all()
+        self.assertEqual(len(records), 1)
+        self.assertAlmostEqual(records[0][-1], 0.3)  # раскрытие глаз доходит до главного процесса
+
+    def test_torn_frame_skips_inference(self):
+        """Тест: слот, перезаписанный во время копирования, не доходит до трекера"""
+        with patch.object(SharedFrameRing, "is_valid", return_value=False):
+            tracker = self.run_worker()
+        self.assertEqual(tracker.frames, [])
+        self.assertEqual(self.results.pop_all(), [])
+
+    def test_tracker_failure_stops_pipeline(self):
+        """Тест: ошибка создания трекера останавливает конвейер, главный процесс не ждёт результатов вечно"""
+        stop_event = threading.Event()
+        failing = Mock(side_effect=RuntimeError("нет файла модели"))
+        with patch("core.gaze_tracker.GazeTracker", failing), redirect_stdout(io.StringIO()) as output, \
+                self.assertRaises(RuntimeError):
+            _inference_worker(self.ring.name, self.results.name, self.shape, 3, 8, {}, stop_event, 0.001)
+        self.assertTrue(stop_event.is_set())
+        self.assertIn("нет файла модели", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from unittest.mock import patch
+from calibration import profiles
+from calibration.profiles import CalibrationProfile, CalibrationSettings, ProfileKey, ProfileStore
+from core.screen_mapper import ScreenMapper
+
+
+def make_samples():
+    gx, gy = np.meshgrid(np.linspace(0.2, 0.8, 3), np.linspace(0.3, 0.7, 3))
+    gaze = np.c_[gx.ravel(), gy.ravel()]
+    return gaze, np.c_[1920 * gaze[:, 0], 1080 * gaze[:, 1]]
+
+
+class TestProfiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = ProfileStore(os.path.join(self.tmpdir.name, "profiles"))
+        self.key = ProfileKey("анна", 0, 1920, 1080)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_binary_roundtrip(self):
+        """Тест: профиль сохраняется и читается без потери коэффициентов и образцов"""
+        gaze, screen = make_samples()
+        profile = CalibrationProfile.fit(self.key, "poly2", gaze, screen)
+        loaded = CalibrationProfile.from_bytes(profile.to_bytes())
+        self.assertEqual(loaded.key, self.key)
+        self.assertEqual(loaded.model_name, "poly2")
+        np.testing.assert_array_equal(loaded.params, profile.params)
+        np.testing.assert_allclose(loaded.gaze_coords, gaze, atol=1e-6)
+        self.assertAlmostEqual(loaded.model().map(0.5, 0.5)[0], 960.0, places=3)
+
+    def test_rejects_foreign_or_truncated_data(self):
+        """Тест: чужой или обрезанный файл вызывает ValueError"""
+        data = CalibrationProfile.fit(self.key, "linear", *make_samples()).to_bytes()
+        with self.assertRaises(ValueError):
+            CalibrationProfile.from_bytes(b"JSON" + data[4:])
+        with self.assertRaises(ValueError):
+            CalibrationProfile.from_bytes(data[:-4])
+
+    def test_find_prefers_exact_key_then_same_screen(self):
+        """Тест: выбирается профиль своего ключа, иначе профиль того же пользователя и экрана"""
+        gaze, screen = make_samples()
+        self.store.save(CalibrationProfile.fit(ProfileKey("анна", 1, 1920, 1080), "linear", gaze, screen))
+        self.store.save(CalibrationProfile.fit(ProfileKey("борис", 0, 1920, 1080), "linear", gaze, screen + 100))
+        self.assertEqual(self.store.find(self.key).key.camera_id, 1)
+        self.assertIsNone(self.store.find(ProfileKey("анна", 0, 2560, 1440)))
+
+        self.store.save(CalibrationProfile.fit(self.key, "linear", gaze, screen))
+        self.assertEqual(self.store.find(self.key).key, self.key)
+        self.assertEqual(len(self.store.profiles()), 3)
+
+    def test_mapper_migrates_legacy_json_once(self):
+        """Тест: прежний JSON переносится в профиль, пока в хранилище нет профилей"""
+        gaze, screen = make_samples()
+        legacy = os.path.join(self.tmpdir.name, "calibration_data.json")
+        with open(legacy, 'w') as f:
+            json.dump({"gaze_coords": gaze.tolist(), "screen_coords": screen.tolist()}, f)
+
+        mapper = ScreenMapper(calibration_file=legacy, screen_w=1920, screen_h=1080,
+                              profile_store=self.store, profile_key=self.key)
+        self.assertTrue(mapper.is_calibrated)
+        self.assertTrue(os.path.exists(self.store.path_for(self.key)))
+
+        # Другой пользователь не получает чужую калибровку из JSON
+        other = ScreenMapper(calibration_file=legacy, screen_w=1920, screen_h=1080,
+                             profile_store=self.store, profile_key=ProfileKey("борис", 0, 1920, 1080))
+        self.assertFalse(other.is_calibrated)
+        other.save_calibration(gaze, screen)
+        other.load_calibration()
+        self.assertEqual(other.map_to_screen(0.5, 0.5), (960, 540))
+
+    def test_settings_roundtrip_and_version_1(self):
+        """Тест: параметры калибровки сохраняются в профиле, профиль версии 1 читается без них"""
+        gaze, screen = make_samples()
+        settings = CalibrationSettings(0.05, 0.0, "poly2")
+        profile = CalibrationProfile.fit(self.key, "poly2", gaze, screen, settings=settings)
+        self.assertEqual(CalibrationProfile.from_bytes(profile.to_bytes()).settings, settings)
+
+        data = profile.to_bytes()
+        version_1 = (data[:4] + (1).to_bytes(2, "little") + data[6:profiles.PROFILE_HEADER.size]
+                     + data[profiles.PROFILE_HEADER.size + profiles.SETTINGS_HEADER.size:])
+        legacy = CalibrationProfile.from_bytes(version_1)
+        self.assertIsNone(legacy.settings)
+        np.testing.assert_array_equal(legacy.params, profile.params)
+
+    def test_mapper_recalibrates_after_settings_change(self):
+        """Тест: профиль, снятый при других GAZE_OFFSET_MAX/компенсации/модели, требует повторной калибровки"""
+        gaze, screen = make_samples()
+        mapper = ScreenMapper(calibration_file="", screen_w=1920, screen_h=1080,
+                              profile_store=self.store, profile_key=self.key)
+        mapper.save_calibration(gaze, screen)
+        mapper.load_calibration()
+        self.assertTrue(mapper.is_calibrated)
+
+        tuned = mapper.calibration_settings._replace(gaze_offset_max=mapper.calibration_settings.gaze_offset_max * 2)
+        with patch.object(profiles, "GAZE_OFFSET_MAX", tuned.gaze_offset_max):
+            stale = ScreenMapper(calibration_file="", screen_w=1920, screen_h=1080,
+                                 profile_store=self.store, profile_key=self.key)
+            self.assertFalse(stale.is_calibrated)
+            stale.save_calibration(gaze, screen)
+            stale.load_calibration()
+            self.assertTrue(stale.is_calibrated)
+        self.assertEqual(self.store.load(self.key).settings, tuned)
+
+        # Другая модель отображения — тоже другая калибровка
+        self.assertFalse(ScreenMapper(calibration_file="", screen_w=1920, screen_h=1080, model_type="poly2",
+                                      profile_store=self.store, profile_key=self.key).is_calibrated)
+
+    def test_fallback_model_survives_restart(self):
+        """Тест: poly2 по 5 точкам сохраняется как linear и при следующем запуске загружается без повторной калибровки"""
+        gaze, screen = make_samples()
+        mapper = ScreenMapper(calibration_file="", screen_w=1920, screen_h=1080, model_type="poly2",
+                              profile_store=self.store, profile_key=self.key)
+        mapper.save_calibration(gaze[:5], screen[:5])
+
+        restarted = ScreenMapper(calibration_file="", screen_w=1920, screen_h=1080, model_type="poly2",
+                                 profile_store=self.store, profile_key=self.key)
+        self.assertTrue(restarted.is_calibrated)
+        self.assertEqual(restarted.model.name, "linear")
+        np.testing.assert_allclose(restarted.map_to_screen(0.5, 0.5), (960, 540), atol=1)
+
+    def test_profile_without_settings_keeps_its_model(self):
+        """Тест: профиль без явных параметров помечается своей моделью и загружается маппером этой модели"""
+        gaze, screen = make_samples()
+        for model_type in ("poly2", "homography"):
+            self.store.save(CalibrationProfile.fit(self.key, model_type, gaze, screen))
+            self.assertEqual(self.store.load(self.key).settings.mapping_model, model_type)
+            mapper = ScreenMapper(calibration_file="", screen_w=1920, screen_h=1080, model_type=model_type,
+                                  profile_store=self.store, profile_key=self.key)
+            self.assertTrue(mapper.is_calibrated)
+            self.assertEqual(mapper.model.name, model_type)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import tempfile
+import time
+import unittest
+import numpy as np
+from core.cursor_output import RecordingBackend
+from core.mouse_controller import MouseController
+from core.screen_mapper import ScreenMapper
+from utils.recording import SessionRecorder, ReplaySession, ReplayCamera
+
+
+def make_frame(index):
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    frame[:, :, 1] = index * 10
+    return frame
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def record(self, codec="raw", count=5):
+        landmarks = np.random.default_rng(0).random((478, 3)).astype(np.float32)
+        with SessionRecorder(self.path, codec=codec) as recorder:
+            for i in range(count):
+                recorder.write(make_frame(i), timestamp=100.0 + i / 30,
+                               landmarks=landmarks if i % 2 == 0 else None,
+                               target=(10 * i, 20 * i) if i == 1 else None)
+        return landmarks
+
+    def test_raw_roundtrip(self):
+        """Тест: сырая запись воспроизводится побайтно с метками времени, landmark'ами и целями"""
+        landmarks = self.record("raw")
+        session = ReplaySession(self.path)
+        self.assertEqual(session.frame_count, 5)
+        for i, frame in enumerate(session.frames()):
+            np.testing.assert_array_equal(frame, make_frame(i))
+        np.testing.assert_allclose(session.timestamps, 100.0 + np.arange(5) / 30)
+        np.testing.assert_array_equal(session.landmarks[0], landmarks)
+        self.assertTrue(np.isnan(session.landmarks[1]).all())
+        np.testing.assert_array_equal(session.targets[1], [10, 20])
+        self.assertTrue(np.isnan(session.targets[0]).all())
+
+    def test_interrupted_recording_replays(self):
+        """Тест: запись без close() (сбой процесса) воспроизводится по размеру потоков, а не по заголовку"""
+        recorder = SessionRecorder(self.path, fps=10)
+        for i in range(25):
+            recorder.write(make_frame(i), timestamp=100.0 + i / 10)
+        # close() не вызывается: в заголовке frame_count = 0, на диске — 20 кадров (сброс раз в секунду)
+        session = ReplaySession(self.path)
+        self.assertEqual(session.header["frame_count"], 0)
+        self.assertEqual(session.frame_count, 20)
+        np.testing.assert_array_equal(list(session.frames())[19], make_frame(19))
+        recorder.close()
+        self.assertEqual(ReplaySession(self.path).frame_count, 25)
+
+    def test_mjpeg_roundtrip(self):
+        """Тест: MJPEG-запись воспроизводится с потерями в пределах сжатия"""
+        self.record("mjpeg")
+        frames = list(ReplaySession(self.path).frames())
+        self.assertEqual(len(frames), 5)
+        for i, frame in enumerate(frames):
+            self.assertLess(np.abs(frame.astype(int) - make_frame(i).astype(int)).mean(), 4)
+
+    def test_legacy_mirrored_session_is_unmirrored_on_replay(self):
+        """Тест: кадры старых сессий (отражённые при захвате) возвращаются к виду, в котором их отдаёт камера"""
+        frame = make_frame(0)
+        frame[0, 0] = 255
+        with SessionRecorder(self.path) as recorder:
+            recorder.write(frame)
+        self.assertFalse(ReplaySession(self.path).frames_mirrored)
+        replayed, _, _ = ReplayCamera(self.path).read_latest()
+        np.testing.assert_array_equal(replayed, frame)
+
+        with open(f"{self.path}/session.json") as f:
+            header = json.load(f)
+        del header["frames_mirrored"]
+        with open(f"{self.path}/session.json", "w") as f:
+            json.dump(header, f)
+        replayed, _, _ = ReplayCamera(self.path).read_latest()
+        np.testing.assert_array_equal(replayed, frame[:, ::-1])
+
+    def test_replay_camera_interface(self):
+        """Тест: ReplayCamera ведёт себя как Camera и отдаёт записанные метки времени"""
+        self.record("raw", count=3)
+        camera = ReplayCamera(self.path)
+        frame, seq, timestamp = camera.read_latest()
+        self.assertEqual(seq, 1)
+        self.assertAlmostEqual(timestamp, 100.0)
+        frame[:] = 255  # кадр можно изменять, запись не портится
+        self.assertIsNotNone(camera.get_frame())
+        self.assertIsNotNone(camera.get_frame())
+        self.assertIsNone(camera.get_frame())
+        self.assertFalse(camera.is_opened())
+        np.testing.assert_array_equal(next(ReplaySession(self.path).frames()), make_frame(0))
+
+    def test_replay_camera_loop_keeps_timestamps_monotonic(self):
+        """Тест: при зацикливании метки времени продолжают расти"""
+        self.record("raw", count=3)
+        camera = ReplayCamera(self.path, loop=True)
+        timestamps = [camera.read_latest()[2] for _ in range(7)]
+        self.assertTrue(all(b > a for a, b in zip(timestamps, timestamps[1:])))
+
+    def test_replay_camera_realtime_pacing(self):
+        """Тест: в режиме реального времени выдерживаются записанные интервалы"""
+        self.record("raw", count=4)
+        camera = ReplayCamera(self.path, realtime=True)
+        start = time.monotonic()
+        while camera.get_frame() is not None:
+            pass
+        self.assertGreaterEqual(time.monotonic() - start, 3 / 30 - 0.01)
+
+    def test_headless_loop_with_stub_mouse(self):
+        """Тест: маппер и контроллер мыши работают без экрана с заглушкой мыши"""
+        self.record("raw", count=5)
+        session = ReplaySession(self.path)
+        mouse = RecordingBackend()
+        mapper = ScreenMapper(calibration_file=self.path + "/missing.json", screen_w=1920, screen_h=1080)
+        controller = MouseController(backend=mouse, threaded_output=False)
+        for lm in session.landmarks:
+            if np.isnan(lm).any():
+                continue
+            screen_x, screen_y = mapper.map_to_screen(float(lm[468, 0]), float(lm[468, 1]))
+            controller.update_cursor(screen_x, screen_y)
+        self.assertEqual(len(mouse.moves), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
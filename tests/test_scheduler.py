@@ -0,0 +1,49 @@
+import unittest
+from core.scheduler import ACTIVE, FIXATION, IDLE, InferenceScheduler
+
+
+class TestInferenceScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = InferenceScheduler(max_fps=None, fixation_fps=10, idle_fps=2, idle_timeout=1.0,
+                                            fixation_time=0.25, max_dispersion=0.02)
+
+    def feed(self, gaze, start, frames, dt=1 / 30):
+        t = start
+        for _ in range(frames):
+            self.scheduler.observe(gaze, t)
+            t += dt
+        return t
+
+    def test_steady_gaze_becomes_fixation_and_saccade_resets(self):
+        """Тест: устойчивый взгляд переводит в фиксацию, первая же саккада — обратно в active"""
+        t = self.feed((0.5, 0.5), 0.0, 5)
+        self.assertEqual(self.scheduler.state, ACTIVE)
+        t = self.feed((0.505, 0.5), t, 10)
+        self.assertEqual(self.scheduler.state, FIXATION)
+        self.assertAlmostEqual(self.scheduler.interval, 0.1)
+        self.assertEqual(self.scheduler.observe((0.8, 0.3), t), ACTIVE)
+        self.assertEqual(self.scheduler.interval, 0.0)
+
+    def test_face_loss_goes_idle_and_face_returns_active(self):
+        """Тест: без лица дольше таймаута — редкие пробы, найденное лицо сразу возвращает active"""
+        t = self.feed((0.5, 0.5), 0.0, 3)
+        t = self.feed(None, t, 20)
+        self.assertEqual(self.scheduler.state, ACTIVE)
+        t = self.feed(None, t, 20)
+        self.assertEqual(self.scheduler.state, IDLE)
+        self.scheduler.started(t)
+        self.assertAlmostEqual(self.scheduler.delay(t + 0.1), 0.4)
+        self.assertEqual(self.scheduler.observe((0.5, 0.5), t + 0.5), ACTIVE)
+        self.assertEqual(self.scheduler.delay(t + 0.5), 0.0)
+
+    def test_cpu_budget_limits_rate(self):
+        """Тест: бюджет CPU растягивает интервал так, чтобы инференс занимал не больше заданной доли"""
+        scheduler = InferenceScheduler(max_fps=None, target_cpu_percent=25)
+        scheduler.record_duration(0.02)
+        self.assertAlmostEqual(scheduler.interval, 0.08)
+        scheduler.started(10.0)
+        self.assertAlmostEqual(scheduler.delay(10.05), 0.03)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from core.mapping_models import LinearAxisModel, PolynomialModel, HomographyModel, fit_model
+from core.screen_mapper import ScreenMapper
+
+
+def make_grid():
+    gx, gy = np.meshgrid(np.linspace(0.2, 0.8, 3), np.linspace(0.3, 0.7, 3))
+    return np.c_[gx.ravel(), gy.ravel()]
+
+
+class TestMappingModels(unittest.TestCase):
+    def test_linear_model_recovers_coefficients(self):
+        """Тест: линейная модель восстанавливает коэффициенты по осям"""
+        gaze = make_grid()
+        screen = np.c_[3000 * gaze[:, 0] - 200, 1500 * gaze[:, 1] + 50]
+        model = LinearAxisModel.fit(gaze, screen)
+        np.testing.assert_allclose(model.params, [[3000, -200], [1500, 50]], atol=1e-6)
+
+    def test_linear_model_constant_axis_maps_to_mean(self):
+        """Тест: при нулевой дисперсии по оси модель выдаёт среднее (как LinearRegression)"""
+        gaze = np.c_[np.linspace(0.3, 0.5, 9), np.zeros(9)]
+        screen = np.c_[np.linspace(0, 2560, 9), np.repeat([128, 720, 1312], 3)]
+        model = LinearAxisModel.fit(gaze, screen)
+        self.assertAlmostEqual(model.map(0.4, 0.0)[1], screen[:, 1].mean())
+
+    def test_joint_models_fit_exact_mappings(self):
+        """Тест: полиномиальная модель и гомография точно восстанавливают свои преобразования"""
+        gaze = make_grid()
+        x, y = gaze[:, 0], gaze[:, 1]
+        poly_screen = np.c_[100 + 2000 * x + 300 * y + 500 * x * y, 50 + 200 * x + 1000 * y * y]
+        poly = PolynomialModel.fit(gaze, poly_screen)
+        np.testing.assert_allclose(poly.map_many(gaze), poly_screen, atol=1e-6)
+
+        h = np.array([[2000.0, 100.0, 10.0], [50.0, 1200.0, 20.0], [0.1, 0.2, 1.0]])
+        projected = np.c_[gaze, np.ones(len(gaze))] @ h.T
+        homography_screen = projected[:, :2] / projected[:, 2:3]
+        homography = HomographyModel.fit(gaze, homography_screen)
+        np.testing.assert_allclose(homography.params, h, rtol=1e-6, atol=1e-6)
+
+    def test_scalar_and_batch_paths_agree(self):
+        """Тест: map() и map_many() дают одинаковый результат для всех моделей"""
+        gaze = make_grid()
+        screen = np.c_[2560 * gaze[:, 0] ** 1.1, 1440 * gaze[:, 1]]
+        for name in ("linear", "poly2", "homography"):
+            model = fit_model(name, gaze, screen)
+            scalar = np.array([model.map(gx, gy) for gx, gy in gaze])
+            np.testing.assert_allclose(scalar, model.map_many(gaze), rtol=1e-9)
+
+    def test_homography_beyond_horizon(self):
+        """Тест: за линией горизонта гомография возвращает None/NaN, а маппер — центр экрана"""
+        # w = 1 - 2 * gx: горизонт на gx = 0.5
+        model = HomographyModel([[1000.0, 0.0, 0.0], [0.0, 1000.0, 0.0], [-2.0, 0.0, 1.0]])
+        self.assertIsNone(model.map(0.5, 0.5))
+        self.assertIsNone(model.map(0.7, 0.5))
+        self.assertIsNotNone(model.map(0.2, 0.5))
+        many = model.map_many(np.array([[0.2, 0.5], [0.5, 0.5], [0.7, 0.5]]))
+        self.assertTrue(np.isfinite(many[0]).all())
+        self.assertTrue(np.isnan(many[1:]).all())
+
+        mapper = ScreenMapper(calibration_file="", screen_w=1920, screen_h=1080)
+        mapper.model = model
+        self.assertEqual(mapper.map_to_screen(0.5, 0.5), (960, 540))
+        np.testing.assert_array_equal(mapper.map_many([[0.5, 0.5], [0.7, 0.5]]), [[960, 540], [960, 540]])
+
+    def test_unknown_model_raises(self):
+        """Тест: неизвестное имя модели вызывает ValueError"""
+        with self.assertRaises(ValueError):
+            fit_model("cubic", make_grid(), make_grid())
+
+
+class TestScreenMapper(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.calibration_file = os.path.join(self.tmpdir.name, "calibration_data.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_mapper(self, model_type="linear"):
+        gaze = make_grid()
+        screen = np.c_[2560 * gaze[:, 0], 1440 * gaze[:, 1]]
+        with open(self.calibration_file, 'w') as f:
+            json.dump({"gaze_coords": gaze.tolist(), "screen_coords": screen.tolist()}, f)
+        return ScreenMapper(calibration_file=self.calibration_file, screen_w=2560, screen_h=1440,
+                            model_type=model_type)
+
+    def test_load_calibration_fits_model(self):
+        """Тест: калибровка загружается и отображает взгляд в экранные координаты"""
+        mapper = self.make_mapper()
+        self.assertTrue(mapper.is_calibrated)
+        self.assertEqual(mapper.map_to_screen(0.5, 0.5), (1280, 720))
+
+    def test_missing_calibration(self):
+        """Тест: без файла калибровки маппер не откалиброван и масштабирует взгляд на экран"""
+        mapper = ScreenMapper(calibration_file=self.calibration_file, screen_w=1000, screen_h=500)
+        self.assertFalse(mapper.is_calibrated)
+        self.assertEqual(mapper.map_to_screen(0.25, 0.5), (250, 250))
+
+    def test_map_many_matches_map_to_screen(self):
+        """Тест: пакетное отображение совпадает с поэлементным, включая края и выход за диапазон"""
+        for model_type in ("linear", "poly2", "homography"):
+            mapper = self.make_mapper(model_type)
+            gaze = np.array([[0.5, 0.5], [0.01, 0.99], [0.0, 0.5], [1.2, 0.3], [0.33, 0.71]])
+            expected = [mapper.map_to_screen(gx, gy) for gx, gy in gaze]
+            np.testing.assert_array_equal(mapper.map_many(gaze), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
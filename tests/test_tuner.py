@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from calibration import tuner
+from config.settings import GAZE_OFFSET_MAX, apply_settings_profile
+from utils.recording import SessionRecorder
+from utils.screen import generate_calibration_points
+
+SCREEN = (1920, 1080)
+NOSE_BRIDGE = 6
+
+
+def record_session(path, noise=0.0, frames_per_target=30, seed=0):
+    """Сессия калибровки 3x3: взгляд линейно зависит от цели, между точками — пауза без кадров."""
+    rng = np.random.default_rng(seed)
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+    t = 100.0
+    with SessionRecorder(path, screen_size=SCREEN) as recorder:
+        for target in generate_calibration_points(*SCREEN, 3, 3):
+            gaze = 0.2 + 0.6 * np.asarray(target) / SCREEN
+            for _ in range(frames_per_target):
+                landmarks = np.full((478, 3), 0.5, dtype=np.float32)
+                # gaze_offset = 0.6 * (радужки - переносица), нормализация — по GAZE_OFFSET_MAX
+                offset = (gaze + rng.normal(0, noise, 2) - 0.5) * 2 * GAZE_OFFSET_MAX
+                landmarks[468:478, :2] = 0.5 + offset / 0.6
+                recorder.write(frame, timestamp=t, landmarks=landmarks, target=target)
+                t += 1 / 30
+            t += 1.0
+        recorder.write(frame, timestamp=t)  # кадр без лица и без цели
+
+
+class TestTuner(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "calib")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_load_session_caches_features(self):
+        """Тест: сессия разбивается на участки целей, признаки кэшируются и повторно не считаются"""
+        record_session(self.path)
+        session = tuner.load_session(self.path)
+        self.assertEqual(len(session.segments), 9)
+        self.assertEqual(session.segments[0][:2], (0, 30))
+        self.assertEqual(session.screen_size, SCREEN)
+        self.assertTrue(np.isnan(session.face_center[-1]).all())
+        self.assertTrue(os.path.exists(os.path.join(self.path, tuner.FEATURES_CACHE)))
+
+        with patch.object(tuner, "features_from_landmarks", side_effect=AssertionError("кэш не использован")):
+            cached = tuner.load_session(self.path)
+        np.testing.assert_array_equal(cached.gaze_offset, session.gaze_offset)
+
+    def test_clean_session_is_accurate(self):
+        """Тест: на точном следе курсор попадает в цели, каждый участок получает клик фиксацией"""
+        record_session(self.path)
+        session = tuner.load_session(self.path)
+        result = tuner.evaluate_config({"CURSOR_FILTER": "moving_average", "SMOOTHING_WINDOW": 3,
+                                        "DWELL_TIME": 0.3, "CALIBRATION_GRID": (3, 3)}, [session])
+        metrics = result["metrics"]
+        self.assertLess(metrics["error_mean_px"], 5)
+        self.assertLess(metrics["jitter_px"], 1)
+        self.assertEqual(metrics["click_hits"], 9)
+        self.assertEqual(metrics["missed_targets"], 0)
+        self.assertEqual(metrics["false_clicks"], 0)
+
+    def test_unfit_grid_reports_error(self):
+        """Тест: модели не хватает точек сетки — конфигурация получает ошибку, а не исключение"""
+        record_session(self.path)
+        session = tuner.load_session(self.path)
+        result = tuner.evaluate_config({"CALIBRATION_GRID": (2, 2), "MAPPING_MODEL": "poly2"}, [session])
+        self.assertIsNone(result["score"])
+        self.assertIn("poly2", result["error"])
+
+    def test_smoothing_trades_jitter_for_lag(self):
+        """Тест: более широкое окно сглаживания уменьшает дрожание и увеличивает задержку"""
+        record_session(self.path, noise=0.01)
+        session = tuner.load_session(self.path)
+        narrow, wide = (tuner.evaluate_config({"CURSOR_FILTER": "moving_average", "SMOOTHING_WINDOW": window},
+                                              [session])["metrics"] for window in (1, 10))
+        self.assertLess(wide["jitter_px"], narrow["jitter_px"])
+        self.assertGreater(wide["lag_mean_ms"], narrow["lag_mean_ms"])
+
+    def test_search_spaces(self):
+        """Тест: перебор не повторяет конфигурации, где окно сглаживания ни на что не влияет"""
+        space = {"CURSOR_FILTER": ["moving_average", "one_euro"], "SMOOTHING_WINDOW": [3, 5]}
+        configs = tuner.grid_configs(space)
+        self.assertEqual(len(configs), 3)
+        self.assertNotIn("SMOOTHING_WINDOW", [c for c in configs if c["CURSOR_FILTER"] == "one_euro"][0])
+        self.assertEqual(len(tuner.random_configs(space, 10)), 3)
+        self.assertEqual(len(tuner.random_configs(tuner.DEFAULT_SPACE, 20, seed=1)), 20)
+
+    def test_parallel_search_writes_profile(self):
+        """Тест: поиск в пуле процессов сортирует конфигурации, лучший профиль читается настройками"""
+        record_session(self.path, noise=0.01)
+        sessions = [tuner.load_session(self.path)]
+        configs = tuner.grid_configs({"CALIBRATION_GRID": [(2, 2), (3, 3)], "DWELL_TIME": [0.3, 5.0]})
+        results = tuner.run_search(sessions, configs, workers=2)
+        self.assertEqual(len(results), 4)
+        scores = [r["score"] for r in results]
+        self.assertEqual(scores, sorted(scores))
+        self.assertEqual(results[0]["settings"]["DWELL_TIME"], 0.3)
+
+        path = os.path.join(self.tmpdir.name, "profiles", "tuned.json")
+        tuner.write_profile(results[0], path, sessions)
+        namespace = {"DWELL_TIME": 1.0, "CALIBRATION_GRID": (3, 3)}
+        with open(path) as f:
+            self.assertEqual(json.load(f)["sessions"], ["calib"])
+        applied = apply_settings_profile(path, namespace)
+        self.assertEqual(applied["DWELL_TIME"], 0.3)
+        self.assertIsInstance(namespace["CALIBRATION_GRID"], tuple)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import time
+import unittest
+from unittest.mock import patch
+import numpy as np
+from core.events import GazeEventBus
+from utils.visual_feedback import DebugOverlay
+
+
+class TestDebugOverlay(unittest.TestCase):
+    def setUp(self):
+        self.imshow = patch("cv2.imshow").start()
+        self.wait_key = patch("cv2.waitKey", return_value=-1).start()
+        patch("cv2.destroyWindow").start()
+        self.bus = GazeEventBus()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_frames_are_copied_at_capped_rate(self):
+        """Тест: цикл передаёт кадр на каждом шаге, но копия снимается не чаще заданной частоты"""
+        overlay = DebugOverlay(self.bus, rate_hz=10)
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        accepted = sum(overlay.submit_frame(frame, now=i / 100) for i in range(100))
+        overlay.close()
+        self.assertEqual(accepted, 10)
+
+    def test_renders_latest_state_and_forwards_keys(self):
+        """Тест: render() рисует последнее событие на отражённой копии кадра, нажатые клавиши отдаются циклу"""
+        self.wait_key.return_value = ord('c')
+        overlay = DebugOverlay(self.bus, rate_hz=50, mirror=True)
+        self.bus.publish_sample(time.monotonic(), (0.5, 0.5), (0.25, 0.5), (960, 540))
+        overlay.render()
+        self.imshow.assert_not_called()  # кадра ещё нет — окно не создаётся
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        overlay.submit_frame(frame)
+        overlay.render()
+        overlay.render()  # новых кадров нет — повторно не рисуется
+        keys = overlay.keys()
+        overlay.close()
+
+        self.assertEqual(overlay.frames_rendered, 1)
+        self.assertEqual(keys, [ord('c'), ord('c')])
+        view = self.imshow.call_args[0][1]
+        # Центр лица 0.25 в отражённых координатах — точка нарисована на отражённом кадре
+        self.assertTrue(view[24, 16, 1] > 0)
+        self.assertFalse(frame.any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,21 +1,157 @@
+import threading
+import time
+
 import cv2
+from config.settings import CAMERA_FOURCC, CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS, CAMERA_BUFFER_SIZE
+from utils.metrics import NULL_METRICS
+
+# Число буферов фонового захвата: в один пишет драйвер, один — последний готовый кадр,
+# один — кадр, выданный потребителю (действителен до следующего read_latest)
+CAPTURE_BUFFERS = 3
+
+def configure_capture(cap, fourcc=CAMERA_FOURCC, width=CAMERA_WIDTH, height=CAMERA_HEIGHT, fps=CAMERA_FPS,
+                      buffer_size=CAMERA_BUFFER_SIZE):
+    """Запрашивает у драйвера формат, разрешение, частоту и размер очереди; None — оставить как есть.
+
+    Драйвер может выбрать ближайший поддерживаемый режим, поэтому возвращаются фактические значения.
+    """
+    # FOURCC задаётся до разрешения: у многих камер высокие разрешения доступны только в MJPG
+    if fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    if width and height:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if fps:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+    if buffer_size:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+    return (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            cap.get(cv2.CAP_PROP_FPS))
 
 class Camera:
-    def __init__(self, device_id=None):
+    def __init__(self, device_id=None, threaded=False, metrics=None, fourcc=CAMERA_FOURCC, width=CAMERA_WIDTH,
+                 height=CAMERA_HEIGHT, fps=CAMERA_FPS, buffer_size=CAMERA_BUFFER_SIZE):
         # Используем значение по умолчанию 0, если device_id не указан
         self.device_id = device_id or 0
         self.cap = cv2.VideoCapture(self.device_id)
         if not self.cap.isOpened():
             raise RuntimeError(f"Не удалось открыть камеру с ID {self.device_id}.")
+        self.width, self.height, self.fps = configure_capture(self.cap, fourcc, width, height, fps, buffer_size)
+
+        # Кадры читаются в заранее выделенные буферы (cap.read(buffer)) и не зеркалируются —
+        # отражение выполняет GazeTracker над landmark'ами, поэтому на кадр нет ни одного выделения памяти.
+        # Выданный кадр действителен до следующего вызова read_latest
+        self._buffers = [None] * CAPTURE_BUFFERS
+        self._held_index = None  # буфер, выданный потребителю
+
+        # Фоновый захват: поток постоянно читает драйвер и хранит только последний кадр,
+        # поэтому очередь V4L2 не накапливает устаревшие кадры во время медленного инференса
+        self.threaded = threaded
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._latest_index = None
+        self._latest_seq = 0
+        self._latest_timestamp = None
+        self._last_read_seq = 0
+        self._exited = False  # поток захвата завершился и больше не обращается к cap
+        self._release_on_exit = False  # release() не дождался потока — cap освободит сам поток
+
+        # Счётчики
+        self.metrics = metrics or NULL_METRICS
+        self.frames_captured = 0
+        self.frames_dropped = 0  # кадры, перезаписанные новыми до того, как их забрал потребитель
+
+        if self.threaded:
+            self.start()
+
+    def _read_into(self, index):
+        # Первое чтение выделяет буфер; дальше драйвер пишет в него же (если размер кадра не изменился)
+        ret, frame = self.cap.read(self._buffers[index])
+        if ret:
+            self._buffers[index] = frame
+        return ret
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="camera-capture", daemon=True)
+        self._thread.start()
+
+    def _capture_loop(self):
+        while self._running:
+            with self._cond:
+                index = next(i for i in range(CAPTURE_BUFFERS) if i not in (self._latest_index, self._held_index))
+            with self.metrics.timer("capture"):
+                ret = self._read_into(index)
+            timestamp = time.monotonic()
+            if not ret:
+                break
+
+            with self._cond:
+                if self._latest_seq > self._last_read_seq:
+                    self.frames_dropped += 1
+                    self.metrics.inc("frames_dropped")
+                self._latest_index = index
+                self._latest_seq += 1
+                self._latest_timestamp = timestamp
+                self.frames_captured += 1
+                self.metrics.inc("frames_captured")
+                self._cond.notify_all()
+
+        with self._cond:
+            self._running = False
+            self._exited = True
+            self._cond.notify_all()
+            if self._release_on_exit:
+                self.cap.release()
+
+    def read_latest(self, timeout=None):
+        """Возвращает (frame, seq, timestamp) — самый свежий кадр, который ещё не был выдан.
+
+        frame равен None, если камера остановлена или истёк timeout.
+        """
+        if not self.threaded:
+            with self.metrics.timer("capture"):
+                ret = self._read_into(0)
+            timestamp = time.monotonic()
+            if not ret:
+                return None, self._latest_seq, None
+            self._latest_seq += 1
+            self._last_read_seq = self._latest_seq
+            self.frames_captured += 1
+            self.metrics.inc("frames_captured")
+            return self._buffers[0], self._latest_seq, timestamp
+
+        with self._cond:
+            has_new = self._cond.wait_for(
+                lambda: self._latest_seq > self._last_read_seq or not self._running,
+                timeout=timeout
+            )
+            if not has_new or self._latest_seq == self._last_read_seq:
+                return None, self._last_read_seq, None
+            self._last_read_seq = self._latest_seq
+            self._held_index = self._latest_index
+            return self._buffers[self._held_index], self._latest_seq, self._latest_timestamp
 
     def get_frame(self):
-        ret, frame = self.cap.read()
-        if not ret:
-            return None
-        return cv2.flip(frame, 1)  # зеркальное отражение
+        frame, _, _ = self.read_latest()
+        return frame
 
-    def release(self):
+    def release(self, timeout=1.0):
+        # Освобождать VideoCapture во время cap.read() в другом потоке нельзя (поведение OpenCV не определено):
+        # если поток захвата не завершился за timeout, cap освободит он сам после выхода из read()
+        if self._thread is not None:
+            self._running = False
+            self._thread.join(timeout=timeout)
+            self._thread = None
+            with self._cond:
+                if not self._exited:
+                    self._release_on_exit = True
+                    print("⚠️ Поток захвата камеры не завершился — камера будет освобождена после чтения кадра.")
+                    return
         self.cap.release()
 
     def is_opened(self):
-        return self.cap.isOpened()
\ No newline at end of file
+        return self.cap.isOpened()
@@ -0,0 +1,252 @@
+# utils/metrics.py
+#
+# Лёгкая встроенная телеметрия: гистограммы времени этапов, счётчики и датчики.
+# Компоненты получают объект metrics в конструкторе; по умолчанию это NULL_METRICS,
+# все методы которого пустые, поэтому выключенная телеметрия почти ничего не стоит.
+# Экспорт — JSON-lines файл и HTTP-эндпоинт в текстовом формате Prometheus.
+
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = "gz_ctrl"
+
+# Границы корзин гистограмм в секундах (от 0.5 мс до 1 с)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последняя корзина — +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        # Оценка по корзинам: линейная интерполяция внутри корзины, как histogram_quantile в Prometheus
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._fps_window_start = None
+        self._fps_window_frames = 0
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def timer(self, name):
+        return _Timer(self, name)
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def mark_frame(self, now=None, window=1.0):
+        # Эффективная частота обработки кадров, усреднённая по окну в window секунд
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._fps_window_start is None:
+                self._fps_window_start = now
+                return
+            self._fps_window_frames += 1
+            elapsed = now - self._fps_window_start
+            if elapsed >= window:
+                self._gauges["fps"] = self._fps_window_frames / elapsed
+                self._fps_window_start = now
+                self._fps_window_frames = 0
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {name: h.snapshot() for name, h in self._histograms.items()}
+        processed = counters.get("frames_processed", 0)
+        if processed:
+            gauges["face_lost_ratio"] = counters.get("faces_lost", 0) / processed
+        return {
+            "time": time.time(),
+            "uptime": time.time() - self.started_at,
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": histograms,
+        }
+
+    def to_prometheus(self):
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {name: (list(h.counts), h.sum, h.count) for name, h in self._histograms.items()}
+        processed = counters.get("frames_processed", 0)
+        if processed:
+            gauges["face_lost_ratio"] = counters.get("faces_lost", 0) / processed
+
+        lines = []
+        for name, value in sorted(counters.items()):
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, value in sorted(gauges.items()):
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        for name, (counts, total, count) in sorted(histograms.items()):
+            metric = f"{METRIC_PREFIX}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum {total}")
+            lines.append(f"{metric}_count {count}")
+        return "\n".join(lines) + "\n"
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class NullMetrics:
+    """Выключенная телеметрия: тот же интерфейс, что у Metrics, без какой-либо работы."""
+
+    enabled = False
+    _timer = _NullTimer()
+
+    def observe(self, name, seconds):
+        pass
+
+    def timer(self, name):
+        return self._timer
+
+    def inc(self, name, value=1):
+        pass
+
+    def set_gauge(self, name, value):
+        pass
+
+    def mark_frame(self, now=None, window=1.0):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class JsonLinesExporter:
+    """Раз в interval секунд дописывает снимок метрик строкой JSON в файл."""
+
+    def __init__(self, metrics, path, interval=5.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-jsonl", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(self.metrics.snapshot(), ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self.write_snapshot()
+
+
+class PrometheusExporter:
+    """Локальный HTTP-эндпоинт /metrics в текстовом формате Prometheus."""
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        self.metrics = metrics
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # не засоряем консоль запросами скрейпера
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
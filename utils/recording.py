@@ -0,0 +1,254 @@
+# utils/recording.py
+#
+# Запись и воспроизведение сессий отслеживания взгляда.
+# Сессия — каталог:
+#   session.json     — описание (версия, кодек, размер кадра, частота, отражены ли кадры, размер экрана)
+#   frames.u8        — кадры подряд в сыром виде (codec="raw", открывается через np.memmap)
+#   frames.avi       — кадры в MJPEG (codec="mjpeg", компактнее для долгих сессий)
+#   timestamps.f64   — время захвата каждого кадра (time.monotonic)
+#   landmarks.f32    — landmark'и (N, 478, 3) в координатах полного кадра (как их выдал трекер,
+#                      с учётом зеркалирования), NaN если лица нет
+#   targets.f32      — известная точка на экране (N, 2), NaN если её нет
+# Все потоки дописываются по кадру, поэтому длинная сессия не держится в памяти.
+
+import json
+import os
+import time
+
+import numpy as np
+
+SESSION_VERSION = 1
+LANDMARK_COUNT = 478
+
+
+def _landmarks_to_array(landmarks):
+    out = np.full((LANDMARK_COUNT, 3), np.nan, dtype=np.float32)
+    if landmarks is None:
+        return out
+    if isinstance(landmarks, np.ndarray):
+        data = landmarks.reshape(-1, 3)
+    else:
+        data = np.array([[lm.x, lm.y, lm.z] for lm in landmarks], dtype=np.float32)
+    count = min(len(data), LANDMARK_COUNT)
+    out[:count] = data[:count]
+    return out
+
+
+class SessionRecorder:
+    def __init__(self, path, codec="raw", fps=30.0, frames_mirrored=False, screen_size=None):
+        if codec not in ("raw", "mjpeg"):
+            raise ValueError(f"Неизвестный кодек записи: {codec}")
+        self.path = path
+        self.codec = codec
+        self.fps = fps
+        self.frames_mirrored = frames_mirrored  # кадры пишутся так, как их отдала камера (без отражения)
+        self.screen_size = screen_size  # (w, h) экрана, в пикселях которого заданы цели
+        self.frame_count = 0
+        self.frame_shape = None
+        os.makedirs(path, exist_ok=True)
+
+        self._frames_file = None
+        self._video_writer = None
+        self._timestamps_file = open(os.path.join(path, "timestamps.f64"), 'wb')
+        self._landmarks_file = open(os.path.join(path, "landmarks.f32"), 'wb')
+        self._targets_file = open(os.path.join(path, "targets.f32"), 'wb')
+
+    def _open_frames(self, frame):
+        self.frame_shape = frame.shape
+        if self.codec == "raw":
+            self._frames_file = open(os.path.join(self.path, "frames.u8"), 'wb')
+        else:
+            import cv2
+            h, w = frame.shape[:2]
+            self._video_writer = cv2.VideoWriter(
+                os.path.join(self.path, "frames.avi"), cv2.VideoWriter_fourcc(*"MJPG"), self.fps, (w, h)
+            )
+            if not self._video_writer.isOpened():
+                raise RuntimeError("Не удалось открыть MJPEG-файл для записи.")
+        self._write_header()
+
+    def _write_header(self):
+        h, w = self.frame_shape[:2]
+        header = {
+            "version": SESSION_VERSION,
+            "codec": self.codec,
+            "width": w,
+            "height": h,
+            "channels": self.frame_shape[2] if len(self.frame_shape) > 2 else 1,
+            "fps": self.fps,
+            "frame_count": self.frame_count,
+            "landmark_count": LANDMARK_COUNT,
+            "frames_mirrored": self.frames_mirrored,
+            "screen_size": list(self.screen_size) if self.screen_size else None,
+        }
+        with open(os.path.join(self.path, "session.json"), 'w') as f:
+            json.dump(header, f, indent=2)
+
+    def write(self, frame, timestamp=None, landmarks=None, target=None):
+        if self.frame_shape is None:
+            self._open_frames(frame)
+        elif frame.shape != self.frame_shape:
+            raise ValueError(f"Размер кадра изменился: {frame.shape} вместо {self.frame_shape}")
+
+        if self.codec == "raw":
+            self._frames_file.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+        else:
+            self._video_writer.write(frame)
+
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self._timestamps_file.write(np.float64(timestamp).tobytes())
+        self._landmarks_file.write(_landmarks_to_array(landmarks).tobytes())
+        target = (np.nan, np.nan) if target is None else target
+        self._targets_file.write(np.asarray(target, dtype=np.float32).tobytes())
+        self.frame_count += 1
+        # Раз в секунду записи буферы сбрасываются на диск: прерванная запись теряет не больше секунды
+        if self.frame_count % max(1, int(self.fps)) == 0:
+            for f in (self._frames_file, self._timestamps_file, self._landmarks_file, self._targets_file):
+                if f is not None:
+                    f.flush()
+
+    def close(self):
+        if self.frame_shape is not None:
+            self._write_header()
+        if self._frames_file is not None:
+            self._frames_file.close()
+        if self._video_writer is not None:
+            self._video_writer.release()
+        for f in (self._timestamps_file, self._landmarks_file, self._targets_file):
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ReplaySession:
+    """Доступ к записанной сессии; массивы открываются через memmap и не читаются целиком."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "session.json"), 'r') as f:
+            self.header = json.load(f)
+        if self.header.get("version") != SESSION_VERSION:
+            raise ValueError(f"Неподдерживаемая версия сессии: {self.header.get('version')}")
+        self.codec = self.header["codec"]
+        self.frame_shape = (self.header["height"], self.header["width"], self.header["channels"])
+        # Число кадров в заголовке обновляется только при close(); у прерванной записи (сбой, kill)
+        # оно устаревшее, поэтому берётся число полных записей во всех потоках
+        self.frame_count = self._complete_records()
+        # Прежние версии Camera отражали кадр при захвате — в сессиях без этого поля кадры отражены
+        self.frames_mirrored = self.header.get("frames_mirrored", True)
+        screen_size = self.header.get("screen_size")
+        self.screen_size = tuple(screen_size) if screen_size else None
+
+        self.timestamps = self._open_array("timestamps.f64", np.float64, ())
+        self.landmarks = self._open_array("landmarks.f32", np.float32, (self.header["landmark_count"], 3))
+        self.targets = self._open_array("targets.f32", np.float32, (2,))
+        self._frames = None
+        if self.codec == "raw":
+            self._frames = self._open_array("frames.u8", np.uint8, self.frame_shape)
+
+    def _complete_records(self):
+        record_sizes = {
+            "timestamps.f64": 8,
+            "landmarks.f32": self.header["landmark_count"] * 3 * 4,
+            "targets.f32": 2 * 4,
+        }
+        if self.codec == "raw":
+            record_sizes["frames.u8"] = int(np.prod(self.frame_shape))
+        counts = []
+        for name, size in record_sizes.items():
+            path = os.path.join(self.path, name)
+            counts.append(os.path.getsize(path) // size if os.path.exists(path) else 0)
+        return min(counts)
+
+    def _open_array(self, name, dtype, shape):
+        if self.frame_count == 0:
+            return np.zeros((0,) + shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode='r',
+                         shape=(self.frame_count,) + shape)
+
+    def frames(self):
+        """Итератор по кадрам сессии (копии, которые можно изменять)."""
+        if self.codec == "raw":
+            for i in range(self.frame_count):
+                yield np.array(self._frames[i])
+            return
+        import cv2
+        cap = cv2.VideoCapture(os.path.join(self.path, "frames.avi"))
+        try:
+            for _ in range(self.frame_count):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+        finally:
+            cap.release()
+
+
+class ReplayCamera:
+    """Замена utils.camera.Camera, отдающая кадры записанной сессии.
+
+    realtime=True выдерживает исходные интервалы между кадрами, иначе кадры идут с максимальной скоростью.
+    Выдаются записанные временные метки, поэтому повтор детерминирован.
+    """
+
+    def __init__(self, path, realtime=False, loop=False):
+        self.session = ReplaySession(path)
+        self.realtime = realtime
+        self.loop = loop
+        self.threaded = False
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self._iterator = self.session.frames()
+        self._index = 0
+        self._seq = 0
+        self._replay_start = None
+        self._time_offset = 0.0  # сдвиг меток при зацикливании, чтобы они росли монотонно
+        self._opened = True
+
+    def read_latest(self, timeout=None):
+        if not self._opened:
+            return None, self._seq, None
+        frame = next(self._iterator, None)
+        if frame is None and self.loop and self.session.frame_count > 0:
+            timestamps = self.session.timestamps
+            self._time_offset += float(timestamps[-1] - timestamps[0]) + 1.0 / self.session.header["fps"]
+            self._iterator = self.session.frames()
+            self._index = 0
+            frame = next(self._iterator, None)
+        if frame is None:
+            self._opened = False
+            return None, self._seq, None
+
+        timestamp = float(self.session.timestamps[self._index]) + self._time_offset
+        if self.realtime:
+            if self._replay_start is None:
+                self._replay_start = (time.monotonic(), timestamp)
+            wall_start, session_start = self._replay_start
+            delay = (timestamp - session_start) - (time.monotonic() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+
+        if self.session.frames_mirrored:
+            # Отражение выполняет трекер над landmark'ами — возвращаем кадр к виду, в котором его отдаёт камера
+            import cv2
+            frame = cv2.flip(frame, 1)
+
+        self._index += 1
+        self._seq += 1
+        self.frames_captured += 1
+        return frame, self._seq, timestamp
+
+    def get_frame(self):
+        frame, _, _ = self.read_latest()
+        return frame
+
+    def release(self):
+        self._opened = False
+
+    def is_opened(self):
+        return self._opened
+
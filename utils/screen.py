@@ -1,8 +1,8 @@
 # utils/screen.py
 
-import pyautogui
-
 def get_screen_size():
+    # pyautogui импортируется по требованию: при импорте он подключается к дисплею
+    import pyautogui
     return pyautogui.size()
 
 def generate_calibration_points(screen_w, screen_h, cols=3, rows=3):
@@ -0,0 +1,136 @@
+# utils/visual_feedback.py
+#
+# Отладочное окно. Рисуется с ограниченной частотой (DEBUG_OVERLAY_HZ) по последнему состоянию шины
+# событий взгляда и последнему переданному кадру. HighGUI не потокобезопасен (Cocoa падает, Qt отказывается
+# работать вне главного потока), поэтому render() вызывает главный поток, а цикл взгляда работает в рабочем
+# потоке и только раз в интервал копирует кадр в заранее выделенный буфер и забирает нажатые клавиши.
+
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config.settings import DEBUG_OVERLAY_HZ, CAMERA_MIRROR
+from core.events import GAZE, FACE_FOUND, FACE_LOST, FIXATION_START, FIXATION_END
+
+WINDOW_NAME = "Gaze Control — нажмите 'q'"
+
+
+class DebugOverlay:
+    def __init__(self, bus, rate_hz=DEBUG_OVERLAY_HZ, mirror=CAMERA_MIRROR, window_name=WINDOW_NAME):
+        # mirror — отражать кадр при показе: трекер отражает landmark'и, а кадр камеры остаётся как есть
+        self.interval = 1.0 / rate_hz
+        self.mirror = mirror
+        self.window_name = window_name
+        self.frames_rendered = 0
+
+        # Состояние из шины: последний отсчёт взгляда, фиксация, наличие лица
+        self._subscription = bus.subscribe(policy="conflate")
+        self._last_gaze = None
+        self._fixating = False
+        self._face_visible = False
+
+        self._keys = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._pending = None  # копия последнего переданного кадра
+        self._has_frame = False
+        self._next_submit = 0.0
+        self._view = None
+        self._shown = False
+
+    def wants_frame(self, now=None):
+        now = time.monotonic() if now is None else now
+        return now >= self._next_submit
+
+    def submit_frame(self, frame, now=None):
+        """Вызывается циклом на каждом кадре; кадр копируется не чаще rate_hz, остальные вызовы — одно сравнение."""
+        now = time.monotonic() if now is None else now
+        if now < self._next_submit:
+            return False
+        self._next_submit = now + self.interval
+        with self._lock:
+            if self._pending is None or self._pending.shape != frame.shape:
+                self._pending = np.empty_like(frame)
+            np.copyto(self._pending, frame)
+            self._has_frame = True
+        return True
+
+    def keys(self):
+        """Клавиши, нажатые в окне с прошлого вызова (коды как у cv2.waitKey & 0xFF)."""
+        keys = []
+        while True:
+            try:
+                keys.append(self._keys.get_nowait())
+            except queue.Empty:
+                return keys
+
+    def _drain_events(self):
+        while True:
+            event = self._subscription.get(0)
+            if event is None:
+                return
+            if event.kind == GAZE:
+                self._last_gaze = event
+            elif event.kind in (FIXATION_START, FIXATION_END):
+                self._fixating = event.kind == FIXATION_START
+            elif event.kind in (FACE_FOUND, FACE_LOST):
+                self._face_visible = event.kind == FACE_FOUND
+
+    def _draw(self, view):
+        h, w = view.shape[:2]
+        event = self._last_gaze
+        if self._face_visible and event is not None:
+            # Отладка: точка в центре лица (зеленая)
+            fcx, fcy = event.face_center
+            cv2.circle(view, (int(fcx * w), int(fcy * h)), 3, (0, 255, 0), -1)
+            lines = [f"gaze {event.gaze[0]:.3f} {event.gaze[1]:.3f}", f"screen {event.screen[0]} {event.screen[1]}",
+                     f"age {(time.monotonic() - event.timestamp) * 1000:.0f} ms"]
+            if self._fixating:
+                lines.append("FIXATION")
+        else:
+            lines = ["NO FACE"]
+        # Шрифты Hershey не поддерживают кириллицу — подписи латиницей
+        for i, line in enumerate(lines):
+            cv2.putText(view, line, (10, 20 + 20 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+
+    def render(self):
+        """Один шаг окна: отрисовка свежего кадра и обработка событий HighGUI; занимает около интервала.
+
+        Вызывается только из главного потока.
+        """
+        started = time.monotonic()
+        self._drain_events()
+        fresh = False
+        with self._lock:
+            if self._has_frame:
+                if self._view is None or self._view.shape != self._pending.shape:
+                    self._view = np.empty_like(self._pending)
+                if self.mirror:
+                    cv2.flip(self._pending, 1, dst=self._view)
+                else:
+                    np.copyto(self._view, self._pending)
+                self._has_frame = False
+                fresh = True
+        if fresh:
+            self._draw(self._view)
+            cv2.imshow(self.window_name, self._view)
+            self.frames_rendered += 1
+            self._shown = True
+
+        remaining = self.interval - (time.monotonic() - started)
+        if not self._shown:
+            time.sleep(max(remaining, 0.001))
+            return
+        # waitKey обслуживает окно и заодно выдерживает интервал до следующей отрисовки
+        key = cv2.waitKey(max(1, int(remaining * 1000)))
+        if key != -1:
+            self._keys.put(key & 0xFF)
+
+    def close(self):
+        # Из главного потока, как и render()
+        if self._shown:
+            cv2.destroyWindow(self.window_name)
+            self._shown = False
+        self._subscription.close()